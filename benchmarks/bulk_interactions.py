@@ -0,0 +1,122 @@
+"""
+Queued interactions replayed one request each and in a single bulk one.
+
+Run against a migrated database, configured like the service:
+
+    python -m benchmarks.bulk_interactions
+
+A client coming back online favs OPERATIONS snaps. Replayed one by one,
+each fav is a transaction of its own, like a request to the fav endpoint.
+In bulk they are applied by apply_interactions in a single transaction,
+as the bulk endpoint does. Favs are used as they notify nobody.
+
+Snaps are committed, and deleted with their favs at the end,
+so point it to a scratch database.
+"""
+import asyncio
+import uuid
+from functools import partial
+from typing import Any, List
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# isort: off
+# The API package has to be loaded before the DAOs it imports.
+from content_discovery.web.api import router  # noqa: F401
+from benchmarks.common import report, timed
+from content_discovery.constants import InteractionAction
+from content_discovery.db.dao.interaction_dao import InteractionDAO
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.dao.timeline_dao import TimelineDAO
+from content_discovery.db.models.fav_model import FavModel
+from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.services.interaction_counters.counters import (
+    interaction_counters,
+)
+from content_discovery.settings import settings
+from content_discovery.web.api.interactions.bulk import apply_interactions
+from content_discovery.web.api.interactions.schema import InteractionOperation
+
+# isort: on
+
+OPERATIONS = (10, 100, 1000)
+AUTHOR = "bench_author"
+
+Sessions = async_sessionmaker[AsyncSession]
+
+
+async def _one_by_one(sessions: Sessions, user_id: str, snap_ids: List[str]) -> None:
+    """A transaction per fav."""
+    for snap_id in snap_ids:
+        async with sessions() as session:
+            await interaction_counters.add(
+                InteractionDAO(session),
+                FavModel,
+                user_id,
+                snap_id,
+            )
+            await session.commit()
+
+
+async def _bulk(sessions: Sessions, user_id: str, snap_ids: List[str]) -> None:
+    """Every fav in one transaction."""
+    operations = [
+        InteractionOperation(action=InteractionAction.fav, snap_id=snap_id)
+        for snap_id in snap_ids
+    ]
+    async with sessions() as session:
+        await apply_interactions(
+            user_id,
+            operations,
+            InteractionDAO(session),
+            SnapDAO(session),
+            TimelineDAO(session),
+        )
+        await session.commit()
+
+
+async def _as_new_user(run: Any, sessions: Sessions, snap_ids: List[str]) -> float:
+    """Fav the snaps as a new user, in milliseconds."""
+    user_id = f"bench_{uuid.uuid4()}"
+    return await timed(partial(run, sessions, user_id, snap_ids), 1)
+
+
+async def bench_bulk_interactions(sessions: Sessions) -> None:
+    """Favs replayed one by one and in bulk, for more and more of them."""
+    async with sessions() as session:
+        snap_dao = SnapDAO(session)
+        for index in range(max(OPERATIONS)):
+            await snap_dao.create_snaps_model(AUTHOR, f"snap {index}", 1)
+        await session.commit()
+        query = select(SnapsModel.id).where(SnapsModel.user_id == AUTHOR)
+        snap_ids = [str(snap_id) for snap_id in await session.scalars(query)]
+
+    report("operations", "one by one ms", "bulk ms", "commits")
+    for number in OPERATIONS:
+        one_by_one = await _as_new_user(_one_by_one, sessions, snap_ids[:number])
+        bulk = await _as_new_user(_bulk, sessions, snap_ids[:number])
+        report(number, one_by_one, bulk, f"{number} -> 1")
+
+
+async def main() -> None:
+    """Run the benchmark and delete what it wrote."""
+    engine = create_async_engine(str(settings.db_url))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    try:  # noqa: WPS501
+        await bench_bulk_interactions(sessions)
+    finally:
+        async with sessions() as session:
+            authored = select(SnapsModel.id).where(SnapsModel.user_id == AUTHOR)
+            await session.execute(
+                delete(FavModel).where(FavModel.snap_id.in_(authored)),
+            )
+            await session.execute(
+                delete(SnapsModel).where(SnapsModel.user_id == AUTHOR),
+            )
+            await session.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
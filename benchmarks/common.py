@@ -0,0 +1,37 @@
+"""Timing and reporting shared by the benchmarks."""
+import time
+from typing import Any, Awaitable, Callable
+
+
+async def timed(run: Callable[[], Awaitable[Any]], repeat: int) -> float:
+    """
+    Time a coroutine function.
+
+    :param run: coroutine function to run.
+    :param repeat: number of runs.
+    :returns: the fastest run, in milliseconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await run()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def report(*cells: Any, width: int = 14, digits: str = ".1f") -> None:
+    """
+    Print a row of a results table.
+
+    :param cells: values of the row.
+    :param width: width of every column.
+    :param digits: format of the floats.
+    """
+    columns = (_format(cell, digits).rjust(width) for cell in cells)
+    print("".join(columns))  # noqa: WPS421
+
+
+def _format(cell: Any, digits: str) -> str:
+    if isinstance(cell, float):
+        return format(cell, digits)
+    return str(cell)
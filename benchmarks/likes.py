@@ -0,0 +1,150 @@
+"""
+Many concurrent likes of one snap, with immediate and write behind counters.
+
+Run against a migrated database, configured like the service:
+
+    python -m benchmarks.likes
+
+Every like is a transaction of its own, like a request to the like
+endpoint: it inserts the like and changes the counter of the snap in one
+statement, reads the snap back for the notification and commits. With
+immediate counters each transaction updates the row of the snap and
+holds its lock until it commits, so the likes queue behind each other. With write behind
+counters the changes are summed in memory and flushed every
+FLUSH_INTERVAL in one statement.
+
+Other snaps are written first, so that the snap is looked up by its
+index as in a real table. Everything is committed and deleted at the
+end, so point it to a scratch database.
+"""
+import asyncio
+import time
+from contextlib import suppress
+
+from sqlalchemy import delete, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# isort: off
+# The API package has to be loaded before the DAOs it imports.
+from content_discovery.web.api import router  # noqa: F401
+from benchmarks.common import report
+from content_discovery.constants import CounterMode
+from content_discovery.db.dao.interaction_dao import InteractionDAO
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.models.like_model import LikeModel
+from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.services.interaction_counters.counters import (
+    interaction_counters,
+)
+from content_discovery.settings import settings
+
+# isort: on
+
+SNAPS = 100000
+LIKES = 2000
+CONCURRENCY = 50
+FLUSH_INTERVAL = 0.1
+
+SEED_USER = "seed"
+SEED_SNAPS = """
+INSERT INTO snaps (id, user_id, content, likes, shares, favs,
+                   created_at, visibility, privacy)
+SELECT gen_random_uuid(), :user, 'snap', 0, 0, 0,
+       now() AT TIME ZONE 'utc', 1, 1
+FROM generate_series(1, :snaps)
+"""
+
+Sessions = async_sessionmaker[AsyncSession]
+
+
+async def _like(sessions: Sessions, snap_id: str, user_id: str) -> None:
+    """A like in a transaction of its own."""
+    async with sessions() as session:
+        interaction_dao = InteractionDAO(session)
+        await interaction_counters.add(interaction_dao, LikeModel, user_id, snap_id)
+        await SnapDAO(session).get_snap_from_id(snap_id)
+        await session.commit()
+
+
+async def _flush_every_interval(sessions: Sessions) -> None:
+    """Flush the counters like the scheduler of each process does."""
+    while True:  # noqa: WPS457
+        await asyncio.sleep(FLUSH_INTERVAL)
+        async with sessions() as session:
+            await interaction_counters.flush(session)
+
+
+async def _likes(sessions: Sessions, snap_id: str) -> float:
+    """Like the snap LIKES times, CONCURRENCY at a time, in seconds."""
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def _limited(user: int) -> None:  # noqa: WPS430
+        async with semaphore:
+            await _like(sessions, snap_id, f"user{user}")
+
+    flusher = asyncio.create_task(_flush_every_interval(sessions))
+    start = time.perf_counter()
+    await asyncio.gather(*(_limited(user) for user in range(LIKES)))
+    elapsed = time.perf_counter() - start
+    flusher.cancel()
+    with suppress(asyncio.CancelledError):
+        await flusher
+    async with sessions() as session:
+        await interaction_counters.flush(session)
+    return elapsed
+
+
+async def bench_likes(sessions: Sessions) -> None:
+    """Likes per second and the counter they leave, in each mode."""
+    report("mode", "likes/s", "counted likes", width=16)
+    for mode in CounterMode:
+        settings.interaction_counters = mode
+        async with sessions() as session:
+            snap = await SnapDAO(session).create_snaps_model("author", "hot", 1)
+            await session.commit()
+        snap_id = str(snap.id)
+        try:  # noqa: WPS501
+            elapsed = await _likes(sessions, snap_id)
+            async with sessions() as session:
+                counted = await SnapDAO(session).get_snap_from_id(snap_id)
+            likes = counted.likes if counted else None
+            report(mode.value, LIKES / elapsed, likes, width=16)
+        finally:
+            async with sessions() as session:
+                await session.execute(
+                    delete(LikeModel).where(LikeModel.snap_id == snap_id),
+                )
+                await session.execute(
+                    delete(SnapsModel).where(SnapsModel.id == snap.id),
+                )
+                await session.commit()
+
+
+async def main() -> None:
+    """Run the benchmark with a connection per concurrent like."""
+    engine = create_async_engine(
+        str(settings.db_url),
+        pool_size=CONCURRENCY,
+        max_overflow=2,
+    )
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    async with sessions() as session:
+        await session.execute(
+            text(SEED_SNAPS),
+            {"user": SEED_USER, "snaps": SNAPS},
+        )
+        await session.execute(text("ANALYZE snaps"))
+        await session.commit()
+    try:  # noqa: WPS501
+        await bench_likes(sessions)
+    finally:
+        async with sessions() as session:
+            await session.execute(
+                delete(SnapsModel).where(SnapsModel.user_id == SEED_USER),
+            )
+            await session.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Content search over a large corpus.
+
+Run against a migrated database, configured like the service:
+
+    python -m benchmarks.search
+
+A few million snaps are written with words drawn from a skewed vocabulary,
+then the first page of searches for rare and common words, phrases and
+prefixes is compared with the ILIKE query the search used before, which
+returned every match.
+
+Everything is written inside a transaction that is rolled back,
+but tables are emptied within it, so point it to a scratch database.
+"""
+import asyncio
+from functools import partial
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+# isort: off
+# The API package has to be loaded before the DAOs it imports.
+from content_discovery.web.api import router  # noqa: F401
+from benchmarks.common import report, timed
+from content_discovery.constants import SearchMode
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.settings import settings
+
+# isort: on
+
+SNAPS = 2000000
+VOCABULARY = 50000
+PAGE = 20
+REPEAT = 5
+
+RESET = (
+    "DELETE FROM timelines",
+    "DELETE FROM snaps",
+    "DROP INDEX ix_snaps_search_vector",
+)
+# Six words per snap, low word numbers are much more frequent.
+SEED_SNAPS = """
+INSERT INTO snaps (id, user_id, content, likes, shares, favs,
+                   created_at, visibility, privacy)
+SELECT gen_random_uuid(), 'user' || n % 1000,
+       concat_ws(' ', VARIADIC ARRAY(
+           SELECT 'w' || floor(power(random(), 3) * :vocabulary)::int
+           FROM generate_series(1, 6) WHERE n > 0
+       )), 0, 0, 0, now() - n * interval '1 second', 1, 1
+FROM generate_series(1, :snaps) AS n
+"""
+INDEX = "CREATE INDEX ix_snaps_search_vector ON snaps USING gin (search_vector)"
+ILIKE = """
+SELECT * FROM snaps WHERE content ILIKE :pattern ORDER BY created_at DESC
+"""
+
+# (name, search, mode, ILIKE pattern)
+SEARCHES = (
+    ("rare word", "w40000", SearchMode.words, "%w40000 %"),
+    ("common word", "w1", SearchMode.words, "%w1 %"),
+    ("phrase", "w1 w2", SearchMode.phrase, "%w1 w2 %"),
+    ("prefix", "w4000", SearchMode.prefix, "%w4000%"),
+)
+
+
+async def _seed(session: AsyncSession) -> None:
+    for statement in RESET:
+        await session.execute(text(statement))
+    await session.execute(
+        text(SEED_SNAPS),
+        {"snaps": SNAPS, "vocabulary": VOCABULARY},
+    )
+    await session.execute(text(INDEX))
+    await session.execute(text("ANALYZE snaps"))
+
+
+async def bench_search(session: AsyncSession) -> None:
+    """First page of a search compared with every ILIKE match."""
+    await _seed(session)
+    snap_dao = SnapDAO(session)
+    report("search", "matches", "ILIKE ms", "search ms")
+    for name, content, mode, pattern in SEARCHES:
+        matches = await session.execute(text(ILIKE), {"pattern": pattern})
+        ilike = await timed(
+            partial(session.execute, text(ILIKE), {"pattern": pattern}),
+            REPEAT,
+        )
+        search = await timed(
+            partial(snap_dao.admin_filter_snaps, content, mode, PAGE),
+            REPEAT,
+        )
+        report(name, len(matches.all()), ilike, search)
+
+
+async def main() -> None:
+    """Run the benchmark and roll back."""
+    engine = create_async_engine(str(settings.db_url))
+    async with engine.connect() as connection:
+        session = AsyncSession(connection, expire_on_commit=False)
+        transaction = await connection.begin()
+        try:  # noqa: WPS501
+            await bench_search(session)
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Substring search with and without the trigram indexes.
+
+Run against a migrated database, configured like the service:
+
+    python -m benchmarks.substring
+
+The corpus of benchmarks.search is written and a hashtag is recorded for
+each snap, then substring and similar searches of snaps, and partial
+hashtag lookups, are timed with sequential scans and with the plans
+using the trigram indexes.
+
+Everything is written inside a transaction that is rolled back,
+but tables are emptied within it, so point it to a scratch database.
+"""
+import asyncio
+from functools import partial
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+# isort: off
+# The API package has to be loaded before the DAOs it imports.
+from content_discovery.web.api import router  # noqa: F401
+from benchmarks.common import report, timed
+from benchmarks.search import SEED_SNAPS, SNAPS, VOCABULARY
+from content_discovery.constants import SearchMode
+from content_discovery.db.dao.hashtag_dao import HashtagDAO
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.settings import settings
+
+# isort: on
+
+PAGE = 20
+REPEAT = 5
+
+RESET = (
+    "DELETE FROM timelines",
+    "DELETE FROM snap_hashtags",
+    "DELETE FROM hashtag_names",
+    "DELETE FROM snaps",
+)
+SEED_HASHTAG_NAMES = """
+INSERT INTO hashtag_names (name)
+SELECT DISTINCT '#' || split_part(content, ' ', 1) FROM snaps
+"""
+SEED_HASHTAGS = """
+INSERT INTO snap_hashtags (snap_id, hashtag_id, created_at)
+SELECT snaps.id, hashtag_names.id, snaps.created_at
+FROM snaps
+JOIN hashtag_names ON hashtag_names.name = '#' || split_part(content, ' ', 1)
+"""
+SCANS = (
+    "SET LOCAL enable_bitmapscan = {enabled}",
+    "SET LOCAL enable_indexscan = {enabled}",
+)
+
+# (name, search, mode)
+SEARCHES = (
+    ("rare substring", "w4000", SearchMode.substring),
+    ("common substring", "w12", SearchMode.substring),
+    ("similar", "w4000", SearchMode.similar),
+)
+HASHTAGS = ("w4000", "w12")
+
+
+async def _seed(session: AsyncSession) -> None:
+    for statement in RESET:
+        await session.execute(text(statement))
+    await session.execute(
+        text(SEED_SNAPS),
+        {"snaps": SNAPS, "vocabulary": VOCABULARY},
+    )
+    await session.execute(text(SEED_HASHTAG_NAMES))
+    await session.execute(text(SEED_HASHTAGS))
+    await session.execute(text("ANALYZE"))
+
+
+async def _scan_and_index(
+    session: AsyncSession,
+    run: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Timings of a read with index scans disabled and enabled."""
+    timings = []
+    for enabled in ("off", "on"):
+        for statement in SCANS:
+            await session.execute(text(statement.format(enabled=enabled)))
+        timings.append(await timed(run, REPEAT))
+    return timings
+
+
+async def bench_substrings(session: AsyncSession) -> None:
+    """Substring searches of snaps and hashtags."""
+    await _seed(session)
+    snap_dao = SnapDAO(session)
+    hashtag_dao = HashtagDAO(session)
+    report("search", "text", "scan ms", "index ms", width=18)
+    for name, content, mode in SEARCHES:
+        search = partial(snap_dao.admin_filter_snaps, content, mode, PAGE)
+        report(name, content, *await _scan_and_index(session, search), width=18)
+    for hashtag in HASHTAGS:
+        lookup = partial(hashtag_dao.filter_hashtags, hashtag)
+        report("hashtag", hashtag, *await _scan_and_index(session, lookup), width=18)
+
+
+async def main() -> None:
+    """Run the benchmark and roll back."""
+    engine = create_async_engine(str(settings.db_url))
+    async with engine.connect() as connection:
+        session = AsyncSession(connection, expire_on_commit=False)
+        transaction = await connection.begin()
+        try:  # noqa: WPS501
+            await bench_substrings(session)
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""
+Snap frequencies counted per point and in a single query.
+
+Run against a migrated database, configured like the service:
+
+    python -m benchmarks.time_series
+
+Snaps are written over the last SPAN, then the per minute and hourly
+frequencies are timed for an increasing number of points: with a count
+query per point, as the endpoints used to, with a single generate_series
+and date_trunc query over the snaps, and with the single query of
+SnapCountDAO.get_snap_time_series over the rollups.
+
+Everything is written inside a transaction that is rolled back,
+but tables are emptied within it, so point it to a scratch database.
+"""
+import asyncio
+import datetime
+from functools import partial
+from typing import Any, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+# isort: off
+# The API package has to be loaded before the DAOs it imports.
+from content_discovery.web.api import router  # noqa: F401
+from benchmarks.common import report, timed
+from content_discovery.constants import Frequency
+from content_discovery.db.dao.snap_count_dao import SERIES, SnapCountDAO
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.settings import settings
+
+# isort: on
+
+SNAPS = 500000
+SPAN = datetime.timedelta(days=60)
+POINTS = (10, 100, 1000)
+FREQUENCIES = (Frequency.per_minute, Frequency.hourly)
+REPEAT = 3
+
+RESET = "TRUNCATE snaps RESTART IDENTITY CASCADE"
+SEED_SNAPS = """
+INSERT INTO snaps (id, user_id, content, likes, shares, favs,
+                   created_at, visibility, privacy)
+SELECT gen_random_uuid(), 'user' || n % 1000, 'snap', 0, 0, 0,
+       now() AT TIME ZONE 'utc' - random() * CAST(:span AS interval), 1, 1 + n % 2
+FROM generate_series(1, :snaps) AS n
+"""
+# The unit is formatted in, like SnapCountDAO does.
+SNAPS_SERIES = """
+WITH bounds AS (
+    SELECT date_trunc('{unit}', CAST(:now AS timestamp)) AS last
+),
+counts AS (
+    SELECT date_trunc('{unit}', created_at) AS start, count(*) AS snaps
+    FROM snaps, bounds
+    WHERE created_at >= last - interval '1 {unit}' * :steps
+    GROUP BY 1
+)
+SELECT series.start, coalesce(counts.snaps, 0)
+FROM bounds, generate_series(
+    last - interval '1 {unit}' * :steps, last, interval '1 {unit}'
+) AS series (start)
+LEFT JOIN counts ON counts.start = series.start
+ORDER BY series.start
+"""
+UNITS = {
+    Frequency.per_minute: datetime.timedelta(minutes=1),
+    Frequency.hourly: datetime.timedelta(hours=1),
+}
+
+
+async def _per_point(
+    snap_dao: SnapDAO,
+    frequency: Frequency,
+    number: int,
+) -> List[int]:
+    """A count query per point, like the endpoints used to."""
+    unit = UNITS[frequency]
+    start = datetime.datetime.utcnow() - unit * number
+    counts = []
+    for _ in range(number):
+        end = start + unit
+        counts.append(await snap_dao.quantity_new_snaps_in_time_period(start, end))
+        start = end
+    return counts
+
+
+async def _snaps_series(
+    session: AsyncSession,
+    frequency: Frequency,
+    number: int,
+) -> List[Any]:
+    """One generate_series query over the snaps."""
+    unit, _ = SERIES[frequency]
+    parameters = {"now": datetime.datetime.utcnow(), "steps": number - 1}
+    rows = await session.execute(
+        text(SNAPS_SERIES.format(unit=unit)),
+        parameters,
+    )
+    return list(rows)
+
+
+async def bench_time_series(session: AsyncSession) -> None:
+    """Frequencies of an increasing number of points."""
+    await session.execute(text(RESET))
+    await session.execute(text(SEED_SNAPS), {"snaps": SNAPS, "span": SPAN})
+    snap_dao = SnapDAO(session)
+    snap_count_dao = SnapCountDAO(session)
+    # as the scheduled job does, the rollups are read with no delta left
+    await snap_count_dao.compact()
+    await session.execute(text("ANALYZE"))
+
+    report("frequency", "points", "per point ms", "snaps ms", "rollups ms")
+    for frequency in FREQUENCIES:
+        for number in POINTS:
+            runs = (
+                partial(_per_point, snap_dao, frequency, number),
+                partial(_snaps_series, session, frequency, number),
+                partial(snap_count_dao.get_snap_time_series, frequency, number),
+            )
+            timings = [await timed(run, REPEAT) for run in runs]
+            report(frequency.value, number, *timings)
+
+
+async def main() -> None:
+    """Run the benchmark and roll back."""
+    engine = create_async_engine(str(settings.db_url))
+    async with engine.connect() as connection:
+        session = AsyncSession(connection, expire_on_commit=False)
+        transaction = await connection.begin()
+        try:  # noqa: WPS501
+            await bench_time_series(session)
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,192 @@
+"""
+Home timeline writes and reads across the follower distribution.
+
+Run against a migrated database, configured like the service:
+
+    python -m benchmarks.timelines
+
+Writes: a snap is fanned out by authors with few to very many followers,
+once pushing to every follower and once in hybrid mode.
+Reads: a user following few to very many authors, some of them above the
+fan-out threshold, has their timeline built and reads the first and a deep
+page of their home feed, compared with the pull query the feed used before.
+
+Everything is written inside a transaction that is rolled back,
+but tables are emptied within it, so point it to a scratch database.
+"""
+import asyncio
+from functools import partial
+from typing import FrozenSet, Optional
+
+from fastapi import BackgroundTasks
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+# isort: off
+# The API package has to be loaded before the DAOs it imports.
+from content_discovery.web.api import router  # noqa: F401
+from benchmarks.common import report, timed
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.dao.timeline_dao import TimelineDAO
+from content_discovery.db.pagination import Cursor
+from content_discovery.settings import settings
+from content_discovery.web.api.timeline import fan_out_snap, home_timeline
+from content_discovery.web.api.utils import followers_cache
+
+# isort: on
+
+USERS = 100000
+FOLLOWER_COUNTS = (10, 1000, 10000, 100000)
+FOLLOWING_COUNTS = (10, 1000, 5000)
+SNAPS_PER_AUTHOR = 50
+HIGH_FANOUT_FOLLOWED = 5
+PAGE = 20
+DEEP_PAGES = 20
+REPEAT = 5
+
+SEED_USERS = """
+INSERT INTO timeline_states (owner_id, built_at, truncated, building)
+SELECT 'user' || n, now(), false, false FROM generate_series(0, :users - 1) AS n
+"""
+SEED_SNAPS = """
+INSERT INTO snaps (id, user_id, content, likes, shares, favs,
+                   created_at, visibility, privacy)
+SELECT gen_random_uuid(), 'user' || n % CAST(:authors AS integer),
+       'snap', 0, 0, 0, now() - n * interval '1 second', 1, 1
+FROM generate_series(0, CAST(:snaps AS integer) - 1) AS n
+"""
+RESET = (
+    "DELETE FROM timelines",
+    "DELETE FROM high_fanout_authors",
+    "DELETE FROM snaps",
+)
+SEED_HIGH_FANOUT = """
+INSERT INTO high_fanout_authors (user_id, followers, updated_at)
+SELECT 'user' || n, :users, now() FROM generate_series(0, :count - 1) AS n
+"""
+
+
+def _users(count: int) -> FrozenSet[str]:
+    return frozenset(f"user{index}" for index in range(count))
+
+
+async def _post(snap_dao: SnapDAO, timeline_dao: TimelineDAO, author: str) -> None:
+    snap = await snap_dao.create_snaps_model(author, "snap", 1)
+    await fan_out_snap(snap, timeline_dao)
+
+
+async def bench_writes(session: AsyncSession) -> None:
+    """Cost of posting a snap by the number of followers of the author."""
+    await session.execute(text(SEED_USERS), {"users": USERS})
+    snap_dao = SnapDAO(session)
+    timeline_dao = TimelineDAO(session)
+    hybrid_threshold = settings.timeline_fanout_threshold
+    report("followers", "push ms", "hybrid ms", width=12)
+    for followers in FOLLOWER_COUNTS:
+        author = f"author{followers}"
+        followers_cache.set(author, _users(followers))
+        post = partial(_post, snap_dao, timeline_dao, author)
+        settings.timeline_fanout_threshold = USERS
+        push = await timed(post, REPEAT)
+        settings.timeline_fanout_threshold = hybrid_threshold
+        hybrid = await timed(post, REPEAT)
+        report(followers, push, hybrid, width=12)
+
+
+async def bench_reads(session: AsyncSession) -> None:
+    """Cost of reading a feed by the number of authors the reader follows."""
+    snap_dao = SnapDAO(session)
+    timeline_dao = TimelineDAO(session)
+    report("following", "page", "pull ms", "timeline ms", width=12)
+    for following_count in FOLLOWING_COUNTS:
+        for statement in RESET:
+            await session.execute(text(statement))
+        await session.execute(
+            text(SEED_SNAPS),
+            {"authors": following_count, "snaps": following_count * SNAPS_PER_AUTHOR},
+        )
+        await session.execute(
+            text(SEED_HIGH_FANOUT),
+            {"users": USERS, "count": HIGH_FANOUT_FOLLOWED},
+        )
+        await session.execute(text("ANALYZE"))
+        reader = f"reader{following_count}"
+        following = _users(following_count) | {reader}
+        rebuild = await timed(
+            partial(
+                timeline_dao.rebuild,
+                reader,
+                following,
+                settings.timeline_rebuild_limit,
+            ),
+            REPEAT,
+        )
+        report(following_count, "rebuild", "-", rebuild, width=12)
+        deep = await _deep_cursor(reader, following, timeline_dao)
+
+        pages = (("1st", 0, None), ("deep", PAGE * DEEP_PAGES, deep))
+        for name, pull_offset, cursor in pages:
+            pull = await timed(
+                partial(
+                    snap_dao.get_snaps_and_shares,
+                    following,
+                    following,
+                    PAGE,
+                    pull_offset,
+                ),
+                REPEAT,
+            )
+            timeline = await timed(
+                partial(
+                    home_timeline,
+                    reader,
+                    following,
+                    PAGE,
+                    0,
+                    cursor,
+                    timeline_dao,
+                    BackgroundTasks(),
+                ),
+                REPEAT,
+            )
+            report(following_count, name, pull, timeline, width=12)
+
+
+async def _deep_cursor(
+    reader: str,
+    following: FrozenSet[str],
+    timeline_dao: TimelineDAO,
+) -> Optional[Cursor]:
+    """Cursor after DEEP_PAGES pages of the home feed."""
+    cursor = None
+    for _ in range(DEEP_PAGES):
+        page = await home_timeline(
+            reader,
+            following,
+            PAGE,
+            0,
+            cursor,
+            timeline_dao,
+            BackgroundTasks(),
+        )
+        last = page[-1]
+        cursor = Cursor(last.created_at, last.snap.id)
+    return cursor
+
+
+async def main() -> None:
+    """Run every benchmark and roll back."""
+    engine = create_async_engine(str(settings.db_url))
+    async with engine.connect() as connection:
+        session = AsyncSession(connection, expire_on_commit=False)
+        transaction = await connection.begin()
+        try:  # noqa: WPS501
+            await bench_writes(session)
+            await bench_reads(session)
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
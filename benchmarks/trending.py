@@ -0,0 +1,173 @@
+"""
+Trending hashtags counted exactly and with sketches.
+
+Run against a migrated database, configured like the service:
+
+    python -m benchmarks.trending
+
+Hashtag uses are written, drawn from a Zipf distribution over a large
+vocabulary. The hashtags used at least MINIMUM times are read with
+the grouped query of HashtagDAO.get_top_hashtags, then the uses are fed
+to the exact sliding window counter and to sketches of a few sizes.
+For each counter the throughput, the memory, the share of the TOP most
+used hashtags it finds and the largest error of their counts are reported.
+The uses span six days of the week, so that the buckets of every counter
+cover all of them.
+
+Everything is written inside a transaction that is rolled back,
+but tables are emptied within it, so point it to a scratch database.
+"""
+import asyncio
+import datetime
+import time
+import tracemalloc
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+# isort: off
+# The API package has to be loaded before the DAOs it imports.
+from content_discovery.web.api import router  # noqa: F401
+from benchmarks.common import report
+from content_discovery.db.dao.hashtag_dao import HashtagDAO
+from content_discovery.settings import settings
+from content_discovery.sketch import HeavyHitters
+from content_discovery.sliding_window import SlidingWindowCounter
+from content_discovery.web.api.trending.hashtags import WindowCounter
+
+# isort: on
+
+USES = 1000000
+VOCABULARY = 100000
+WINDOW = datetime.timedelta(weeks=1)
+MINIMUM = 100
+TOP = 100
+BUCKETS = 28
+CAPACITY = 1000
+ERRORS = (0.005, 0.0005, 0.0001)
+
+RESET = "TRUNCATE snaps, hashtag_names RESTART IDENTITY CASCADE"
+SEED_NAMES = """
+INSERT INTO hashtag_names (name)
+SELECT '#tag' || n FROM generate_series(1, :vocabulary) AS n
+"""
+SEED_SNAPS = """
+INSERT INTO snaps (id, user_id, content, likes, shares, favs,
+                   created_at, visibility, privacy)
+SELECT gen_random_uuid(), 'user' || n % 1000, 'snap', 0, 0, 0,
+       now() AT TIME ZONE 'utc' - random() * interval '6 days', 1, 1
+FROM generate_series(1, :uses) AS n
+"""
+# The rank of a hashtag is log-uniform, the probability of rank r is
+# about proportional to 1 / r: a Zipf distribution with exponent 1.
+SEED_USES = """
+INSERT INTO snap_hashtags (snap_id, hashtag_id, created_at)
+SELECT id, floor(power(CAST(:vocabulary AS float), random()))::int, created_at
+FROM snaps
+"""
+
+Use = Tuple[int, float]
+Factory = Callable[[], WindowCounter]
+
+
+def _timestamp(moment: datetime.datetime) -> float:
+    return moment.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def _top(counts: Dict[Any, int]) -> List[Any]:
+    ranked = sorted(counts, key=lambda key: counts[key], reverse=True)
+    return ranked[:TOP]
+
+
+def _feed(counter: WindowCounter, uses: List[Use], end: float) -> WindowCounter:
+    for hashtag_id, timestamp in uses:
+        counter.add(hashtag_id, timestamp)
+    counter.advance(end)
+    return counter
+
+
+def _measure(
+    new_counter: Factory,
+    uses: List[Use],
+    end: float,
+) -> Tuple[WindowCounter, float, float]:
+    """Counter fed with the uses, its uses per second and its size in MiB."""
+    start = time.perf_counter()
+    _feed(new_counter(), uses, end)
+    rate = len(uses) / (time.perf_counter() - start)
+
+    tracemalloc.start()
+    counter = _feed(new_counter(), uses, end)
+    size = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    return counter, rate, size
+
+
+async def _seed(session: AsyncSession) -> None:
+    await session.execute(text(RESET))
+    await session.execute(text(SEED_NAMES), {"vocabulary": VOCABULARY})
+    await session.execute(text(SEED_SNAPS), {"uses": USES})
+    await session.execute(text(SEED_USES), {"vocabulary": VOCABULARY})
+    await session.execute(text("ANALYZE"))
+
+
+async def bench_trending(session: AsyncSession) -> None:
+    """Sketches compared with the exact counts of the SQL query."""
+    await _seed(session)
+    hashtag_dao = HashtagDAO(session)
+    now = datetime.datetime.utcnow()
+    start = time.perf_counter()
+    rows = await hashtag_dao.get_top_hashtags(now - WINDOW, MINIMUM)
+    query_ms = (time.perf_counter() - start) * 1000
+    ids = await hashtag_dao.get_hashtag_ids([row["name"] for row in rows])
+    exact = {ids[row["name"]]: row["count"] for row in rows}
+    top = _top(exact)
+    report("query", "hashtags", "ms", width=12, digits=".3g")
+    report("SQL", len(exact), query_ms, width=12, digits=".3g")
+
+    recorded = await hashtag_dao.get_hashtag_uses(now - WINDOW)
+    uses = [(tag, _timestamp(created_at)) for _, tag, created_at in recorded]
+    window = WINDOW.total_seconds()
+    bucket = settings.trending_bucket
+    counters: List[Tuple[str, Factory]] = [
+        ("exact", partial(SlidingWindowCounter, window, bucket, MINIMUM)),
+    ]
+    for error in ERRORS:
+        sketch = partial(HeavyHitters, window, BUCKETS, MINIMUM, CAPACITY)
+        counters.append((f"error {error}", partial(sketch, error, 0.01)))
+
+    report(
+        "counter",
+        "uses/s",
+        "MiB",
+        f"top {TOP} %",
+        "max error %",
+        width=12,
+        digits=".3g",
+    )
+    for name, new_counter in counters:
+        counter, rate, size = _measure(new_counter, uses, _timestamp(now))
+        found = set(_top(counter.frequent())) & set(top)
+        ratios = [counter.count(key) / exact[key] for key in top]
+        share = len(found) / TOP * 100
+        max_error = (max(ratios) - 1) * 100
+        report(name, rate, size, share, max_error, width=12, digits=".3g")
+
+
+async def main() -> None:
+    """Run the benchmark and roll back."""
+    engine = create_async_engine(str(settings.db_url))
+    async with engine.connect() as connection:
+        session = AsyncSession(connection, expire_on_commit=False)
+        transaction = await connection.begin()
+        try:  # noqa: WPS501
+            await bench_trending(session)
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,218 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+from prometheus_client import Counter, Gauge
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+ValueT = TypeVar("ValueT")
+Loader = Callable[[KeyT], Awaitable[Optional[ValueT]]]
+
+CACHE_HITS = Counter(
+    "content_discovery_cache_hits",
+    "Lookups answered from an in-process cache.",
+    ["cache"],
+)
+CACHE_MISSES = Counter(
+    "content_discovery_cache_misses",
+    "Lookups that had to load the value.",
+    ["cache"],
+)
+CACHE_STALE_HITS = Counter(
+    "content_discovery_cache_stale_hits",
+    "Lookups answered with a stale value while it is refreshed.",
+    ["cache"],
+)
+CACHE_EVICTIONS = Counter(
+    "content_discovery_cache_evictions",
+    "Entries evicted because the cache was full.",
+    ["cache"],
+)
+CACHE_SIZE = Gauge(
+    "content_discovery_cache_size",
+    "Entries currently stored in an in-process cache.",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+
+
+class _Entry:
+    """Cached value and the moment it expires."""
+
+    __slots__ = ("expires_at", "value")
+
+    def __init__(self, expires_at: float, value: Any) -> None:
+        self.expires_at = expires_at
+        self.value = value
+
+
+class TTLCache(Generic[KeyT, ValueT]):
+    """
+    Bounded in-process cache with TTL expiry and LRU eviction.
+
+    Loaders may return None to signal that the key does not exist,
+    which is cached for 'negative_ttl' seconds. Once an entry expires
+    it is still served for 'stale_ttl' more seconds while it is
+    refreshed in the background.
+    """
+
+    def __init__(  # noqa: WPS211
+        self,
+        name: str,
+        capacity: int,
+        ttl: float,
+        stale_ttl: float = 0,
+        negative_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.capacity = capacity
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[KeyT, _Entry]" = OrderedDict()
+        self._loading: Dict[KeyT, "asyncio.Future[Any]"] = {}
+        self._refreshing: "set[asyncio.Task[None]]" = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: KeyT) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.expires_at > self._clock()
+
+    def get(self, key: KeyT) -> Optional[ValueT]:
+        """
+        Get a fresh value without loading it.
+
+        :param key: key to look up.
+        :return: the cached value or None if missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= self._clock():
+            CACHE_MISSES.labels(self.name).inc()
+            return None
+        CACHE_HITS.labels(self.name).inc()
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def set(self, key: KeyT, value: Optional[ValueT]) -> None:
+        """
+        Store a value, evicting the least recently used entry if full.
+
+        :param key: key to store.
+        :param value: value to store, None caches a negative result.
+        """
+        ttl = self.ttl if value is not None else self.negative_ttl
+        self._entries[key] = _Entry(self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            CACHE_EVICTIONS.labels(self.name).inc()
+        CACHE_SIZE.labels(self.name).set(len(self._entries))
+
+    def invalidate(self, key: KeyT) -> None:
+        """
+        Drop a key from the cache.
+
+        :param key: key to drop.
+        """
+        self._entries.pop(key, None)
+        CACHE_SIZE.labels(self.name).set(len(self._entries))
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+        CACHE_SIZE.labels(self.name).set(0)
+
+    async def get_or_load(
+        self,
+        key: KeyT,
+        loader: "Loader[KeyT, ValueT]",
+    ) -> Optional[ValueT]:
+        """
+        Get a value, loading it on a miss.
+
+        Concurrent misses for the same key share a single load. If the
+        lookup running it is cancelled, the others load the value again.
+        Errors raised by the loader are propagated and not cached.
+
+        :param key: key to look up.
+        :param loader: coroutine function that fetches the value.
+        :return: the value, or None if the loader reported it missing.
+        """
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None and now < entry.expires_at:
+            CACHE_HITS.labels(self.name).inc()
+            self._entries.move_to_end(key)
+            return entry.value
+        if entry is not None and now < entry.expires_at + self.stale_ttl:
+            CACHE_STALE_HITS.labels(self.name).inc()
+            self._entries.move_to_end(key)
+            self._refresh(key, loader)
+            return entry.value
+
+        CACHE_MISSES.labels(self.name).inc()
+        return await self._load(key, loader)
+
+    async def _load(
+        self,
+        key: KeyT,
+        loader: "Loader[KeyT, ValueT]",
+    ) -> Optional[ValueT]:
+        pending = self._loading.get(key)
+        if pending is not None:
+            return await self._join(key, loader, pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader(key)
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # mark as retrieved when nobody else waits
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if not future.done():
+                future.cancel()  # the load was cancelled, waiters load again
+            self._loading.pop(key, None)
+
+    async def _join(
+        self,
+        key: KeyT,
+        loader: "Loader[KeyT, ValueT]",
+        pending: "asyncio.Future[Any]",
+    ) -> Optional[ValueT]:
+        """Wait for the load of another lookup, loading again if cancelled."""
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise  # this lookup was cancelled, not the shared load
+        return await self._load(key, loader)
+
+    def _refresh(
+        self,
+        key: KeyT,
+        loader: "Loader[KeyT, ValueT]",
+    ) -> None:
+        if key in self._loading:
+            return
+
+        async def _refresh_entry() -> None:  # noqa: WPS430
+            try:
+                await self._load(key, loader)
+            except Exception:  # noqa: S110
+                # Keep serving the stale value until it fully expires.
+                pass  # noqa: WPS420
+
+        task = asyncio.create_task(_refresh_entry())
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
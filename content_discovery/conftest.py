@@ -2,7 +2,7 @@ from typing import Any, AsyncGenerator
 
 import pytest
 from fastapi import FastAPI
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -12,7 +12,9 @@ from sqlalchemy.ext.asyncio import (
 
 from content_discovery.db.dependencies import get_db_session
 from content_discovery.db.utils import create_database, drop_database
+from content_discovery.services.identity_socializer.client import identity_socializer
 from content_discovery.settings import settings
+from content_discovery.tests.identity_socializer_stub import IdentitySocializerStub
 from content_discovery.web.application import get_app
 
 
@@ -108,3 +110,31 @@ async def client(
     """
     async with AsyncClient(app=fastapi_app, base_url="http://test") as ac:
         yield ac
+
+
+@pytest.fixture
+async def identity_socializer_stub() -> AsyncGenerator[IdentitySocializerStub, None]:
+    """
+    Serves identity-socializer from an in-memory stub.
+
+    Caches in front of identity-socializer are emptied
+    before and after the test.
+
+    :yield: stub to set up the follow graph and inspect requests.
+    """
+    from content_discovery.web.api import utils  # noqa: WPS433
+
+    stub = IdentitySocializerStub()
+    caches = (utils.profile_cache, utils.following_cache, utils.followers_cache)
+    for cache in caches:
+        cache.clear()
+    await identity_socializer.shutdown()
+    transport = ASGITransport(app=stub.app)  # type: ignore[arg-type]
+    await identity_socializer.startup(transport=transport)
+
+    try:
+        yield stub
+    finally:
+        await identity_socializer.shutdown()
+        for cache in caches:  # noqa: WPS440
+            cache.clear()
@@ -21,6 +21,59 @@ class Privacy(Enum):
             raise ValueError("Invalid privacy setting")
 
 
+class SearchMode(Enum):
+    """Enum for the ways of matching the content of snaps"""
+
+    # every word, "quoted phrases", OR and -excluded words
+    words = "words"
+    # the words next to each other, in order
+    phrase = "phrase"
+    # words starting with each of the terms
+    prefix = "prefix"
+    # the exact text anywhere in the content
+    substring = "substring"
+    # words resembling the text, to get past typos
+    similar = "similar"
+
+
+class TrendingMode(Enum):
+    """Enum for the ways of counting hashtags to find the trending ones"""
+
+    # exact counts of every hashtag used within the window
+    exact = "exact"
+    # estimated counts of the most used hashtags, in bounded memory
+    approximate = "approximate"
+
+
+class TrendingScoring(Enum):
+    """Enum for the ways of deciding which hashtags are trending"""
+
+    # used at least a minimum number of times within the window
+    count = "count"
+    # used recently much more than usual for the hashtag
+    velocity = "velocity"
+
+
+class CounterMode(Enum):
+    """Enum for the ways of updating the interaction counters of snaps"""
+
+    # each interaction updates the counters of its snap
+    immediate = "immediate"
+    # changes are summed in memory and written in batches
+    write_behind = "write_behind"
+
+
+class InteractionAction(Enum):
+    """Enum for the interactions of a user with a snap"""
+
+    like = "like"
+    unlike = "unlike"
+    share = "share"
+    unshare = "unshare"
+    fav = "fav"
+    unfav = "unfav"
+
+
 class Frequency(Enum):
     """Enum for periods of time to measure frequency of snap posting"""
 
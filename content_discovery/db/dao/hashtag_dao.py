@@ -1,64 +1,108 @@
 import datetime
 import re
 import uuid
-from typing import List
+from typing import Collection, Dict, List, Optional, Tuple
 
 from fastapi import Depends
-from sqlalchemy import RowMapping, func, select
+from sqlalchemy import Float, Integer, RowMapping, any_, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from content_discovery.constants import Visibility
 from content_discovery.db.dependencies import get_db_session
 from content_discovery.db.models.hashtag_model import HashtagModel
+from content_discovery.db.models.hashtag_name_model import HashtagNameModel
 from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.db.pagination import Cursor, paginate
 
+HASHTAG = re.compile(r"(?:^|\s)(#\w+)")
 
-class HashtagDAO:
-    """Class for accessing hashtags table."""
 
-    def __init__(self, session: AsyncSession = Depends(get_db_session)):
-        self.session = session
+def normalize_hashtag(name: str) -> str:
+    """
+    Hashtag as it is stored: lower case and starting with '#'.
+
+    Longer names than the dictionary holds are cut, so that they are
+    stored and looked up the same way.
+    """
+    name = name.strip().lower()
+    if not name.startswith("#"):
+        name = f"#{name}"
+    return name[: HashtagNameModel.length]  # noqa: E203
 
-    async def create_hashtag_model(
-        self,
-        snap_id: uuid.UUID,
-        hashtag: str,
-    ) -> None:
-        """Add single hashtag to session."""
-        try:
-            ht = HashtagModel(snap_id=snap_id, name=hashtag)
-            self.session.add(ht)
 
-            return
+class HashtagDAO:
+    """Class for accessing the hashtags of snaps and their dictionary."""
 
-        except Exception:
-            return
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        self.session = session
 
     async def create_hashtags(
         self,
         snap_id: uuid.UUID,
         content: str,
     ) -> List[str]:
-        """Create hashtags from snap content."""
-        if "#" in content:
-            hashtags = re.findall(r"(?:^|\s)(#\w+)", content)
-
-            for hashtag in hashtags:
-                await self.create_hashtag_model(snap_id, hashtag)
+        """Record the hashtags in a snap content, returns them normalized."""
+        hashtags = list(
+            dict.fromkeys(normalize_hashtag(tag) for tag in HASHTAG.findall(content)),
+        )
+        if not hashtags:
+            return []
 
-            return hashtags
-        return []
+        ids = await self.get_hashtag_ids(hashtags, create=True)
+        links = [{"snap_id": snap_id, "hashtag_id": ids[tag]} for tag in hashtags]
+        stmt = insert(HashtagModel).values(links).on_conflict_do_nothing()
+        await self.session.execute(stmt)
+        return hashtags
 
-    async def filter_hashtags(
+    async def get_hashtag_ids(
+        self,
+        names: Collection[str],
+        create: bool = False,
+    ) -> Dict[str, int]:
+        """
+        Ids of normalized hashtag names.
+
+        :param names: normalized names.
+        :param create: add the names missing from the dictionary.
+        :returns: id of each known name.
+        """
+        ids = await self._select_hashtag_ids(names)
+        missing = [{"name": name} for name in names if name not in ids]
+        if not create or not missing:
+            return ids
+
+        # Conflicts still take a value of the sequence, so only the names
+        # that were not found are inserted.
+        stmt = insert(HashtagNameModel).values(missing).on_conflict_do_nothing()
+        await self.session.execute(stmt)
+        return await self._select_hashtag_ids(names)
+
+    async def filter_hashtags(  # noqa: WPS211
         self,
         name: str,
+        prefix: bool = False,
+        limit: int = 10,
+        offset: int = 0,
+        cursor: Optional[Cursor] = None,
     ) -> List[SnapsModel]:
-        """Get list of filtered snaps by hashtag."""
-        query = select(SnapsModel).distinct()
+        """Get public snaps with a hashtag, or one starting with 'name'."""
+        hashtag_ids = select(HashtagNameModel.id)
+        if prefix:
+            name_prefix = normalize_hashtag(name)
+            hashtag_ids = hashtag_ids.where(
+                HashtagNameModel.name.startswith(name_prefix, autoescape=True),
+            )
+        else:
+            hashtag_ids = hashtag_ids.where(
+                HashtagNameModel.name == normalize_hashtag(name),
+            )
+        tagged = select(HashtagModel.snap_id)
+        tagged = tagged.where(HashtagModel.hashtag_id.in_(hashtag_ids))
+
+        query = select(SnapsModel).where(SnapsModel.id.in_(tagged))
         query = query.where(SnapsModel.visibility == Visibility.PUBLIC.value)
-        query = query.join(HashtagModel.snap)
-        query = query.filter(HashtagModel.name.ilike(f"%{name}%"))
-        query = query.order_by(SnapsModel.created_at.desc())
+        query = paginate(query, SnapsModel.created_at, limit, offset, cursor)
 
         rows = await self.session.execute(query)
 
@@ -70,26 +114,80 @@ class HashtagDAO:
         minimum_hashtag_count: int,
     ) -> List[RowMapping]:
         """Get counts of the most common hashtags within a timeframe"""
+        name = select(HashtagNameModel.name)
+        name = name.where(HashtagNameModel.id == HashtagModel.hashtag_id)
         query = select(
-            HashtagModel.name,
-            func.count(func.distinct(HashtagModel.snap_id)).label("count"),
+            name.scalar_subquery().label("name"),
+            func.count().label("count"),
         )
         query = query.where(HashtagModel.created_at > cutoff_date)
-        query = query.group_by(HashtagModel.name)
-        query = query.having(
-            func.count(func.distinct(HashtagModel.snap_id)) >= minimum_hashtag_count,
-        )
+        query = query.group_by(HashtagModel.hashtag_id)
+        query = query.having(func.count() >= minimum_hashtag_count)
         rows = await self.session.execute(query)
         return list(rows.mappings().fetchall())
 
+    async def get_hashtag_uses(
+        self,
+        since: datetime.datetime,
+    ) -> List[Tuple[uuid.UUID, int, datetime.datetime]]:
+        """Snap, hashtag id and time of the hashtags recorded after 'since'."""
+        query = select(
+            HashtagModel.snap_id,
+            HashtagModel.hashtag_id,
+            HashtagModel.created_at,
+        )
+        query = query.where(HashtagModel.created_at > since)
+        rows = await self.session.execute(query)
+        return list(rows.tuples().all())
+
+    async def count_hashtag_uses(
+        self,
+        since: datetime.datetime,
+        until: datetime.datetime,
+        bucket: float,
+    ) -> List[Tuple[int, float, int]]:
+        """
+        Uses of each hashtag within a period, by time bucket.
+
+        :param since: start of the period, excluded.
+        :param until: end of the period, included.
+        :param bucket: length of the buckets, in seconds.
+        :returns: hashtag id, start of the bucket as a Unix timestamp
+            and number of uses.
+        """
+        epoch = func.extract("epoch", HashtagModel.created_at)
+        start = cast(func.floor(epoch / bucket) * bucket, Float)
+        query = select(HashtagModel.hashtag_id, start, func.count())
+        query = query.where(HashtagModel.created_at > since)
+        query = query.where(HashtagModel.created_at <= until)
+        query = query.group_by(HashtagModel.hashtag_id, start)
+        rows = await self.session.execute(query)
+        return list(rows.tuples().all())
+
+    async def get_hashtag_names(self, ids: Collection[int]) -> Dict[int, str]:
+        """Names of hashtag ids."""
+        # a single array parameter, there can be more ids than parameters
+        id_array = literal(list(ids), ARRAY(Integer))
+        query = select(HashtagNameModel.id, HashtagNameModel.name)
+        query = query.where(HashtagNameModel.id == any_(id_array))
+        rows = await self.session.execute(query)
+        return dict(rows.tuples().all())
+
     async def get_times_used_by_hashtag(
         self,
         name: str,
     ) -> int:
         """Get usage of hashtag."""
-        query = select(HashtagModel.snap_id).distinct()
-        query = query.where(HashtagModel.name == name)
+        query = select(func.count()).select_from(HashtagModel)
+        query = query.join(HashtagModel.hashtag)
+        query = query.where(HashtagNameModel.name == normalize_hashtag(name))
 
         rows = await self.session.execute(query)
 
-        return len(rows.scalars().fetchall())
+        return int(rows.scalar_one())
+
+    async def _select_hashtag_ids(self, names: Collection[str]) -> Dict[str, int]:
+        query = select(HashtagNameModel.name, HashtagNameModel.id)
+        query = query.where(HashtagNameModel.name.in_(names))
+        rows = await self.session.execute(query)
+        return dict(rows.tuples().all())
@@ -0,0 +1,251 @@
+import datetime
+import functools
+import uuid
+from typing import Any, Collection, Dict, List, Optional, Tuple, Type, TypeVar
+
+from fastapi import Depends
+from sqlalchemy import CTE, Executable, FromClause, bindparam, delete, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.expression import any_, literal
+from sqlalchemy.sql.sqltypes import DateTime
+
+from content_discovery.db.dependencies import get_db_session
+from content_discovery.db.models.fav_model import FavModel
+from content_discovery.db.models.like_model import LikeModel
+from content_discovery.db.models.share_model import ShareModel
+from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.db.utils import is_valid_uuid
+
+InteractionT = TypeVar("InteractionT", LikeModel, ShareModel, FavModel)
+# Authors of the snaps written to, and the interactions added or removed.
+Written = Tuple[Dict[uuid.UUID, str], List[InteractionT]]
+
+# Counter of the snap changed by each interaction.
+COUNTER_OF: Dict[type, str] = {
+    LikeModel: "likes",
+    ShareModel: "shares",
+    FavModel: "favs",
+}
+
+
+class InteractionDAO:
+    """
+    Class for writing likes, shares and favs along with their counters.
+
+    Each write is a single statement: the insert or delete is a CTE that
+    the counter update reads from, so the counter only changes when the
+    interaction did, and concurrent repeats of a request never drift it.
+    """
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        self.session = session
+
+    async def add(
+        self,
+        model: Type[InteractionT],
+        user_id: str,
+        snap_id: str,
+        count: bool = True,
+    ) -> Optional[Tuple[InteractionT, str]]:
+        """
+        Add an interaction of a user with a snap, unless it exists.
+
+        :param model: likes, shares or favs.
+        :param user_id: id of the user interacting.
+        :param snap_id: id of the snap.
+        :param count: whether to also increase the counter of the snap.
+        :returns: the new interaction and the author of the snap,
+            None if it existed or the snap does not.
+        """
+        if not is_valid_uuid(snap_id):
+            return None
+        stmt = _add_statement(model, 1 if count else 0)
+        parameters = {
+            "interaction_user": user_id,
+            "interaction_snap": snap_id,
+            "interaction_time": datetime.datetime.utcnow(),
+        }
+        return await self._execute(model, stmt, parameters)
+
+    async def remove(
+        self,
+        model: Type[InteractionT],
+        user_id: str,
+        snap_id: str,
+        count: bool = True,
+    ) -> Optional[Tuple[InteractionT, str]]:
+        """
+        Remove an interaction of a user with a snap, if it exists.
+
+        :param model: likes, shares or favs.
+        :param user_id: id of the user interacting.
+        :param snap_id: id of the snap.
+        :param count: whether to also decrease the counter of the snap.
+        :returns: the removed interaction and the author of the snap,
+            None if there was none.
+        """
+        if not is_valid_uuid(snap_id):
+            return None
+        stmt = _remove_statement(model, -1 if count else 0)
+        parameters = {"interaction_user": user_id, "interaction_snap": snap_id}
+        return await self._execute(model, stmt, parameters)
+
+    async def add_many(
+        self,
+        model: Type[InteractionT],
+        user_id: str,
+        snap_ids: Collection[uuid.UUID],
+    ) -> Written[InteractionT]:
+        """
+        Add interactions of a user with many snaps in one statement.
+
+        Counters are left to the caller, to change them once per snap
+        along with the other interactions.
+
+        :param model: likes, shares or favs.
+        :param user_id: id of the user interacting.
+        :param snap_ids: ids of the snaps.
+        :returns: author of each snap that exists, and the interactions
+            added, without those that existed.
+        """
+        now = datetime.datetime.utcnow()
+        snap = _snaps_among(snap_ids)
+        values = select(literal(user_id), snap.c.id, literal(now, DateTime))
+        columns = ["user_id", "snap_id", "created_at"]
+        stmt = insert(model).from_select(columns, values).on_conflict_do_nothing()
+        added = stmt.returning(model.snap_id, model.created_at)
+        return await self._execute_many(model, user_id, snap, added.cte("added"))
+
+    async def remove_many(
+        self,
+        model: Type[InteractionT],
+        user_id: str,
+        snap_ids: Collection[uuid.UUID],
+    ) -> Written[InteractionT]:
+        """
+        Remove interactions of a user with many snaps in one statement.
+
+        Counters are left to the caller, like in add_many.
+
+        :param model: likes, shares or favs.
+        :param user_id: id of the user interacting.
+        :param snap_ids: ids of the snaps.
+        :returns: author of each snap that exists, and the interactions
+            removed.
+        """
+        snap = _snaps_among(snap_ids)
+        stmt = delete(model).where(model.user_id == user_id)
+        stmt = stmt.where(model.snap_id.in_(select(snap.c.id)))
+        removed = stmt.returning(model.snap_id, model.created_at)
+        return await self._execute_many(model, user_id, snap, removed.cte("removed"))
+
+    async def _execute(
+        self,
+        model: Type[InteractionT],
+        stmt: Executable,
+        parameters: Dict[str, Any],
+    ) -> Optional[Tuple[InteractionT, str]]:
+        row = (await self.session.execute(stmt, parameters)).first()
+        if row is None:
+            return None
+        interaction = model(
+            user_id=row.user_id,
+            snap_id=row.snap_id,
+            created_at=row.created_at,
+        )
+        return interaction, row.author_id
+
+    async def _execute_many(
+        self,
+        model: Type[InteractionT],
+        user_id: str,
+        snap: CTE,
+        changed: CTE,
+    ) -> Written[InteractionT]:
+        """Write the changed interactions, along with the snaps they are of."""
+        interactions = snap.outerjoin(changed, changed.c.snap_id == snap.c.id)
+        query = select(
+            snap.c.id,
+            snap.c.user_id,
+            changed.c.snap_id,
+            changed.c.created_at,
+        ).select_from(interactions)
+        rows = (await self.session.execute(query)).all()
+        authors = {row[0]: row[1] for row in rows}
+        written = [
+            model(user_id=user_id, snap_id=row[2], created_at=row[3])
+            for row in rows
+            if row[2] is not None
+        ]
+        return authors, written
+
+
+def _snaps_among(snap_ids: Collection[uuid.UUID]) -> CTE:
+    """
+    Ids and authors of the snaps that exist among snap_ids.
+
+    The ids are bound as a single array, there may be more than a query
+    accepts.
+    """
+    ids = literal(list(snap_ids), ARRAY(SnapsModel.id.type))
+    query = select(SnapsModel.id, SnapsModel.user_id)
+    return query.where(SnapsModel.id == any_(ids)).cte("snap")
+
+
+# The statements are built once per interaction and delta, as building
+# them costs more than running them on a busy snap.
+@functools.lru_cache(maxsize=None)
+def _add_statement(model: Type[InteractionT], delta: int) -> Executable:
+    """Insert of an interaction, then the change of its counter."""
+    snap_id = bindparam("interaction_snap", type_=SnapsModel.id.type)
+    query = select(SnapsModel.id, SnapsModel.user_id)
+    snap = query.where(SnapsModel.id == snap_id).cte("snap")
+    # selected from the snap rather than inserted as values, so that
+    # a missing snap inserts nothing instead of breaking the foreign key
+    values = select(
+        bindparam("interaction_user", type_=model.user_id.type),
+        snap.c.id,
+        bindparam("interaction_time", type_=model.created_at.type),
+    )
+    columns = ["user_id", "snap_id", "created_at"]
+    stmt = insert(model).from_select(columns, values).on_conflict_do_nothing()
+    added = stmt.returning(model.user_id, model.snap_id, model.created_at)
+    return _count_statement(model, added.cte("added"), delta, snap)
+
+
+@functools.lru_cache(maxsize=None)
+def _remove_statement(model: Type[InteractionT], delta: int) -> Executable:
+    """Delete of an interaction, then the change of its counter."""
+    stmt = delete(model).where(model.user_id == bindparam("interaction_user"))
+    stmt = stmt.where(model.snap_id == bindparam("interaction_snap"))
+    removed = stmt.returning(model.user_id, model.snap_id, model.created_at)
+    snaps = SnapsModel.__table__
+    return _count_statement(model, removed.cte("removed"), delta, snaps)
+
+
+def _count_statement(
+    model: Type[InteractionT],
+    changed: CTE,
+    delta: int,
+    snaps: FromClause,
+) -> Executable:
+    """
+    Change of the counter by delta for the changed interaction.
+
+    Without a delta the author is read from snaps instead, which
+    only needs the id and user_id columns.
+    """
+    interaction = (changed.c.user_id, changed.c.snap_id, changed.c.created_at)
+    if not delta:
+        author_id = snaps.c.user_id.label("author_id")
+        query = select(*interaction, author_id)
+        return query.where(snaps.c.id == changed.c.snap_id)
+    counter = getattr(SnapsModel, COUNTER_OF[model])
+    return (
+        update(SnapsModel)
+        .where(SnapsModel.id == changed.c.snap_id)
+        .values({counter: counter + delta})
+        .returning(*interaction, SnapsModel.user_id.label("author_id"))
+        .execution_options(synchronize_session=False)
+    )
@@ -2,7 +2,6 @@ import re
 import uuid
 from typing import List
 
-import httpx
 from fastapi import Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,6 +10,7 @@ from content_discovery.constants import Visibility
 from content_discovery.db.dependencies import get_db_session
 from content_discovery.db.models.mention_model import MentionModel
 from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.services.identity_socializer.client import identity_socializer
 from content_discovery.settings import settings
 
 
@@ -53,7 +53,7 @@ class MentionDAO:
                 # Remove @ from mention
                 mention = mention[1:]
 
-                user_id = self.get_user_info_by_username(mention)
+                user_id = await self.get_user_info_by_username(mention)
 
                 await self.create_mention_model(snap_id, mention, user_id)
 
@@ -81,12 +81,14 @@ class MentionDAO:
         rows = await self.session.execute(query)
         return list(rows.scalars().fetchall())
 
-    def get_user_info_by_username(self, username: str) -> str:
+    async def get_user_info_by_username(self, username: str) -> str:
         """Returns user_id from username."""
         try:
-            author = httpx.get(_url_get_user_info_by_username(username)).json()
+            response = await identity_socializer.get(
+                _url_get_user_info_by_username(username),
+            )
 
-            return author["id"]
+            return response.json()["id"]
         except Exception:
             return "unknown"
 
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import Depends
 from sqlalchemy import delete, select
@@ -58,3 +58,12 @@ class ShareDAO:
         )
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
+
+    async def get_shares_of_snap(self, snap_id: str) -> List[ShareModel]:
+        """Get every share of a snap."""
+        if not is_valid_uuid(snap_id):
+            return []
+
+        query = select(ShareModel).where(ShareModel.snap_id == snap_id)
+        result = await self.session.execute(query)
+        return list(result.scalars().fetchall())
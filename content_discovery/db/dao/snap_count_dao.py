@@ -0,0 +1,129 @@
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Depends
+from sqlalchemy import DateTime, func, literal_column, select, text, union_all
+from sqlalchemy.dialects.postgresql import INTERVAL
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from content_discovery.constants import Frequency
+from content_discovery.db.dependencies import get_db_session
+from content_discovery.db.models.snap_count_model import (
+    SnapCountDeltaModel,
+    SnapCountModel,
+)
+
+# Unit of date_trunc of the points of each frequency, and granularity of
+# the rollups summed into them.
+SERIES = {
+    Frequency.per_minute: ("minute", "minute"),
+    Frequency.hourly: ("hour", "hour"),
+    Frequency.daily: ("day", "day"),
+    Frequency.monthly: ("month", "day"),
+}
+
+Point = Tuple[datetime.datetime, int]
+
+# Moves the committed deltas into the rollups, in the order of their keys
+# so that concurrent moves do not deadlock.
+COMPACT = text(
+    "WITH moved AS "
+    "(DELETE FROM snap_count_deltas RETURNING created_at, privacy, delta) "
+    "INSERT INTO snap_counts (granularity, bucket, privacy, count) "
+    "SELECT unit, date_trunc(unit, created_at), privacy, sum(delta) "
+    "FROM moved CROSS JOIN unnest(ARRAY['minute', 'hour', 'day']) AS unit "
+    "GROUP BY 1, 2, 3 HAVING sum(delta) <> 0 ORDER BY 1, 2, 3 "
+    "ON CONFLICT (granularity, bucket, privacy) "
+    "DO UPDATE SET count = snap_counts.count + excluded.count",
+)
+
+
+class SnapCountDAO:
+    """Class for the rollups of snap counts, and the deltas appended to them."""
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        self.session = session
+
+    async def get_snap_time_series(
+        self,
+        frequency: Frequency,
+        number: int,
+        privacy: Optional[int] = None,
+    ) -> List[Point]:
+        """
+        Snaps created in the last periods, the current one included.
+
+        Periods are calendar minutes, hours, days or months. The rollups
+        and deltas in them are grouped with date_trunc and the periods
+        without any are filled with zeros by generate_series, all in a
+        single query.
+
+        :param frequency: length of the periods.
+        :param number: number of periods.
+        :param privacy: only count snaps with this privacy.
+        :returns: start of each period, oldest first, and its count.
+        """
+        unit, granularity = SERIES[frequency]
+        step = literal_column(f"interval '1 {unit}'", INTERVAL)
+        last = _date_trunc(unit, datetime.datetime.utcnow())
+        first = last - step * (number - 1)
+        series = (
+            func.generate_series(first, last, step)
+            .table_valued("start")
+            .render_derived(name="series")
+        )
+        rollups = _rollups(granularity)
+        start = _date_trunc(unit, rollups.c.bucket).label("start")
+        snaps = func.sum(rollups.c.count).label("snaps")
+        counts = select(start, snaps).where(rollups.c.bucket >= first)
+        if privacy is not None:
+            counts = counts.where(rollups.c.privacy == privacy)
+        totals = counts.group_by(start).subquery()
+        points = series.outerjoin(totals, totals.c.start == series.c.start)
+        query = (
+            select(series.c.start, totals.c.snaps)
+            .select_from(points)
+            .order_by(series.c.start)
+        )
+        rows = await self.session.execute(query)
+        return [(row.start, int(row.snaps or 0)) for row in rows]
+
+    async def get_totals(self) -> Dict[int, int]:
+        """
+        Snaps ever created, from the daily rollups.
+
+        :returns: count of each privacy.
+        """
+        rollups = _rollups("day")
+        query = select(rollups.c.privacy, func.sum(rollups.c.count))
+        rows = await self.session.execute(query.group_by(rollups.c.privacy))
+        return {privacy: int(count) for privacy, count in rows}
+
+    async def compact(self) -> None:
+        """Move the committed deltas into the rollups."""
+        await self.session.execute(COMPACT)
+
+
+def _rollups(granularity: str) -> Any:
+    """Rollups of a granularity, with the deltas not moved into them yet."""
+    stored = select(
+        SnapCountModel.bucket,
+        SnapCountModel.privacy,
+        SnapCountModel.count,
+    ).where(SnapCountModel.granularity == granularity)
+    pending = select(
+        _date_trunc(granularity, SnapCountDeltaModel.created_at),
+        SnapCountDeltaModel.privacy,
+        SnapCountDeltaModel.delta,
+    )
+    return union_all(stored, pending).subquery()
+
+
+def _date_trunc(unit: str, moment: Any) -> Any:
+    """
+    Start of the period of a moment.
+
+    The unit is rendered in the query rather than bound, so that the
+    selected and grouped expressions are the same.
+    """
+    return func.date_trunc(literal_column(f"'{unit}'"), moment, type_=DateTime)
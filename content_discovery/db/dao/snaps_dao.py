@@ -1,24 +1,41 @@
 import datetime
+import math
+import re
 import uuid
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple, Union
 
 from fastapi import Depends, HTTPException
-from sqlalchemy import Select, delete, func, or_, outerjoin, select, update
+from sqlalchemy import Select, delete, func, or_, outerjoin, select, true, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.engine.row import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql.functions import coalesce
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.expression import cast, literal, literal_column, union_all
+from sqlalchemy.sql.sqltypes import Double
 
-from content_discovery.constants import Privacy, Visibility
+from content_discovery.constants import Privacy, SearchMode, Visibility
 from content_discovery.db.dependencies import get_db_session
 from content_discovery.db.models.fav_model import FavModel
 from content_discovery.db.models.hashtag_model import HashtagModel
 from content_discovery.db.models.like_model import LikeModel
 from content_discovery.db.models.mention_model import MentionModel
 from content_discovery.db.models.share_model import ShareModel
-from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.db.models.snaps_model import SEARCH_CONFIG, SnapsModel
+from content_discovery.db.models.timeline_model import TimelineModel
+from content_discovery.db.pagination import Cursor, SearchCursor, paginate
 from content_discovery.db.utils import is_valid_uuid
+from content_discovery.settings import settings
 from content_discovery.web.api.feed.schema import FeedPack, Snap
 
+# Lowest relevance of a match, ts_rank can be 0 for some matches.
+MIN_RANK = 1e-6
+# Trigram indexes can not look up shorter substrings.
+MIN_SUBSTRING = 3
+# Counters of interactions of a snap, in this order.
+COUNTERS = ("likes", "shares", "favs")
+
+Counts = Tuple[int, int, int]
+
 
 class SnapDAO:
     """Class for accessing snap table."""
@@ -147,16 +164,30 @@ class SnapDAO:
         query = delete(MentionModel).where(MentionModel.snap_id == snap_id)
         await self.session.execute(query)
 
-    async def get_all_snaps(self, limit: int, offset: int) -> List[SnapsModel]:
+    async def delete_snap_timeline_entries(
+        self,
+        snap_id: str,
+    ) -> None:
+        """Delete specific snap from every home timeline."""
+        query = delete(TimelineModel).where(TimelineModel.snap_id == snap_id)
+        await self.session.execute(query)
+
+    async def get_all_snaps(
+        self,
+        limit: int,
+        offset: int,
+        cursor: Optional[Cursor] = None,
+    ) -> List[SnapsModel]:
         """
-        Get all snaps models with limit/offset pagination.
+        Get all snaps models with limit/offset or cursor pagination.
 
         :param limit: limit of snaps.
         :param offset: offset of snaps.
+        :param cursor: start after this position instead of using 'offset'.
         :return: stream of snaps.
         """
-        query = select(SnapsModel).limit(limit).offset(offset)
-        query = query.order_by(SnapsModel.created_at.desc())
+        query = select(SnapsModel)
+        query = paginate(query, SnapsModel.created_at, limit, offset, cursor)
 
         raw_snaps = await self.session.execute(query)
 
@@ -177,22 +208,24 @@ class SnapDAO:
     async def get_from_user(
         self,
         user_id: str,
-        requester_is_following: List[Dict[str, str]],
+        requester_is_following: Collection[str],
         limit: int,
         offset: int,
+        cursor: Optional[Cursor] = None,
     ) -> list[SnapsModel]:
         """
-        Get specific snap model from user.
+        Get specific snap model from user, newest first.
 
         :param user_id:
         :param limit: up to ho many snaps to get
         :param offset: from where to begin providing results
+        :param cursor: start after this position instead of using 'offset'
         """
         query = select(SnapsModel)
         query = _query_visibility_is_public(query)
         query = _query_privacy_filter_to_only_followers(query, requester_is_following)
         query = query.where(SnapsModel.user_id == user_id)
-        query = query.limit(limit).offset(offset)
+        query = paginate(query, SnapsModel.created_at, limit, offset, cursor)
         rows = await self.session.execute(query)
         return list(rows.scalars().fetchall())
 
@@ -201,12 +234,12 @@ class SnapDAO:
         user_id: str,
         limit: int,
         offset: int,
+        cursor: Optional[Cursor] = None,
     ) -> list[SnapsModel]:
         """Get snaps from user by admin"""
         query = select(SnapsModel)
         query = query.where(SnapsModel.user_id == user_id)
-        query = query.order_by(SnapsModel.created_at.desc())
-        query = query.limit(limit).offset(offset)
+        query = paginate(query, SnapsModel.created_at, limit, offset, cursor)
         rows = await self.session.execute(query)
 
         return list(rows.scalars().fetchall())
@@ -301,6 +334,31 @@ class SnapDAO:
 
         await self.session.execute(stmt)
 
+    async def add_to_counters(self, deltas: Dict[uuid.UUID, Counts]) -> None:
+        """
+        Change the interaction counters of many snaps in one statement.
+
+        :param deltas: likes, shares and favs added to each snap.
+        """
+        if not deltas:
+            return
+        # sorted so that concurrent updates lock the rows in the same order
+        snap_ids = sorted(deltas)
+        columns = [literal(snap_ids, ARRAY(SnapsModel.id.type))]
+        for index, _ in enumerate(COUNTERS):
+            counts = [deltas[snap_id][index] for snap_id in snap_ids]
+            columns.append(literal(counts, ARRAY(SnapsModel.likes.type)))
+        changes = (
+            func.unnest(*columns)
+            .table_valued("id", *COUNTERS)
+            .render_derived(name="deltas")
+        )
+        values = {
+            name: getattr(SnapsModel, name) + changes.c[name] for name in COUNTERS
+        }
+        stmt = update(SnapsModel).where(SnapsModel.id == changes.c.id)
+        await self.session.execute(stmt.values(values))
+
     async def make_public(
         self,
         snap_id: str,
@@ -331,40 +389,61 @@ class SnapDAO:
 
         await self.session.execute(stmt)
 
-    async def filter_snaps(
+    async def filter_snaps(  # noqa: WPS211
         self,
         content: str,
-        requester_is_following: List[Dict[str, str]],
-    ) -> List[SnapsModel]:
-        """Get list of filtered snaps by content."""
-        query = select(SnapsModel).distinct()
+        requester_is_following: Collection[str],
+        mode: SearchMode = SearchMode.words,
+        limit: int = 10,
+        offset: int = 0,
+        cursor: Optional[SearchCursor] = None,
+    ) -> List[Tuple[SnapsModel, float]]:
+        """
+        Search the snaps visible to a user by content.
+
+        Returns (snap, score) pairs, best first.
+        """
+        search = await self._search(content, mode)
+        if search is None:
+            return []
+        query, score = search
         query = _query_visibility_is_public(query)
         query = _query_privacy_filter_to_only_followers(query, requester_is_following)
-        query = query.filter(SnapsModel.content.ilike(f"%{content}%"))
-        query = query.order_by(SnapsModel.created_at.desc())
+        query = paginate(query, score, limit, offset, cursor)
 
         rows = await self.session.execute(query)
 
-        return list(rows.scalars().fetchall())
+        return list(rows.tuples())
 
     async def admin_filter_snaps(
         self,
         content: str,
-    ) -> List[SnapsModel]:
-        """Get list of filtered snaps by content."""
-        query = select(SnapsModel)
-        query = query.filter(SnapsModel.content.ilike(f"%{content}%"))
-        query = query.order_by(SnapsModel.created_at.desc())
+        mode: SearchMode = SearchMode.words,
+        limit: int = 10,
+        offset: int = 0,
+        cursor: Optional[SearchCursor] = None,
+    ) -> List[Tuple[SnapsModel, float]]:
+        """
+        Search every snap by content.
+
+        Returns (snap, score) pairs, best first.
+        """
+        search = await self._search(content, mode)
+        if search is None:
+            return []
+        query, score = search
+        query = paginate(query, score, limit, offset, cursor)
 
         rows = await self.session.execute(query)
 
-        return list(rows.scalars().fetchall())
+        return list(rows.tuples())
 
     async def get_shared_snaps(
         self,
         user_ids: List[str],
         limit: int = 10,
         offset: int = 0,
+        cursor: Optional[Cursor] = None,
     ) -> List[SnapsModel]:
         """
 
@@ -381,45 +460,49 @@ class SnapDAO:
                 ShareModel.user_id.in_(user_ids),
             ),
         )
-        query = relevant_snaps.order_by(
-            coalesce(SnapsModel.created_at, ShareModel.created_at).desc(),
-        )
+        sort_key = func.coalesce(SnapsModel.created_at, ShareModel.created_at)
+        query = paginate(relevant_snaps, sort_key, limit, offset, cursor)
 
         query = _query_visibility_is_public(query)
-        result = await self.session.execute(query.limit(limit).offset(offset))
+        result = await self.session.execute(query)
         return list(result.scalars().fetchall())
 
     async def get_snaps_and_shares(
         self,
-        users: List[Dict[str, str]],
-        requester_is_following: List[Dict[str, str]],
+        user_ids: Collection[str],
+        requester_is_following: Collection[str],
         limit: int = 10,
         offset: int = 0,
+        cursor: Optional[Cursor] = None,
     ) -> List[RowMapping]:
         """
-        Get snaps written or shared by a user in 'users'
+        Get snaps written or shared by a user in 'user_ids'
 
         Used for constructing a feed.
         If the snap was shared, include who shared it.
         For every RowMapping, you may access the snap data
         using snap["SnapsModel"].a_snap_attribute
         and the share data using snap["ShareModel"].a_share_attribute
+
+        Rows are sorted by the time they entered the feed:
+        when the snap was shared, or else when it was written.
         """
         joined = outerjoin(SnapsModel, ShareModel, SnapsModel.id == ShareModel.snap_id)
         selected = joined.select()
-        user_ids = [_dict["id"] for _dict in users]
         query = selected.where(
             or_(
                 SnapsModel.user_id.in_(user_ids),
                 ShareModel.user_id.in_(user_ids),
             ),
         )
+        # Implied by the condition above, but lets both sides use an index
+        # instead of scanning every snap and share.
+        query = query.where(SnapsModel.id.in_(_query_written_or_shared_by(user_ids)))
         query = _query_privacy_filter_to_only_followers(query, requester_is_following)
-        query = query.order_by(
-            coalesce(ShareModel.created_at, SnapsModel.created_at).desc(),
-        )
+        sort_key = func.coalesce(ShareModel.created_at, SnapsModel.created_at)
+        query = paginate(query, sort_key, limit, offset, cursor)
 
-        result = await self.session.execute(query.limit(limit).offset(offset))
+        result = await self.session.execute(query)
         return list(result.mappings().fetchall())
 
     async def user_has_shared(self, user_id: str, snap_id: uuid.UUID) -> bool:
@@ -456,12 +539,57 @@ class SnapDAO:
 
         return bool(res)
 
+    async def get_viewer_flags(
+        self,
+        user_id: str,
+        snap_ids: List[uuid.UUID],
+    ) -> Dict[str, Set[uuid.UUID]]:
+        """
+        Snaps among 'snap_ids' that the user has shared, liked or faved.
+
+        Resolves the three interaction tables in a single round trip.
+        The result maps "shared", "liked" and "faved" to sets of snap ids.
+        """
+        flags: Dict[str, Set[uuid.UUID]] = {
+            "shared": set(),
+            "liked": set(),
+            "faved": set(),
+        }
+        if not snap_ids:
+            return flags
+
+        query = union_all(
+            _query_viewer_flag("shared", ShareModel, user_id, snap_ids),
+            _query_viewer_flag("liked", LikeModel, user_id, snap_ids),
+            _query_viewer_flag("faved", FavModel, user_id, snap_ids),
+        )
+        rows = await self.session.execute(query)
+        for kind, snap_id in rows.all():
+            flags[kind].add(snap_id)
+
+        return flags
+
+    async def count_replies_by_snaps(
+        self,
+        snap_ids: List[uuid.UUID],
+    ) -> Dict[uuid.UUID, int]:
+        """Get number of replies of every snap in 'snap_ids'"""
+        if not snap_ids:
+            return {}
+
+        query = select(SnapsModel.parent_id, func.count("*"))
+        query = query.where(SnapsModel.parent_id.in_(snap_ids))
+        query = query.group_by(SnapsModel.parent_id)
+        rows = await self.session.execute(query)
+
+        return dict(rows.tuples().all())
+
     # codigo repetido - uno filtra privacidad y otro no
 
     async def get_snap_replies(
         self,
         snap_id: str,
-        requester_is_following: List[Dict[str, str]],
+        requester_is_following: Collection[str],
     ) -> List[SnapsModel]:
         """Get replies to a snap"""
         if not is_valid_uuid(snap_id):
@@ -509,52 +637,35 @@ class SnapDAO:
         start_date: str,
         end_date: str,
     ) -> Any:
-        """Get snap metrics by user in a given timeframe"""
+        """
+        Get snap metrics by user in a given timeframe.
+
+        Totals and totals of the snaps created in the period are summed in
+        a single aggregate query, and the period is broken down per day.
+
+        :param user_id: author of the snaps.
+        :param start_date: start of the period, as YYYY-MM-DD.
+        :param end_date: end of the period, as YYYY-MM-DD.
+        :returns: the metrics, or nothing if a date is not valid.
+        """
         try:
             start = datetime.datetime.strptime(start_date, "%Y-%m-%d")
             end = datetime.datetime.strptime(end_date, "%Y-%m-%d")
         except ValueError:
             return []
 
-        res = await self.session.execute(
-            select(SnapsModel).where(SnapsModel.user_id == user_id),
-        )
-
-        snaps_by_user = res.scalars().fetchall()
-
-        total_snaps = len(snaps_by_user)
-        total_likes = 0
-        total_shares = 0
-
-        for snap_by_user in snaps_by_user:
-            total_likes += snap_by_user.likes
-            total_shares += snap_by_user.shares
-
-        snaps_in_period = list(
-            filter(
-                lambda snap: snap.created_at >= start and snap.created_at <= end,
-                snaps_by_user,
-            ),
-        )
-
-        period_snap = len(snaps_in_period)
-        period_like = 0
-        period_share = 0
-
-        for snap_in_period in snaps_in_period:
-            period_like += snap_in_period.likes
-            period_share += snap_in_period.shares
-
-        return [
-            {
-                "total_snaps": total_snaps,
-                "total_likes": total_likes,
-                "total_shares": total_shares,
-                "period_snaps": period_snap,
-                "period_likes": period_like,
-                "period_shares": period_share,
-            },
-        ]
+        in_period = SnapsModel.created_at.between(start, end)
+        metrics = _user_metrics()
+        columns = []
+        for name, metric in metrics.items():
+            total = func.sum(metric)
+            columns.append(total.label(f"total_{name}"))
+            columns.append(total.filter(in_period).label(f"period_{name}"))
+        query = _query_with_replies(select(*columns), user_id)
+        row = (await self.session.execute(query)).mappings().one()
+        summary: Dict[str, Any] = _counts(row, row.keys())
+        summary["daily"] = await self._get_daily_metrics(user_id, start, end)
+        return [summary]
 
     async def _delete_tables_related_to(self, snap_id: str) -> None:
         # Delete snap likes
@@ -572,12 +683,148 @@ class SnapDAO:
         # Delete snap mentions
         await self.delete_snap_mentions(snap_id)
 
+        # Delete snap from home timelines
+        await self.delete_snap_timeline_entries(snap_id)
+
     async def _delete_references_in_children_of(self, snap_id: str) -> int:
         query = update(SnapsModel).where(SnapsModel.parent_id == snap_id)
         query = query.values(parent_id=None)
         result = await self.session.execute(query)
         return result.rowcount
 
+    async def _get_daily_metrics(
+        self,
+        user_id: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+    ) -> List[Dict[str, Any]]:
+        """Metrics of the snaps created each day of a period, zero filled."""
+        metrics = _user_metrics()
+        day = func.date(SnapsModel.created_at).label("day")
+        sums = [func.sum(metrics[name]).label(name) for name in metrics]
+        in_period = SnapsModel.created_at.between(start, end)
+        daily = _query_with_replies(select(day, *sums), user_id).where(in_period)
+        counts = daily.group_by(day).subquery()
+        days = (
+            func.generate_series(start, end, literal_column("interval '1 day'"))
+            .table_valued("day")
+            .render_derived(name="days")
+        )
+        date = func.date(days.c.day)
+        values = [counts.c[name] for name in metrics]
+        query = (
+            select(date.label("date"), *values)
+            .select_from(days.outerjoin(counts, counts.c.day == date))
+            .order_by(date)
+        )
+        rows = await self.session.execute(query)
+        return [
+            {"date": str(row["date"]), **_counts(row, metrics)}
+            for row in rows.mappings()
+        ]
+
+    async def _search(
+        self,
+        content: str,
+        mode: SearchMode,
+    ) -> Optional[Tuple[Any, Any]]:
+        """Query of a search, setting up the session for it."""
+        if mode == SearchMode.similar:
+            await self.session.execute(
+                select(
+                    func.set_config(
+                        "pg_trgm.word_similarity_threshold",
+                        str(settings.search_similarity_threshold),
+                        true(),
+                    ),
+                ),
+            )
+        return _query_search(content, mode)
+
+
+def _user_metrics() -> Dict[str, Any]:
+    """Values summed by the metrics of a user, per snap."""
+    return {
+        "snaps": literal_column("1"),
+        "likes": SnapsModel.likes,
+        "shares": SnapsModel.shares,
+        "favs": SnapsModel.favs,
+        # counted by the lateral subquery of _query_with_replies
+        "replies": literal_column("replies.replies"),
+    }
+
+
+def _counts(row: RowMapping, names: Collection[str]) -> Dict[str, int]:
+    """Sums of a row, zero when there was nothing to sum."""
+    return {name: int(row[name] or 0) for name in names}
+
+
+def _query_with_replies(query: Any, user_id: str) -> Any:
+    """Snaps of a user, each with its number of replies."""
+    reply = aliased(SnapsModel, name="reply")
+    replies = (
+        select(func.count().label("replies"))
+        .where(reply.parent_id == SnapsModel.id)
+        .lateral("replies")
+    )
+    query = query.select_from(SnapsModel).join(replies, true())
+    return query.where(SnapsModel.user_id == user_id)
+
+
+def _query_search(content: str, mode: SearchMode) -> Optional[Tuple[Any, Any]]:
+    """
+    Select the snaps matching a search along with their score.
+
+    The score adds the log of the relevance of a snap to its age in half
+    lives, so that it does not depend on the current time and can be paged
+    with a cursor. None if the search can not match anything.
+    """
+    match = _query_match(content, mode)
+    if match is None:
+        return None
+    matches, rank = match
+
+    created_at = func.extract("epoch", SnapsModel.created_at)
+    age = created_at / settings.search_half_life
+    relevance = func.greatest(rank, MIN_RANK)
+    halvings = func.ln(relevance) / math.log(2)
+    score = cast(halvings + age, Double).label("score")
+    return select(SnapsModel, score).where(matches), score
+
+
+def _query_match(content: str, mode: SearchMode) -> Optional[Tuple[Any, Any]]:
+    """Condition matching a search and relevance of the matching snaps"""
+    if mode == SearchMode.substring:
+        if len(content) < MIN_SUBSTRING:
+            raise HTTPException(
+                400,
+                detail=f"Substrings must have {MIN_SUBSTRING} characters or more",
+            )
+        return SnapsModel.content.icontains(content, autoescape=True), literal(1.0)
+    if mode == SearchMode.similar:
+        matches = SnapsModel.content.bool_op("%>")(content)
+        return matches, func.word_similarity(content, SnapsModel.content)
+
+    text_query = _query_text_search(content, mode)
+    if text_query is None:
+        return None
+    matches = SnapsModel.search_vector.bool_op("@@")(text_query)
+    return matches, func.ts_rank(SnapsModel.search_vector, text_query)
+
+
+def _query_text_search(content: str, mode: SearchMode) -> Any:
+    """Text query of a words, phrase or prefix search, None without words"""
+    config: Any = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+    if mode == SearchMode.phrase:
+        return func.phraseto_tsquery(config, content)
+    if mode == SearchMode.words:
+        return func.websearch_to_tsquery(config, content)
+    terms = re.findall(r"\w+", content)
+    if not terms:
+        return None
+    prefixes = " & ".join(f"{term}:*" for term in terms)
+    return func.to_tsquery(config, prefixes)
+
 
 def _query_visibility_is_public(query: Any) -> Any:
     """Snap visibility is public"""
@@ -589,6 +836,25 @@ def _query_privacy_is_public(query: Any) -> Any:
     return query.where(SnapsModel.privacy == Privacy.PUBLIC.value)
 
 
+def _query_written_or_shared_by(user_ids: Collection[str]) -> Any:
+    """Ids of the snaps written or shared by a user in 'user_ids'."""
+    written = select(SnapsModel.id).where(SnapsModel.user_id.in_(user_ids))
+    shared = select(ShareModel.snap_id).where(ShareModel.user_id.in_(user_ids))
+    return union_all(written, shared)
+
+
+def _query_viewer_flag(
+    kind: str,
+    model: Union[type[ShareModel], type[LikeModel], type[FavModel]],
+    user_id: str,
+    snap_ids: List[uuid.UUID],
+) -> Any:
+    """Select ('kind', snap_id) for the snaps the user interacted with"""
+    query = select(literal(kind).label("kind"), model.snap_id)
+    query = query.where(model.user_id == user_id)
+    return query.where(model.snap_id.in_(snap_ids))
+
+
 def _default_visibility() -> int:
     return Visibility.PUBLIC.value
 
@@ -599,18 +865,17 @@ def _private_visibility() -> int:
 
 def _query_privacy_filter_to_only_followers(
     query: Select[tuple[SnapsModel]],
-    requester_is_following: List[Dict[str, str]],
+    requester_is_following: Collection[str],
 ) -> Select[tuple[SnapsModel]]:
     """
     Get query expression for: snap.privacy = 1 OR snap.user_id IN [followed1, followed2]
 
-    this function pings identity socializer to resolve followed users
+    'requester_is_following' holds the ids of the users the requester follows.
     """
-    followed_by_user_list = [_dict["id"] for _dict in requester_is_following]
     return query.where(
         or_(
             SnapsModel.privacy == 1,
-            SnapsModel.user_id.in_(followed_by_user_list),
+            SnapsModel.user_id.in_(requester_is_following),
         ),
     )
 
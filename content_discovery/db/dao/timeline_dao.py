@@ -0,0 +1,366 @@
+import asyncio
+import datetime
+import time
+import uuid
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple
+
+from fastapi import Depends
+from sqlalchemy import String, any_, delete, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.expression import text, union_all
+from sqlalchemy.sql.sqltypes import DateTime, Uuid
+
+from content_discovery.constants import Privacy, Visibility
+from content_discovery.db.dependencies import get_db_session
+from content_discovery.db.models.high_fanout_author_model import HighFanoutAuthorModel
+from content_discovery.db.models.share_model import ShareModel
+from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.db.models.timeline_model import (
+    ORIGINAL,
+    TimelineEntry,
+    TimelineKey,
+    TimelineModel,
+)
+from content_discovery.db.models.timeline_state_model import TimelineStateModel
+from content_discovery.db.pagination import Cursor, paginate
+from content_discovery.settings import settings
+
+TIMELINE_COLUMNS = ("owner_id", "snap_id", "sharer_id", "created_at")
+
+# Transactions of other sessions that are writing to the timelines.
+TIMELINE_WRITERS = text(
+    "SELECT virtualtransaction FROM pg_locks "
+    "WHERE locktype = 'relation' AND relation = 'timelines'::regclass "
+    "AND mode = 'RowExclusiveLock' AND pid <> pg_backend_pid()",
+)
+# Seconds between checks of whether those transactions ended.
+WRITERS_POLL = 0.05
+
+
+class TimelineDAO:
+    """
+    Class for accessing the materialized home timelines.
+
+    Only the timelines of users in 'timeline_states' are kept up to date
+    by fan-out on write. The rest are read from snaps and shares until they
+    are built, after the first time they are read, and dropped whenever
+    the user follows or unfollows someone. Timelines are built with their
+    newest entries only, older ones are read from snaps and shares.
+    """
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        self.session = session
+
+    async def is_built(self, owner_id: str) -> bool:
+        """Whether the timeline of the user is materialized."""
+        query = select(TimelineStateModel.owner_id)
+        query = query.where(TimelineStateModel.owner_id == owner_id)
+        query = query.where(TimelineStateModel.building.is_(False))
+        rows = await self.session.execute(query)
+        return rows.first() is not None
+
+    async def fan_out(
+        self,
+        owner_ids: Collection[str],
+        snap_id: uuid.UUID,
+        created_at: datetime.datetime,
+        sharer_id: str = ORIGINAL,
+    ) -> None:
+        """
+        Add a snap, or a share of it, to the timelines of 'owner_ids'.
+
+        Owners whose timeline is not materialized are skipped,
+        it will include the snap once it is built. The owners are bound
+        as a single array, there may be more than a query accepts.
+        """
+        owner_array = literal(list(owner_ids), ARRAY(String))
+        owners = select(
+            TimelineStateModel.owner_id,
+            literal(snap_id, Uuid),
+            literal(sharer_id),
+            literal(created_at, DateTime),
+        )
+        owners = owners.where(TimelineStateModel.owner_id == any_(owner_array))
+        stmt = insert(TimelineModel).from_select(TIMELINE_COLUMNS, owners)
+        await self.session.execute(stmt.on_conflict_do_nothing())
+
+    async def remove_snap(self, snap_id: uuid.UUID) -> None:
+        """Remove a snap and its shares from every timeline."""
+        stmt = delete(TimelineModel).where(TimelineModel.snap_id == snap_id)
+        await self.session.execute(stmt)
+
+    async def remove_share(self, snap_id: uuid.UUID, sharer_id: str) -> None:
+        """Remove a share from every timeline."""
+        stmt = delete(TimelineModel).where(TimelineModel.snap_id == snap_id)
+        stmt = stmt.where(TimelineModel.sharer_id == sharer_id)
+        await self.session.execute(stmt)
+
+    async def drop(self, owner_id: str) -> None:
+        """Stop maintaining the timeline of a user until it is read again."""
+        stmt = delete(TimelineStateModel)
+        stmt = stmt.where(TimelineStateModel.owner_id == owner_id)
+        await self.session.execute(stmt)
+
+    async def get_state(self, owner_id: str) -> Optional[TimelineStateModel]:
+        """State of the materialized timeline of a user, None if not built."""
+        return await self.session.get(TimelineStateModel, owner_id)
+
+    async def rebuild(
+        self,
+        owner_id: str,
+        following: Collection[str],
+        limit: int,
+    ) -> None:
+        """
+        Build the timeline of a user from scratch, committing it.
+
+        Its state is committed first, so that the snaps and shares written
+        from then on are fanned out to it. The transactions writing to the
+        timelines at that moment are waited for, so that the snaps they
+        skipped are committed when the newest entries are copied.
+
+        :param owner_id: user whose timeline is built.
+        :param following: users followed by the owner, including the owner.
+        :param limit: newest entries copied, older ones are read
+            from snaps and shares when they are paged to.
+        """
+        state = insert(TimelineStateModel).values(
+            owner_id=owner_id,
+            truncated=False,
+            building=True,
+        )
+        # a built timeline is still read while it is built again
+        await self.session.execute(state.on_conflict_do_nothing())
+        await self.session.commit()
+        await self._wait_for_writers(settings.timeline_rebuild_timeout)
+
+        await self.session.execute(
+            delete(TimelineModel).where(TimelineModel.owner_id == owner_id),
+        )
+        entries = _query_entries(following).subquery()
+        newest = select(
+            literal(owner_id),
+            entries.c.snap_id,
+            entries.c.sharer_id,
+            entries.c.created_at,
+        )
+        newest = newest.order_by(
+            entries.c.created_at.desc(),
+            entries.c.snap_id.desc(),
+        ).limit(limit)
+        stmt = insert(TimelineModel).from_select(TIMELINE_COLUMNS, newest)
+        await self.session.execute(stmt.on_conflict_do_nothing())
+
+        size, _ = await self.get_end(owner_id)
+        built = update(TimelineStateModel)
+        built = built.where(TimelineStateModel.owner_id == owner_id)
+        await self.session.execute(
+            built.values(
+                built_at=datetime.datetime.utcnow(),
+                truncated=size >= limit,
+                building=False,
+            ),
+        )
+        await self.session.commit()
+
+    async def get_end(self, owner_id: str) -> Tuple[int, Optional[Cursor]]:
+        """
+        Size of the materialized timeline of a user and its oldest entry.
+
+        :returns: number of entries and position of the oldest one,
+            None if there are none.
+        """
+        query = select(
+            func.count().over(),
+            TimelineModel.created_at,
+            TimelineModel.snap_id,
+        )
+        query = query.where(TimelineModel.owner_id == owner_id)
+        query = query.order_by(TimelineModel.created_at, TimelineModel.snap_id)
+        rows = await self.session.execute(query.limit(1))
+        oldest = rows.first()
+        if oldest is None:
+            return 0, None
+        size, created_at, snap_id = oldest
+        return size, Cursor(created_at, snap_id)
+
+    async def get_entries(  # noqa: WPS211
+        self,
+        user_ids: Collection[str],
+        following: Collection[str],
+        limit: int = 10,
+        offset: int = 0,
+        cursor: Optional[Cursor] = None,
+    ) -> List[TimelineEntry]:
+        """
+        Get a page of the snaps written or shared by users, newest first.
+
+        These are the entries a timeline is built from, read from snaps
+        and shares when the timeline is not materialized.
+
+        :param following: users followed by the reader, to hide
+            followers only snaps shared by someone else.
+        """
+        entries = _query_entries(user_ids).subquery()
+        query = select(SnapsModel, entries.c.sharer_id, entries.c.created_at)
+        query = query.join(SnapsModel, SnapsModel.id == entries.c.snap_id)
+        query = query.where(
+            or_(
+                SnapsModel.privacy == Privacy.PUBLIC.value,
+                SnapsModel.user_id.in_(following),
+            ),
+        )
+        query = paginate(
+            query,
+            entries.c.created_at,
+            limit,
+            offset,
+            cursor,
+            id_column=entries.c.snap_id,
+        )
+        rows = await self.session.execute(query)
+        return [TimelineEntry(*row) for row in rows.all()]
+
+    async def get_timeline(  # noqa: WPS211
+        self,
+        owner_id: str,
+        following: Collection[str],
+        limit: int = 10,
+        offset: int = 0,
+        cursor: Optional[Cursor] = None,
+    ) -> List[TimelineEntry]:
+        """
+        Get a page of the materialized timeline of a user, newest first.
+
+        :param following: users followed by the owner, to hide
+            followers only snaps shared by someone else.
+        """
+        query = select(
+            SnapsModel,
+            TimelineModel.sharer_id,
+            TimelineModel.created_at,
+        )
+        query = query.select_from(TimelineModel)
+        query = query.join(SnapsModel, SnapsModel.id == TimelineModel.snap_id)
+        query = query.where(TimelineModel.owner_id == owner_id)
+        query = query.where(
+            or_(
+                SnapsModel.privacy == Privacy.PUBLIC.value,
+                SnapsModel.user_id.in_(following),
+            ),
+        )
+        query = paginate(
+            query,
+            TimelineModel.created_at,
+            limit,
+            offset,
+            cursor,
+            id_column=TimelineModel.snap_id,
+        )
+        rows = await self.session.execute(query)
+        return [TimelineEntry(*row) for row in rows.all()]
+
+    async def mark_high_fanout(self, user_id: str, followers: int) -> None:
+        """Stop fanning out the snaps of a user on write."""
+        stmt = insert(HighFanoutAuthorModel).values(
+            user_id=user_id,
+            followers=followers,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[HighFanoutAuthorModel.user_id],
+            set_={"followers": followers, "updated_at": datetime.datetime.utcnow()},
+        )
+        await self.session.execute(stmt)
+
+    async def unmark_high_fanout(self, user_id: str) -> None:
+        """Fan out the snaps of a user on write again."""
+        stmt = delete(HighFanoutAuthorModel)
+        stmt = stmt.where(HighFanoutAuthorModel.user_id == user_id)
+        await self.session.execute(stmt)
+
+    async def get_high_fanout(self, user_ids: Collection[str]) -> Set[str]:
+        """Users in 'user_ids' whose snaps are not fanned out on write."""
+        query = select(HighFanoutAuthorModel.user_id)
+        query = query.where(HighFanoutAuthorModel.user_id.in_(user_ids))
+        rows = await self.session.execute(query)
+        return set(rows.scalars().all())
+
+    async def get_high_fanout_author(
+        self,
+        user_id: str,
+    ) -> Optional[HighFanoutAuthorModel]:
+        """When a user was last found to have too many followers, if ever."""
+        return await self.session.get(HighFanoutAuthorModel, user_id)
+
+    async def get_recent_entries(
+        self,
+        user_id: str,
+        since: datetime.datetime,
+        limit: int,
+    ) -> Tuple[List[TimelineKey], List[TimelineKey]]:
+        """
+        Get the latest public snaps written and shared by a user.
+
+        :param since: ignore entries older than this.
+        :param limit: up to how many snaps and how many shares to get.
+        :returns: keys of the snaps written and of the snaps shared,
+            newest first.
+        """
+        written = select(SnapsModel.id, literal(ORIGINAL), SnapsModel.created_at)
+        written = written.where(SnapsModel.user_id == user_id)
+        written = written.where(SnapsModel.visibility == Visibility.PUBLIC.value)
+        written = written.where(SnapsModel.created_at >= since)
+        written = written.order_by(SnapsModel.created_at.desc()).limit(limit)
+
+        shared = select(ShareModel.snap_id, ShareModel.user_id, ShareModel.created_at)
+        shared = shared.join(SnapsModel, ShareModel.snap_id == SnapsModel.id)
+        shared = shared.where(ShareModel.user_id == user_id)
+        shared = shared.where(SnapsModel.visibility == Visibility.PUBLIC.value)
+        shared = shared.where(ShareModel.created_at >= since)
+        shared = shared.order_by(ShareModel.created_at.desc()).limit(limit)
+
+        snaps = await self.session.execute(written)
+        shares = await self.session.execute(shared)
+        return (
+            [TimelineKey(*row) for row in snaps.all()],
+            [TimelineKey(*row) for row in shares.all()],
+        )
+
+    async def get_snaps(
+        self,
+        snap_ids: Collection[uuid.UUID],
+    ) -> Dict[uuid.UUID, SnapsModel]:
+        """Snaps by id, the ones that no longer exist are left out."""
+        id_array = literal(list(snap_ids), ARRAY(Uuid))
+        query = select(SnapsModel).where(SnapsModel.id == any_(id_array))
+        # counters of snaps already in the session are read again
+        query = query.execution_options(populate_existing=True)
+        rows = await self.session.execute(query)
+        return {snap.id: snap for snap in rows.scalars().all()}
+
+    async def _wait_for_writers(self, timeout: float) -> None:
+        """Wait for the transactions writing to the timelines to end."""
+        writers = set((await self.session.execute(TIMELINE_WRITERS)).scalars())
+        deadline = time.monotonic() + timeout
+        while writers and time.monotonic() < deadline:
+            await asyncio.sleep(WRITERS_POLL)
+            rows = await self.session.execute(TIMELINE_WRITERS)
+            writers.intersection_update(rows.scalars())
+
+
+def _query_entries(user_ids: Collection[str]) -> Any:
+    """Public snaps written, and snaps shared, by a user in 'user_ids'."""
+    written = select(
+        SnapsModel.id.label("snap_id"),
+        literal(ORIGINAL).label("sharer_id"),
+        SnapsModel.created_at.label("created_at"),
+    )
+    written = written.where(SnapsModel.user_id.in_(user_ids))
+    shared = select(ShareModel.snap_id, ShareModel.user_id, ShareModel.created_at)
+    shared = shared.join(SnapsModel, SnapsModel.id == ShareModel.snap_id)
+    shared = shared.where(ShareModel.user_id.in_(user_ids))
+    return union_all(
+        written.where(SnapsModel.visibility == Visibility.PUBLIC.value),
+        shared.where(SnapsModel.visibility == Visibility.PUBLIC.value),
+    )
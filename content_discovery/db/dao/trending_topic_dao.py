@@ -2,10 +2,12 @@ import datetime
 from typing import List, Optional
 
 from fastapi import Depends
-from sqlalchemy import delete, select
+from sqlalchemy import RowMapping, delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from content_discovery.db.dependencies import get_db_session
+from content_discovery.db.models.hashtag_model import HashtagModel
+from content_discovery.db.models.hashtag_name_model import HashtagNameModel
 from content_discovery.db.models.trending_model import TrendingTopicModel
 
 
@@ -52,6 +54,20 @@ class TrendingTopicDAO:
         rows = await self.session.execute(query)
         return list(rows.scalars().all())
 
+    async def get_topics_with_uses(self) -> List[RowMapping]:
+        """Get every topic with the number of snaps using its hashtag."""
+        uses = select(func.count()).select_from(HashtagModel)
+        uses = uses.join(HashtagModel.hashtag)
+        uses = uses.where(HashtagNameModel.name == TrendingTopicModel.name)
+        query = select(
+            TrendingTopicModel.id,
+            TrendingTopicModel.name,
+            TrendingTopicModel.created_at,
+            uses.scalar_subquery().label("times_used"),
+        )
+        rows = await self.session.execute(query)
+        return list(rows.mappings().all())
+
     async def delete_old_trending_topics(self, cutoff: datetime.timedelta) -> None:
         """Delete old trending topics."""
         query = delete(TrendingTopicModel)
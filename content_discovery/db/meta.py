@@ -1,3 +1,7 @@
 import sqlalchemy as sa
 
 meta = sa.MetaData()
+
+# Indexes that need the pg_trgm extension. They are only created by
+# migrations, and left out of the tables created from the models.
+TRIGRAM_INDEXES = frozenset(("ix_snaps_content_trgm", "ix_hashtag_names_name_trgm"))
@@ -1,11 +1,12 @@
 import asyncio
 from logging.config import fileConfig
+from typing import Any, Optional
 
 from alembic import context
 from sqlalchemy.ext.asyncio.engine import create_async_engine
 from sqlalchemy.future import Connection
 
-from content_discovery.db.meta import meta
+from content_discovery.db.meta import TRIGRAM_INDEXES, meta
 from content_discovery.db.models import load_all_models
 from content_discovery.settings import settings
 
@@ -32,6 +33,21 @@ target_metadata = meta
 # ... etc.
 
 
+def include_object(
+    obj: Any,
+    name: Optional[str],
+    type_: str,
+    reflected: bool,
+    compare_to: Any,
+) -> bool:
+    """
+    Leave out of autogenerate the indexes that are not in the models.
+
+    :returns: whether the object is compared with the models.
+    """
+    return not (type_ == "index" and name in TRIGRAM_INDEXES)
+
+
 async def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -49,6 +65,7 @@ async def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -61,7 +78,11 @@ def do_run_migrations(connection: Connection) -> None:
 
     :param connection: connection to the database.
     """
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,54 @@
+"""Added read path indexes
+
+Revision ID: 8c748709b514
+Revises: 99db5c5d21ce
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8c748709b514"
+down_revision = "99db5c5d21ce"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns)
+INDEXES = (
+    ("ix_snaps_user_id_created_at", "snaps", ["user_id", "created_at", "id"]),
+    ("ix_snaps_parent_id_created_at", "snaps", ["parent_id", "created_at"]),
+    ("ix_snaps_created_at", "snaps", ["created_at", "id"]),
+    ("ix_shares_snap_id", "shares", ["snap_id"]),
+    ("ix_shares_user_id_created_at", "shares", ["user_id", "created_at"]),
+    ("ix_likes_snap_id", "likes", ["snap_id"]),
+    ("ix_favs_snap_id", "favs", ["snap_id"]),
+    ("ix_hashtags_name_created_at", "hashtags", ["name", "created_at"]),
+    ("ix_hashtags_created_at", "hashtags", ["created_at"]),
+    ("ix_hashtags_snap_id", "hashtags", ["snap_id"]),
+    ("ix_mentions_mentioned_id", "mentions", ["mentioned_id"]),
+    ("ix_mentions_snap_id", "mentions", ["snap_id"]),
+)
+
+
+def upgrade() -> None:
+    # Built concurrently so that writes are not blocked on big tables.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,51 @@
+"""Added materialized home timelines
+
+Revision ID: b80dd2f8049d
+Revises: 8c748709b514
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b80dd2f8049d"
+down_revision = "8c748709b514"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "timelines",
+        sa.Column("owner_id", sa.String(length=200), nullable=False),
+        sa.Column("snap_id", sa.Uuid(), nullable=False),
+        sa.Column("sharer_id", sa.String(length=200), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["snap_id"],
+            ["snaps.id"],
+        ),
+        sa.PrimaryKeyConstraint("owner_id", "snap_id", "sharer_id"),
+    )
+    op.create_index(
+        "ix_timelines_owner_id_created_at",
+        "timelines",
+        ["owner_id", "created_at", "snap_id"],
+    )
+    op.create_index("ix_timelines_snap_id", "timelines", ["snap_id"])
+    op.create_table(
+        "timeline_states",
+        sa.Column("owner_id", sa.String(length=200), nullable=False),
+        sa.Column("built_at", sa.DateTime(), nullable=False),
+        sa.Column("truncated", sa.Boolean(), nullable=False),
+        sa.Column("building", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("owner_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("timeline_states")
+    op.drop_index("ix_timelines_snap_id", table_name="timelines")
+    op.drop_index("ix_timelines_owner_id_created_at", table_name="timelines")
+    op.drop_table("timelines")
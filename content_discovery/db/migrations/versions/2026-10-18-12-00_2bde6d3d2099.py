@@ -0,0 +1,29 @@
+"""Added high fanout authors
+
+Revision ID: 2bde6d3d2099
+Revises: b80dd2f8049d
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "2bde6d3d2099"
+down_revision = "b80dd2f8049d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "high_fanout_authors",
+        sa.Column("user_id", sa.String(length=200), nullable=False),
+        sa.Column("followers", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("high_fanout_authors")
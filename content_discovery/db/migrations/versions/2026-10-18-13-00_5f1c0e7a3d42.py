@@ -0,0 +1,48 @@
+"""Added content search vector
+
+Revision ID: 5f1c0e7a3d42
+Revises: 2bde6d3d2099
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "5f1c0e7a3d42"
+down_revision = "2bde6d3d2099"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filling the generated column rewrites the table.
+    op.add_column(
+        "snaps",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple', content)", persisted=True),
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_snaps_search_vector",
+            "snaps",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_snaps_search_vector",
+            table_name="snaps",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("snaps", "search_vector")
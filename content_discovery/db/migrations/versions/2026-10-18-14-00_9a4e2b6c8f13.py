@@ -0,0 +1,48 @@
+"""Added trigram indexes
+
+Revision ID: 9a4e2b6c8f13
+Revises: 5f1c0e7a3d42
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9a4e2b6c8f13"
+down_revision = "5f1c0e7a3d42"
+branch_labels = None
+depends_on = None
+
+# (name, table, column)
+INDEXES = (
+    ("ix_snaps_content_trgm", "snaps", "content"),
+    ("ix_hashtags_name_trgm", "hashtags", "name"),
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Built concurrently so that writes are not blocked on big tables.
+    with op.get_context().autocommit_block():
+        for name, table, column in INDEXES:
+            op.create_index(
+                name,
+                table,
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    op.execute("DROP EXTENSION IF EXISTS pg_trgm")
@@ -0,0 +1,112 @@
+"""Added hashtag dictionary
+
+Revision ID: c3d7a1e5b920
+Revises: 9a4e2b6c8f13
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c3d7a1e5b920"
+down_revision = "9a4e2b6c8f13"
+branch_labels = None
+depends_on = None
+
+# Names are cut to the length of the model, like normalize_hashtag does.
+BACKFILL_NAMES = """
+INSERT INTO hashtag_names (name)
+SELECT DISTINCT left(lower(name), 200) FROM hashtags
+ORDER BY 1
+"""
+BACKFILL_LINKS = """
+INSERT INTO snap_hashtags (snap_id, hashtag_id, created_at)
+SELECT hashtags.snap_id, hashtag_names.id, min(hashtags.created_at)
+FROM hashtags
+JOIN hashtag_names ON hashtag_names.name = left(lower(hashtags.name), 200)
+WHERE hashtags.snap_id IS NOT NULL
+GROUP BY hashtags.snap_id, hashtag_names.id
+"""
+RESTORE = """
+INSERT INTO hashtags (id, name, snap_id, created_at)
+SELECT gen_random_uuid(), hashtag_names.name, snap_hashtags.snap_id,
+       snap_hashtags.created_at
+FROM snap_hashtags JOIN hashtag_names ON hashtag_names.id = snap_hashtags.hashtag_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "hashtag_names",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_table(
+        "snap_hashtags",
+        sa.Column("snap_id", sa.Uuid(), nullable=False),
+        sa.Column("hashtag_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["snap_id"], ["snaps.id"]),
+        sa.ForeignKeyConstraint(["hashtag_id"], ["hashtag_names.id"]),
+        sa.PrimaryKeyConstraint("snap_id", "hashtag_id"),
+    )
+    op.execute(BACKFILL_NAMES)
+    op.execute(BACKFILL_LINKS)
+
+    # Indexes are built after the backfill, it is faster than updating them.
+    op.create_index(
+        "ix_hashtag_names_name_pattern",
+        "hashtag_names",
+        ["name"],
+        postgresql_ops={"name": "varchar_pattern_ops"},
+    )
+    op.create_index(
+        "ix_hashtag_names_name_trgm",
+        "hashtag_names",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_snap_hashtags_hashtag_id_created_at",
+        "snap_hashtags",
+        ["hashtag_id", "created_at"],
+    )
+    op.create_index(
+        "ix_snap_hashtags_created_at",
+        "snap_hashtags",
+        ["created_at", "hashtag_id"],
+    )
+    op.drop_table("hashtags")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "hashtags",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("snap_id", sa.Uuid()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["snap_id"],
+            ["snaps.id"],
+            name=op.f("fk_hashtag_snap_id"),
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(RESTORE)
+    op.create_index("ix_hashtags_name_created_at", "hashtags", ["name", "created_at"])
+    op.create_index("ix_hashtags_created_at", "hashtags", ["created_at"])
+    op.create_index("ix_hashtags_snap_id", "hashtags", ["snap_id"])
+    op.create_index(
+        "ix_hashtags_name_trgm",
+        "hashtags",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.drop_table("snap_hashtags")
+    op.drop_table("hashtag_names")
@@ -0,0 +1,55 @@
+"""Added snap count rollups
+
+Revision ID: d5e8f2a4b617
+Revises: c3d7a1e5b920
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+from content_discovery.db.models.snap_count_model import CREATE_TRIGGERS, DROP_TRIGGERS
+
+# revision identifiers, used by Alembic.
+revision = "d5e8f2a4b617"
+down_revision = "c3d7a1e5b920"
+branch_labels = None
+depends_on = None
+
+BACKFILL = """
+INSERT INTO snap_counts (granularity, bucket, privacy, count)
+SELECT unit, date_trunc(unit, created_at), privacy, count(*)
+FROM snaps CROSS JOIN unnest(ARRAY['minute', 'hour', 'day']) AS unit
+GROUP BY 1, 2, 3
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "snap_counts",
+        sa.Column("granularity", sa.String(length=10), nullable=False),
+        sa.Column("bucket", sa.DateTime(), nullable=False),
+        sa.Column("privacy", sa.Integer(), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("granularity", "bucket", "privacy"),
+    )
+    op.create_table(
+        "snap_count_deltas",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("privacy", sa.Integer(), nullable=False),
+        sa.Column("delta", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # The triggers lock snaps against writes until the backfill is committed,
+    # so that no snap is counted twice or missed.
+    for statement in CREATE_TRIGGERS:
+        op.execute(statement)
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    for statement in DROP_TRIGGERS:
+        op.execute(statement)
+    op.drop_table("snap_count_deltas")
+    op.drop_table("snap_counts")
@@ -1,29 +1,33 @@
 import datetime
 import uuid
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.sql.sqltypes import DateTime, String, Uuid
+from sqlalchemy.sql.sqltypes import DateTime, Integer, Uuid
 
 from content_discovery.db.base import Base
 
 
 class HashtagModel(Base):
-    """Model for hashtag model."""
-
-    __tablename__ = "hashtags"
-
-    length = 200
-
-    id: Mapped[uuid.UUID] = mapped_column(
-        Uuid,
-        default=uuid.uuid4,
-        primary_key=True,
+    """Hashtag used in a snap, each one is recorded once per snap."""
+
+    __tablename__ = "snap_hashtags"
+    __table_args__ = (
+        # snaps with a hashtag and its uses in a period
+        Index("ix_snap_hashtags_hashtag_id_created_at", "hashtag_id", "created_at"),
+        # uses of every hashtag in a period
+        Index("ix_snap_hashtags_created_at", "created_at", "hashtag_id"),
     )
-    name: Mapped[str] = mapped_column(String(length))
+
     snap_id: Mapped[uuid.UUID] = mapped_column(
         Uuid,
         ForeignKey("snaps.id"),
+        primary_key=True,
+    )
+    hashtag_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("hashtag_names.id"),
+        primary_key=True,
     )
     created_at: Mapped[datetime.datetime] = mapped_column(
         DateTime,
@@ -31,3 +35,4 @@ class HashtagModel(Base):
     )
 
     snap = relationship("SnapsModel", foreign_keys=[snap_id])
+    hashtag = relationship("HashtagNameModel", foreign_keys=[hashtag_id])
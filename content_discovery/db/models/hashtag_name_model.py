@@ -0,0 +1,25 @@
+from sqlalchemy import Index
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.sqltypes import Integer, String
+
+from content_discovery.db.base import Base
+
+
+class HashtagNameModel(Base):
+    """Dictionary of hashtags, each normalized name has an integer id."""
+
+    __tablename__ = "hashtag_names"
+    __table_args__ = (
+        # prefix lookups, partial names use ix_hashtag_names_name_trgm
+        # (TRIGRAM_INDEXES)
+        Index(
+            "ix_hashtag_names_name_pattern",
+            "name",
+            postgresql_ops={"name": "varchar_pattern_ops"},
+        ),
+    )
+
+    length = 200
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(length), unique=True)
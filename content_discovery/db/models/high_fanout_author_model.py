@@ -0,0 +1,21 @@
+import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.sqltypes import DateTime, Integer, String
+
+from content_discovery.db.base import Base
+
+
+class HighFanoutAuthorModel(Base):
+    """Users with too many followers to fan their snaps out on write."""
+
+    __tablename__ = "high_fanout_authors"
+
+    length = 200
+
+    user_id: Mapped[str] = mapped_column(String(length), primary_key=True)
+    followers: Mapped[int] = mapped_column(Integer)
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime,
+        default=datetime.datetime.utcnow,
+    )
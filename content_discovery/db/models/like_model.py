@@ -1,7 +1,7 @@
 import datetime
 import uuid
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql.sqltypes import DateTime, String, Uuid
 
@@ -12,6 +12,7 @@ class LikeModel(Base):
     """Model for like model."""
 
     __tablename__ = "likes"
+    __table_args__ = (Index("ix_likes_snap_id", "snap_id"),)
 
     length = 200
 
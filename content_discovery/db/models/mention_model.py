@@ -1,7 +1,7 @@
 import datetime
 import uuid
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql.sqltypes import DateTime, String, Uuid
 
@@ -12,6 +12,10 @@ class MentionModel(Base):
     """Model for mention model."""
 
     __tablename__ = "mentions"
+    __table_args__ = (
+        Index("ix_mentions_mentioned_id", "mentioned_id"),
+        Index("ix_mentions_snap_id", "snap_id"),
+    )
 
     length = 200
 
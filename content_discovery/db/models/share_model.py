@@ -1,7 +1,7 @@
 import datetime
 import uuid
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql.sqltypes import DateTime, String, Uuid
 
@@ -12,6 +12,10 @@ class ShareModel(Base):
     """Model for share model."""
 
     __tablename__ = "shares"
+    __table_args__ = (
+        Index("ix_shares_snap_id", "snap_id"),
+        Index("ix_shares_user_id_created_at", "user_id", "created_at"),
+    )
 
     length = 200
 
@@ -0,0 +1,119 @@
+import datetime
+
+from sqlalchemy import DDL, event
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.sqltypes import BigInteger, DateTime, Integer, String
+
+from content_discovery.db.base import Base
+from content_discovery.db.meta import meta
+
+# Triggers on snaps append the change of each snap written to
+# snap_count_deltas, in the transaction that writes it, and a scheduled job
+# moves them into the rollups. Appending takes no lock on shared rows, so
+# concurrent writes of snaps do not wait for each other, and counts include
+# the deltas not moved yet when they are read. Inserts and deletes are
+# appended once per statement from its transition tables. Postgres does not
+# allow transition tables on triggers limited to some columns, so updates
+# are appended once per row, only for the rows whose privacy or creation
+# time changed: updates of the counts of likes, shares and favs do not run
+# it. The migration that adds the counts creates and drops the same triggers.
+APPEND_CHANGES = """
+CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO snap_count_deltas (created_at, privacy, delta) {changes};
+    RETURN NULL;
+END $$
+"""
+INSERTED = "SELECT created_at, privacy, 1 FROM new_snaps"
+DELETED = "SELECT created_at, privacy, -1 FROM old_snaps"
+UPDATED = "VALUES (NEW.created_at, NEW.privacy, 1), (OLD.created_at, OLD.privacy, -1)"
+RESET_COUNTS = """
+CREATE OR REPLACE FUNCTION reset_snap_counts() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    TRUNCATE snap_counts, snap_count_deltas;
+    RETURN NULL;
+END $$
+"""
+COUNT_TRIGGER = """
+CREATE TRIGGER {function} AFTER {event} ON snaps
+{level} EXECUTE FUNCTION {function}()
+"""
+RESET_TRIGGER = """
+CREATE TRIGGER reset_snap_counts AFTER TRUNCATE ON snaps
+FOR EACH STATEMENT EXECUTE FUNCTION reset_snap_counts()
+"""
+
+# (function, event, level, changes)
+COUNTED_EVENTS = (
+    (
+        "count_inserted_snaps",
+        "INSERT",
+        "REFERENCING NEW TABLE AS new_snaps FOR EACH STATEMENT",
+        INSERTED,
+    ),
+    (
+        "count_deleted_snaps",
+        "DELETE",
+        "REFERENCING OLD TABLE AS old_snaps FOR EACH STATEMENT",
+        DELETED,
+    ),
+    (
+        "count_updated_snap",
+        "UPDATE OF created_at, privacy",
+        "FOR EACH ROW WHEN ("
+        "OLD.created_at IS DISTINCT FROM NEW.created_at "
+        "OR OLD.privacy IS DISTINCT FROM NEW.privacy)",
+        UPDATED,
+    ),
+)
+CREATE_TRIGGERS = (
+    *(
+        APPEND_CHANGES.format(function=function, changes=changes)
+        for function, _, _, changes in COUNTED_EVENTS
+    ),
+    *(
+        COUNT_TRIGGER.format(function=function, event=event_name, level=level)
+        for function, event_name, level, _ in COUNTED_EVENTS
+    ),
+    RESET_COUNTS,
+    RESET_TRIGGER,
+)
+DROP_TRIGGERS = (
+    "DROP TRIGGER reset_snap_counts ON snaps",
+    "DROP FUNCTION reset_snap_counts()",
+    *(
+        statement
+        for function, _, _, _ in reversed(COUNTED_EVENTS)
+        for statement in (
+            f"DROP TRIGGER {function} ON snaps",
+            f"DROP FUNCTION {function}()",
+        )
+    ),
+)
+
+
+class SnapCountModel(Base):
+    """Number of snaps created in a minute, hour or day, by privacy."""
+
+    __tablename__ = "snap_counts"
+
+    granularity: Mapped[str] = mapped_column(String(10), primary_key=True)
+    bucket: Mapped[datetime.datetime] = mapped_column(DateTime, primary_key=True)
+    privacy: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class SnapCountDeltaModel(Base):
+    """Change of the count of snaps, not moved into the rollups yet."""
+
+    __tablename__ = "snap_count_deltas"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime)
+    privacy: Mapped[int] = mapped_column(Integer)
+    delta: Mapped[int] = mapped_column(Integer)
+
+
+# Created with the tables, so after the snaps table.
+for statement in CREATE_TRIGGERS:
+    event.listen(meta, "after_create", DDL(statement))
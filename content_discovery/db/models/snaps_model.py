@@ -1,18 +1,33 @@
 import datetime
 import uuid
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import Computed, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql.sqltypes import DateTime, Integer, String, Uuid
 
 from content_discovery.constants import Privacy, Visibility
 from content_discovery.db.base import Base
 
+# Text search configuration of the content, without stemming or stop words
+# since snaps are written in many languages.
+SEARCH_CONFIG = "simple"
+
 
 class SnapsModel(Base):
     """Model representing a snap."""
 
     __tablename__ = "snaps"
+    __table_args__ = (
+        # timelines of a user, newest first
+        Index("ix_snaps_user_id_created_at", "user_id", "created_at", "id"),
+        # replies of a snap
+        Index("ix_snaps_parent_id_created_at", "parent_id", "created_at"),
+        # global listings and time period counts
+        Index("ix_snaps_created_at", "created_at", "id"),
+        # content search, substrings use ix_snaps_content_trgm (TRIGRAM_INDEXES)
+        Index("ix_snaps_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     length = 280
 
@@ -38,5 +53,10 @@ class SnapsModel(Base):
 
     visibility: Mapped[int] = mapped_column(Integer, default=Visibility.PUBLIC.value)
     privacy: Mapped[int] = mapped_column(Integer, default=Privacy.PUBLIC.value)
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}', content)", persisted=True),
+        deferred=True,
+    )
 
     snap = relationship("SnapsModel", foreign_keys=[parent_id])
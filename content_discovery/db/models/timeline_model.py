@@ -0,0 +1,55 @@
+import datetime
+import uuid
+from typing import Any, NamedTuple
+
+from sqlalchemy import ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql.sqltypes import DateTime, String, Uuid
+
+from content_discovery.db.base import Base
+
+ORIGINAL = ""  # sharer_id of entries for the snap itself rather than a share
+
+
+class TimelineEntry(NamedTuple):
+    """Entry of a home timeline, either stored or merged when it is read."""
+
+    snap: Any  # SnapsModel
+    sharer_id: str
+    created_at: datetime.datetime
+
+
+class TimelineKey(NamedTuple):
+    """Position of an entry of a home timeline, without its snap."""
+
+    snap_id: uuid.UUID
+    sharer_id: str
+    created_at: datetime.datetime
+
+
+class TimelineModel(Base):
+    """Entry of the materialized home timeline of a user."""
+
+    __tablename__ = "timelines"
+    __table_args__ = (
+        Index("ix_timelines_owner_id_created_at", "owner_id", "created_at", "snap_id"),
+        Index("ix_timelines_snap_id", "snap_id"),
+    )
+
+    length = 200
+
+    owner_id: Mapped[str] = mapped_column(String(length), primary_key=True)
+    snap_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid,
+        ForeignKey("snaps.id"),
+        primary_key=True,
+    )
+    sharer_id: Mapped[str] = mapped_column(
+        String(length),
+        primary_key=True,
+        default=ORIGINAL,
+    )
+    # when the snap was written, or shared for share entries
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime)
+
+    snap = relationship("SnapsModel", foreign_keys=[snap_id])
@@ -0,0 +1,24 @@
+import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.sqltypes import Boolean, DateTime, String
+
+from content_discovery.db.base import Base
+
+
+class TimelineStateModel(Base):
+    """Users whose home timeline is materialized and kept up to date."""
+
+    __tablename__ = "timeline_states"
+
+    length = 200
+
+    owner_id: Mapped[str] = mapped_column(String(length), primary_key=True)
+    built_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime,
+        default=datetime.datetime.utcnow,
+    )
+    # whether older entries were left out when it was built
+    truncated: Mapped[bool] = mapped_column(Boolean, default=False)
+    # whether it is being built, since 'built_at', and not read yet
+    building: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -0,0 +1,141 @@
+import base64
+import datetime
+import uuid
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.engine.row import RowMapping
+
+from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.db.models.timeline_model import TimelineEntry
+
+SEPARATOR = "|"
+
+
+class Cursor(NamedTuple):
+    """Sort key of the last item of a page: (timestamp, snap id)."""
+
+    created_at: datetime.datetime
+    snap_id: uuid.UUID
+
+    def encode(self) -> str:
+        """Opaque token handed to clients."""
+        return _encode(self.created_at.isoformat(), str(self.snap_id))
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        """Parse a token created by 'encode', ValueError if malformed."""
+        created_at, snap_id = _decode(token)
+        return cls(datetime.datetime.fromisoformat(created_at), uuid.UUID(snap_id))
+
+
+class SearchCursor(NamedTuple):
+    """Sort key of the last result of a search page: (score, snap id)."""
+
+    score: float
+    snap_id: uuid.UUID
+
+    def encode(self) -> str:
+        """Opaque token handed to clients."""
+        return _encode(repr(self.score), str(self.snap_id))
+
+    @classmethod
+    def decode(cls, token: str) -> "SearchCursor":
+        """Parse a token created by 'encode', ValueError if malformed."""
+        score, snap_id = _decode(token)
+        return cls(float(score), uuid.UUID(snap_id))
+
+
+def get_cursor(cursor: Optional[str] = None) -> Optional[Cursor]:
+    """
+    Dependency parsing the optional 'cursor' query parameter.
+
+    When a cursor is given it takes precedence over 'offset'.
+    """
+    if cursor is None:
+        return None
+    try:
+        return Cursor.decode(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def get_search_cursor(cursor: Optional[str] = None) -> Optional[SearchCursor]:
+    """Dependency parsing the optional 'cursor' query parameter of searches."""
+    if cursor is None:
+        return None
+    try:
+        return SearchCursor.decode(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(  # noqa: WPS211
+    query: Any,
+    sort_key: Any,
+    limit: int,
+    offset: int,
+    cursor: Optional[Tuple[Any, uuid.UUID]],
+    id_column: Any = SnapsModel.id,
+) -> Any:
+    """
+    Sort a query newest first and select one page of it.
+
+    With a cursor the page starts right after it (keyset pagination),
+    otherwise 'offset' rows are skipped.
+    """
+    query = query.order_by(sort_key.desc(), id_column.desc()).limit(limit)
+    if cursor is None:
+        return query.offset(offset)
+    return query.where(tuple_(sort_key, id_column) < tuple_(*cursor))
+
+
+def next_cursor(
+    keys: Sequence[Union[Cursor, SearchCursor]],
+    limit: int,
+) -> Optional[str]:
+    """Cursor of the following page, None if this page was the last one."""
+    if not keys or len(keys) < limit:
+        return None
+    return keys[-1].encode()
+
+
+def snaps_cursor(snaps: List[SnapsModel], limit: int) -> Optional[str]:
+    """Cursor of the page following a page of snaps sorted by creation."""
+    return next_cursor([Cursor(snap.created_at, snap.id) for snap in snaps], limit)
+
+
+def snaps_and_shares_cursor(rows: List[RowMapping], limit: int) -> Optional[str]:
+    """Cursor of the page following a page of snaps and shares."""
+    keys = []
+    for row in rows:
+        snap, share = row["SnapsModel"], row["ShareModel"]
+        created_at = share.created_at if share else snap.created_at
+        keys.append(Cursor(created_at, snap.id))
+    return next_cursor(keys, limit)
+
+
+def timeline_cursor(entries: List[TimelineEntry], limit: int) -> Optional[str]:
+    """Cursor of the page following a page of a home timeline."""
+    keys = [Cursor(entry.created_at, entry.snap.id) for entry in entries]
+    return next_cursor(keys, limit)
+
+
+def search_cursor(
+    results: List[Tuple[SnapsModel, float]],
+    limit: int,
+) -> Optional[str]:
+    """Cursor of the page following a page of (snap, score) search results."""
+    keys = [SearchCursor(score, snap.id) for snap, score in results]
+    return next_cursor(keys, limit)
+
+
+def _encode(*parts: str) -> str:
+    raw = SEPARATOR.join(parts)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode(token: str) -> List[str]:
+    raw = base64.urlsafe_b64decode(token.encode()).decode()
+    return raw.split(SEPARATOR)
@@ -1,14 +1,16 @@
 import uuid
 from typing import Any, List
 
-import httpx
-
 from content_discovery.db.dao.snaps_dao import SnapDAO
 from content_discovery.db.dao.trending_topic_dao import TrendingTopicDAO
 from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.services.identity_socializer.client import identity_socializer
 from content_discovery.settings import settings
 from content_discovery.web.api.utils import complete_snap
 
+# Trending snap notifications fan out to many users, so they take longer.
+TRENDING_SNAP_TIMEOUT = 10
+
 
 class Notifications:
     """Send notifications."""
@@ -46,7 +48,10 @@ class Notifications:
         print(f"params mention: {json_params}")
 
         try:
-            httpx.post(_url_post_mention_notification(), json=json_params)
+            await identity_socializer.post(
+                _url_post_mention_notification(),
+                json=json_params,
+            )
         except Exception as exc:
             print(str(exc))
 
@@ -65,10 +70,11 @@ class Notifications:
         }
         print(f"params like: {json_params}")
 
-        timeout = httpx.Timeout(5.0, read=5.0)
-
         try:
-            httpx.post(_url_post_like_notification(), json=json_params, timeout=timeout)
+            await identity_socializer.post(
+                _url_post_like_notification(),
+                json=json_params,
+            )
         except Exception as exc:
             print(str(exc))
 
@@ -87,13 +93,10 @@ class Notifications:
         }
         print(f"params reply: {json_params}")
 
-        timeout = httpx.Timeout(5.0, read=5.0)
-
         try:
-            httpx.post(
+            await identity_socializer.post(
                 _url_post_reply_notification(),
                 json=json_params,
-                timeout=timeout,
             )
         except Exception as exc:
             print(str(exc))
@@ -108,12 +111,9 @@ class Notifications:
         }
         print(f"params trending: {params}")
 
-        timeout = httpx.Timeout(5.0, read=5.0)
-
-        httpx.post(
+        await identity_socializer.post(
             _url_post_trending_notification(),
             json=params,
-            timeout=timeout,
         )
 
     async def send_notification_of_snap_in_trending(
@@ -128,12 +128,10 @@ class Notifications:
             "snap": await _format_snap(snap.id, snap_dao),
         }
         print(params)
-        timeout = httpx.Timeout(10.0, read=10.0)
-
-        httpx.post(
+        await identity_socializer.post(
             _url_post_trending_snap_notification(),
             json=params,
-            timeout=timeout,
+            timeout=TRENDING_SNAP_TIMEOUT,
         )
 
 
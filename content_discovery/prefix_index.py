@@ -0,0 +1,104 @@
+import bisect
+import heapq
+from typing import Dict, List, Mapping, Tuple
+
+
+class PrefixIndex:
+    """
+    In-process index of weighted strings, completed by prefix.
+
+    Strings are kept sorted, so the ones starting with a prefix are a
+    contiguous range found with bisect. Prefixes of more than 'scan_limit'
+    strings keep their best completions, which are updated as weights
+    grow, so that no lookup ranks more than 'scan_limit' strings.
+    Completions are sorted by weight, then alphabetically.
+    """
+
+    def __init__(self, max_results: int, scan_limit: int = 256) -> None:
+        self.max_results = max_results
+        self.scan_limit = max(scan_limit, max_results)
+        self._keys: List[str] = []
+        self._weights: Dict[str, float] = {}
+        self._best: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def load(self, weights: Mapping[str, float]) -> None:
+        """
+        Replace every string and weight.
+
+        :param weights: weight of each string.
+        """
+        self._weights = dict(weights)
+        self._keys = sorted(self._weights)
+        self._best = {}
+
+    def add(self, key: str, weight: float = 1) -> None:
+        """
+        Add to the weight of a string, inserting it if it is new.
+
+        :param key: string to add.
+        :param weight: weight added to it, must not be negative.
+        """
+        if key not in self._weights:
+            bisect.insort(self._keys, key)
+            self._weights[key] = 0
+        self._weights[key] += weight
+        for end in range(len(key) + 1):
+            best = self._best.get(key[:end])
+            if best is not None:
+                self._promote(best, key)
+
+    def complete(self, prefix: str, limit: int) -> List[str]:
+        """
+        Best strings starting with a prefix.
+
+        :param prefix: start of the strings.
+        :param limit: number of strings returned, at most 'max_results'.
+        :returns: strings by decreasing weight.
+        """
+        limit = min(limit, self.max_results)
+        best = self._best.get(prefix)
+        if best is not None:
+            return best[:limit]
+
+        start = bisect.bisect_left(self._keys, prefix)
+        end = len(self._keys)
+        if prefix:
+            end = bisect.bisect_left(self._keys, _following(prefix), lo=start)
+        candidates = self._keys[start:end]
+        if len(candidates) <= self.scan_limit:
+            return heapq.nsmallest(limit, candidates, key=self._order)
+
+        best = heapq.nsmallest(self.max_results, candidates, key=self._order)
+        self._best[prefix] = best
+        return best[:limit]
+
+    def weight(self, key: str) -> float:
+        """
+        Weight of a string.
+
+        :param key: string to look up.
+        :returns: its weight, 0 if it is not in the index.
+        """
+        return self._weights.get(key, 0)
+
+    def _order(self, key: str) -> Tuple[float, str]:
+        return -self._weights[key], key
+
+    def _promote(self, best: List[str], key: str) -> None:
+        """Update the best completions of a prefix after 'key' grew."""
+        if key not in best:
+            if self._order(key) >= self._order(best[-1]):
+                return
+            best.append(key)
+        best.sort(key=self._order)
+        if len(best) > self.max_results:
+            best.pop()
+
+
+def _following(prefix: str) -> str:
+    """First string after every string starting with 'prefix'."""
+    last = ord(prefix[-1])
+    return prefix[:-1] + chr(last + 1)
@@ -0,0 +1 @@
+"""Cross-process invalidation of in-process caches."""
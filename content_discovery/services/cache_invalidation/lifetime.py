@@ -0,0 +1,29 @@
+from fastapi import FastAPI
+from loguru import logger
+
+from content_discovery.services.cache_invalidation.listener import InvalidationListener
+
+
+async def init_cache_invalidation(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Starts listening to cache invalidations from other processes.
+
+    Caches still expire by TTL if the listener cannot connect.
+
+    :param app: current fastapi application.
+    """
+    listener = InvalidationListener()
+    try:
+        await listener.start()
+    except Exception as exc:
+        logger.warning(f"Cache invalidation listener not started: {exc}")
+    app.state.cache_invalidation_listener = listener
+
+
+async def shutdown_cache_invalidation(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops the cache invalidation listener.
+
+    :param app: current fastapi application.
+    """
+    await app.state.cache_invalidation_listener.stop()
@@ -0,0 +1,75 @@
+from typing import Any, Callable, Dict, Optional
+
+import asyncpg
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from content_discovery.settings import settings
+
+CHANNEL = "content_discovery_invalidation"
+SEPARATOR = ":"
+
+_handlers: Dict[str, Callable[[str], None]] = {}
+
+
+def register_invalidation_handler(kind: str, handler: Callable[[str], None]) -> None:
+    """
+    Register the function that invalidates a kind of cached data.
+
+    :param kind: name of the cached data, e.g. "follow_graph".
+    :param handler: function receiving the key to invalidate.
+    """
+    _handlers[kind] = handler
+
+
+async def publish_invalidation(session: AsyncSession, kind: str, key: str) -> None:
+    """
+    Invalidate a key in this process and broadcast it to the others.
+
+    The broadcast is a Postgres NOTIFY, so it is delivered
+    when the session's transaction commits.
+
+    :param session: current database session.
+    :param kind: name of the cached data.
+    :param key: key to invalidate.
+    """
+    payload = f"{kind}{SEPARATOR}{key}"
+    dispatch_invalidation(payload)
+    await session.execute(select(func.pg_notify(CHANNEL, payload)))
+
+
+def dispatch_invalidation(payload: str) -> None:
+    """
+    Run the handler registered for an invalidation message.
+
+    :param payload: message in the form "kind:key".
+    """
+    kind, _, key = payload.partition(SEPARATOR)
+    handler = _handlers.get(kind)
+    if handler is not None:
+        handler(key)
+
+
+class InvalidationListener:
+    """Listens to invalidations broadcast by other processes."""
+
+    def __init__(self) -> None:
+        self._connection: Optional[asyncpg.Connection] = None
+
+    async def start(self) -> None:
+        """Open a dedicated connection and LISTEN on the channel."""
+        dsn = str(settings.db_url.with_scheme("postgresql"))
+        self._connection = await asyncpg.connect(dsn)
+        await self._connection.add_listener(CHANNEL, self._on_notification)
+
+    async def stop(self) -> None:
+        """Stop listening and close the connection."""
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    def _on_notification(self, *args: Any) -> None:
+        payload = args[-1]
+        logger.debug(f"Cache invalidation received: {payload}")
+        dispatch_invalidation(payload)
@@ -0,0 +1 @@
+"""Hashtag autocomplete, from an in-process prefix index."""
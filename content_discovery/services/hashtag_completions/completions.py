@@ -0,0 +1,59 @@
+"""
+Hashtag autocomplete.
+
+Every worker keeps the hashtags used within 'hashtag_autocomplete_window'
+in a prefix index weighted by their uses. A scheduled job rebuilds it from
+the database every 'hashtag_autocomplete_refresh' seconds, aside from the
+one completions are served from, and swaps it in once loaded. The hashtags
+of the snaps posted through the worker are added to it as they are recorded.
+"""
+import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from content_discovery.db.dao.hashtag_dao import HashtagDAO, normalize_hashtag
+from content_discovery.prefix_index import PrefixIndex
+from content_discovery.settings import settings
+
+
+class HashtagCompletions:
+    """Prefix index of the recently used hashtags, refreshed periodically."""
+
+    def __init__(self) -> None:
+        self.index = PrefixIndex(settings.hashtag_autocomplete_max_results)
+        # hashtags recorded while a refresh loads, added to the new index
+        self._recorded: Optional[List[str]] = None
+
+    def complete(self, prefix: str, limit: int) -> List[str]:
+        """Most used hashtags starting with 'prefix'."""
+        return self.index.complete(normalize_hashtag(prefix), limit)
+
+    def record(self, hashtags: Iterable[str]) -> None:
+        """Count a use of each of the normalized hashtags."""
+        for hashtag in hashtags:
+            self.index.add(hashtag)
+            if self._recorded is not None:
+                self._recorded.append(hashtag)
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """
+        Load the recent hashtags into a new index and swap it in.
+
+        :param session: session to read them with.
+        """
+        window = datetime.timedelta(seconds=settings.hashtag_autocomplete_window)
+        since = datetime.datetime.utcnow() - window
+        self._recorded = []
+        try:  # noqa: WPS501
+            rows = await HashtagDAO(session).get_top_hashtags(since, 1)
+            index = PrefixIndex(settings.hashtag_autocomplete_max_results)
+            index.load({row["name"]: row["count"] for row in rows})
+            for hashtag in self._recorded:
+                index.add(hashtag)
+            self.index = index
+        finally:
+            self._recorded = None
+
+
+hashtag_completions = HashtagCompletions()
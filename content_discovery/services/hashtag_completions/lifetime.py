@@ -0,0 +1,41 @@
+import asyncio
+
+from fastapi import FastAPI
+
+from content_discovery.services.hashtag_completions.completions import (
+    hashtag_completions,
+)
+from content_discovery.services.scheduler.scheduler import Scheduler
+from content_discovery.settings import settings
+
+
+async def init_hashtag_completions(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Starts refreshing the hashtag completions, loading them first.
+
+    Every process serves completions from its own index, so it is not
+    leader elected.
+
+    :param app: current fastapi application.
+    """
+    scheduler = Scheduler(app.state.db_session_factory)
+    scheduler.add(
+        "hashtag_completions",
+        hashtag_completions.refresh,
+        settings.hashtag_autocomplete_refresh,
+    )
+    app.state.hashtag_completions_scheduler = scheduler
+    app.state.hashtag_completions_task = asyncio.create_task(scheduler.run())
+
+
+async def shutdown_hashtag_completions(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops refreshing the hashtag completions.
+
+    :param app: current fastapi application.
+    """
+    scheduler = getattr(app.state, "hashtag_completions_scheduler", None)
+    if scheduler is None:
+        return
+    await scheduler.stop(settings.scheduler_drain_timeout)
+    await app.state.hashtag_completions_task
@@ -0,0 +1 @@
+"""Identity-socializer service."""
@@ -0,0 +1,104 @@
+from typing import Any, Optional
+
+import httpx
+
+from content_discovery.settings import settings
+
+
+class IdentitySocializerClient:
+    """
+    Connection-pooled async client for the identity-socializer service.
+
+    A single instance lives for the whole application lifetime so that
+    keep-alive connections are reused between requests.
+    """
+
+    def __init__(self) -> None:
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Underlying httpx client.
+
+        It is created lazily if the application startup
+        has not created it yet.
+
+        :return: async httpx client.
+        """
+        if self._client is None:
+            self._client = _build_client()
+        return self._client
+
+    async def startup(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        """
+        Open the connection pool.
+
+        :param transport: replaces the network transport, e.g. with a local stub.
+        """
+        if self._client is None:
+            self._client = _build_client(transport)
+
+    async def shutdown(self) -> None:
+        """Close the connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(
+        self,
+        url: str,
+        timeout: Optional[float] = None,
+    ) -> httpx.Response:
+        """
+        Send a GET request through the pool.
+
+        :param url: url to request.
+        :param timeout: overrides the default timeout for this call.
+        :return: response.
+        """
+        return await self.client.get(url, timeout=_timeout(timeout))
+
+    async def post(
+        self,
+        url: str,
+        json: Any,
+        timeout: Optional[float] = None,
+    ) -> httpx.Response:
+        """
+        Send a POST request through the pool.
+
+        :param url: url to request.
+        :param json: body of the request.
+        :param timeout: overrides the default timeout for this call.
+        :return: response.
+        """
+        return await self.client.post(url, json=json, timeout=_timeout(timeout))
+
+
+def _timeout(seconds: Optional[float]) -> httpx.Timeout:
+    return httpx.Timeout(
+        seconds or settings.identity_socializer_timeout,
+        connect=settings.identity_socializer_connect_timeout,
+    )
+
+
+def _build_client(
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.identity_socializer_max_connections,
+        max_keepalive_connections=settings.identity_socializer_max_keepalive,
+        keepalive_expiry=settings.identity_socializer_keepalive_expiry,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=_timeout(None),
+        transport=transport,
+    )
+
+
+identity_socializer = IdentitySocializerClient()
@@ -0,0 +1,22 @@
+from fastapi import FastAPI
+
+from content_discovery.services.identity_socializer.client import identity_socializer
+
+
+async def init_identity_socializer(app: FastAPI) -> None:
+    """
+    Opens the identity-socializer connection pool.
+
+    :param app: current fastapi application.
+    """
+    await identity_socializer.startup()
+    app.state.identity_socializer = identity_socializer
+
+
+async def shutdown_identity_socializer(app: FastAPI) -> None:
+    """
+    Closes the identity-socializer connection pool.
+
+    :param app: current fastapi application.
+    """
+    await app.state.identity_socializer.shutdown()
@@ -0,0 +1 @@
+"""Counters of the interactions of snaps, optionally written behind."""
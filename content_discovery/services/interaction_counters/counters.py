@@ -0,0 +1,169 @@
+import uuid
+from typing import Any, Dict, Optional, Tuple, Type
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from content_discovery.constants import CounterMode
+from content_discovery.db.dao.interaction_dao import (
+    COUNTER_OF,
+    InteractionDAO,
+    InteractionT,
+)
+from content_discovery.db.dao.snaps_dao import COUNTERS, Counts, SnapDAO
+from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.settings import settings
+
+Deltas = Dict[uuid.UUID, Counts]
+
+
+def _sum(first: Counts, second: Counts) -> Counts:
+    likes, shares, favs = first
+    more_likes, more_shares, more_favs = second
+    return likes + more_likes, shares + more_shares, favs + more_favs
+
+
+class InteractionCounters:
+    """
+    Changes to the likes, shares and favs of snaps.
+
+    In write behind mode the changes are summed in memory, so that many
+    interactions with a popular snap do not all wait for the lock of its
+    row, and flush writes them in one statement. Snaps loaded by this
+    process include the changes it has not written yet, other processes
+    see them once they are flushed.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Deltas = {}
+        self._flushing: Deltas = {}
+
+    async def add(
+        self,
+        interaction_dao: InteractionDAO,
+        model: Type[InteractionT],
+        user_id: str,
+        snap_id: str,
+    ) -> Optional[Tuple[InteractionT, str]]:
+        """
+        Add an interaction with a snap and count it.
+
+        :param interaction_dao: DAO writing the interaction.
+        :param model: likes, shares or favs.
+        :param user_id: id of the user interacting.
+        :param snap_id: id of the snap.
+        :returns: the new interaction and the author of the snap,
+            None if it existed or the snap does not.
+        """
+        written_behind = self._written_behind()
+        added = await interaction_dao.add(model, user_id, snap_id, not written_behind)
+        if added and written_behind:
+            self._count(added[0].snap_id, COUNTER_OF[model], 1)
+        return added
+
+    async def remove(
+        self,
+        interaction_dao: InteractionDAO,
+        model: Type[InteractionT],
+        user_id: str,
+        snap_id: str,
+    ) -> Optional[Tuple[InteractionT, str]]:
+        """
+        Remove an interaction with a snap and discount it.
+
+        :param interaction_dao: DAO writing the interaction.
+        :param model: likes, shares or favs.
+        :param user_id: id of the user interacting.
+        :param snap_id: id of the snap.
+        :returns: the removed interaction and the author of the snap,
+            None if there was none.
+        """
+        written_behind = self._written_behind()
+        removed = await interaction_dao.remove(
+            model,
+            user_id,
+            snap_id,
+            not written_behind,
+        )
+        if removed and written_behind:
+            self._count(removed[0].snap_id, COUNTER_OF[model], -1)
+        return removed
+
+    async def count_many(self, snap_dao: SnapDAO, deltas: Deltas) -> None:
+        """
+        Change the counters of many snaps, with one update per snap.
+
+        :param snap_dao: DAO updating the snaps in immediate mode.
+        :param deltas: likes, shares and favs added to each snap.
+        """
+        if self._written_behind():
+            self._queue(deltas)
+        else:
+            await snap_dao.add_to_counters(deltas)
+
+    def pending(self, snap_id: uuid.UUID) -> Optional[Counts]:
+        """
+        Changes to the counters of a snap that are not written yet.
+
+        :param snap_id: id of the snap.
+        :returns: likes, shares and favs to add, None if there are none.
+        """
+        pending = self._pending.get(snap_id)
+        flushing = self._flushing.get(snap_id)
+        if pending is None or flushing is None:
+            return pending or flushing
+        return _sum(pending, flushing)
+
+    async def flush(self, session: AsyncSession) -> None:
+        """
+        Write the pending changes and commit them.
+
+        Changes that could not be written, because of an error or of
+        being cancelled, are kept for the next flush.
+
+        :param session: session to write them with.
+        """
+        if not self._pending:
+            return
+        self._flushing = self._pending
+        self._pending = {}
+        written = False
+        try:  # noqa: WPS501
+            await SnapDAO(session).add_to_counters(self._flushing)
+            await session.commit()
+            written = True
+        finally:
+            if not written:
+                self._queue(self._flushing)
+            self._flushing = {}
+
+    def _written_behind(self) -> bool:
+        return settings.interaction_counters == CounterMode.write_behind
+
+    def _count(self, snap_id: uuid.UUID, counter: str, delta: int) -> None:
+        """Add a change to the pending ones of a snap."""
+        change = [0, 0, 0]
+        change[COUNTERS.index(counter)] = delta
+        likes, shares, favs = change
+        self._queue({snap_id: (likes, shares, favs)})
+
+    def _queue(self, deltas: Deltas) -> None:
+        """Add changes to the pending ones."""
+        for snap_id, delta in deltas.items():
+            pending = self._pending.get(snap_id, (0, 0, 0))
+            self._pending[snap_id] = _sum(pending, delta)
+
+
+interaction_counters = InteractionCounters()
+
+
+@event.listens_for(SnapsModel, "load")
+def _add_pending(snap: SnapsModel, _context: Any) -> None:
+    """Counters of a loaded snap include the changes not written yet."""
+    pending = interaction_counters.pending(snap.id)
+    if pending is None:
+        return
+    for name, delta in zip(COUNTERS, pending):
+        # set as loaded, so that the sum is not written back on flush
+        set_committed_value(snap, name, getattr(snap, name) + delta)
@@ -0,0 +1,45 @@
+import asyncio
+
+from fastapi import FastAPI
+
+from content_discovery.constants import CounterMode
+from content_discovery.services.interaction_counters.counters import (
+    interaction_counters,
+)
+from content_discovery.services.scheduler.scheduler import Scheduler
+from content_discovery.settings import settings
+
+
+async def init_interaction_counters(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Starts flushing the interaction counters in write behind mode.
+
+    Every process flushes its own changes, so it is not leader elected.
+
+    :param app: current fastapi application.
+    """
+    if settings.interaction_counters != CounterMode.write_behind:
+        return
+    scheduler = Scheduler(app.state.db_session_factory)
+    scheduler.add(
+        "interaction_counters",
+        interaction_counters.flush,
+        settings.interaction_flush_interval,
+    )
+    app.state.interaction_counters_scheduler = scheduler
+    app.state.interaction_counters_task = asyncio.create_task(scheduler.run())
+
+
+async def shutdown_interaction_counters(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops flushing the interaction counters and writes the pending ones.
+
+    :param app: current fastapi application.
+    """
+    scheduler = getattr(app.state, "interaction_counters_scheduler", None)
+    if scheduler is None:
+        return
+    await scheduler.stop(settings.scheduler_drain_timeout)
+    await app.state.interaction_counters_task
+    async with app.state.db_session_factory() as session:
+        await interaction_counters.flush(session)
@@ -0,0 +1 @@
+"""Election of the process that runs the cluster's background jobs."""
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import socket
+from typing import Any, Callable, Coroutine, Iterable, List, Optional, Sequence
+
+import asyncpg
+from loguru import logger
+from prometheus_client import Gauge
+
+from content_discovery.settings import settings
+
+Job = Callable[[], Coroutine[Any, Any, None]]
+
+INSTANCE = f"{socket.gethostname()}:{os.getpid()}"
+CONNECTION_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresError,
+    asyncpg.InterfaceError,
+)
+TRY_LOCK = "SELECT pg_try_advisory_lock(hashtextextended($1, 0))"
+UNLOCK = "SELECT pg_advisory_unlock(hashtextextended($1, 0))"
+
+LEADER = Gauge(
+    "content_discovery_leader",
+    "1 in the process that runs the jobs of an election, 0 in the others.",
+    ["election", "instance"],
+    multiprocess_mode="liveall",
+)
+
+
+class LeaderElection:
+    """
+    Runs jobs in a single process of the cluster.
+
+    Processes compete for a Postgres advisory lock, named after the
+    election, on a dedicated connection. The one holding it leads and
+    runs the jobs, the others try again every 'retry' seconds.
+    The lock is released when the connection of the leader closes,
+    so if it dies another process takes over. The leader checks its
+    connection every 'retry' seconds and stops the jobs when it is lost,
+    and steps down when one of the jobs ends.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        jobs: Sequence[Job],
+        retry: float,
+    ) -> None:
+        self.name = name
+        self.jobs = jobs
+        self.retry = retry
+        self.leading = False
+        self._connection: Optional[asyncpg.Connection] = None
+        LEADER.labels(name, INSTANCE).set(0)
+
+    async def run(self) -> None:
+        """Take part in the election until cancelled."""
+        while True:  # noqa: WPS457
+            try:
+                await self._campaign()
+            except CONNECTION_ERRORS as exc:
+                logger.warning(f"Leader election {self.name} failed: {exc}")
+                self.stop()
+            await asyncio.sleep(self.retry)
+
+    def stop(self) -> None:
+        """Close the connection, which releases the lock if it is held."""
+        if self._connection is not None:
+            self._connection.terminate()
+            self._connection = None
+
+    async def _campaign(self) -> None:
+        """Lead and run the jobs if the lock is free."""
+        if self._connection is None or self._connection.is_closed():
+            dsn = str(settings.db_url.with_scheme("postgresql"))
+            self._connection = await asyncpg.connect(dsn)
+        acquired = await self._connection.fetchval(TRY_LOCK, self.name)
+        if not acquired:
+            return
+
+        logger.info(f"Leading {self.name} from {INSTANCE}")
+        self._set_leading(True)
+        tasks = [asyncio.create_task(job()) for job in self.jobs]
+        try:  # noqa: WPS501
+            await self._watch(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._set_leading(False)
+        await self._connection.execute(UNLOCK, self.name)
+        logger.info(f"Stopped leading {self.name} from {INSTANCE}")
+
+    async def _watch(self, tasks: List["asyncio.Task[None]"]) -> None:
+        """Wait until a job ends or the connection holding the lock is lost."""
+        while True:  # noqa: WPS457
+            done, _ = await asyncio.wait(tasks, timeout=self.retry)
+            if done:
+                self._log_failures(done)
+                return
+            if self._connection is None:
+                return
+            await self._connection.fetchval("SELECT 1", timeout=self.retry)
+
+    def _log_failures(self, tasks: Iterable["asyncio.Task[None]"]) -> None:
+        for task in tasks:
+            if not task.cancelled() and task.exception() is not None:
+                logger.error(f"Job of {self.name} failed: {task.exception()}")
+
+    def _set_leading(self, leading: bool) -> None:
+        self.leading = leading
+        LEADER.labels(self.name, INSTANCE).set(int(leading))
@@ -0,0 +1,37 @@
+import asyncio
+from typing import Sequence
+
+from fastapi import FastAPI
+
+from content_discovery.services.leader_election.election import Job, LeaderElection
+from content_discovery.settings import settings
+
+
+def start_leader_election(
+    app: FastAPI,
+    name: str,
+    jobs: Sequence[Job],
+) -> None:  # pragma: no cover
+    """
+    Runs jobs in only one process of the cluster.
+
+    :param app: current fastapi application.
+    :param name: name of the election, shared by every process.
+    :param jobs: coroutine functions run by the leader.
+    """
+    election = LeaderElection(name, jobs, settings.leader_election_retry)
+    app.state.leader_election = election
+    app.state.leader_election_task = asyncio.create_task(election.run())
+
+
+async def shutdown_leader_election(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops running the jobs and leaves the election.
+
+    :param app: current fastapi application.
+    """
+    task = getattr(app.state, "leader_election_task", None)
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        app.state.leader_election.stop()
@@ -0,0 +1 @@
+"""Scheduler of the periodic background jobs."""
@@ -0,0 +1,14 @@
+from fastapi import FastAPI
+
+from content_discovery.settings import settings
+
+
+async def shutdown_scheduler(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops scheduling jobs, letting the running ones finish.
+
+    :param app: current fastapi application.
+    """
+    scheduler = getattr(app.state, "scheduler", None)
+    if scheduler is not None:
+        await scheduler.stop(settings.scheduler_drain_timeout)
@@ -0,0 +1,143 @@
+import asyncio
+import random
+import time
+from typing import Any, Callable, Coroutine, List
+
+from loguru import logger
+from prometheus_client import Counter, Histogram
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from content_discovery.settings import settings
+
+JobFunction = Callable[[AsyncSession], Coroutine[Any, Any, None]]
+
+JOB_RUNS = Counter(
+    "content_discovery_job_runs",
+    "Runs of scheduled jobs by outcome.",
+    ["job", "outcome"],
+)
+JOB_DURATION = Histogram(
+    "content_discovery_job_duration_seconds",
+    "Duration of the runs of scheduled jobs.",
+    ["job"],
+)
+
+
+class ScheduledJob:
+    """Job run periodically, less often while it keeps failing."""
+
+    def __init__(
+        self,
+        name: str,
+        function: JobFunction,
+        interval: float,
+        jitter: float,
+        max_backoff: float,
+    ) -> None:
+        self.name = name
+        self.function = function
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max(max_backoff, interval)
+
+    def delay(self, failures: int) -> float:
+        """
+        Time to wait before the next run.
+
+        :param failures: runs that failed in a row.
+        :returns: the interval, doubled after each failure up to
+            'max_backoff', moved randomly by up to 'jitter' times itself.
+        """
+        delay = min(self.interval * 2**failures, self.max_backoff)
+        spread = random.uniform(-self.jitter, self.jitter)  # noqa: S311
+        return delay * (1 + spread)
+
+
+class Scheduler:
+    """
+    Runs periodic jobs, each run with a new session committed after it.
+
+    Every job waits for its previous run to end before the next one,
+    so runs of a job never overlap. Errors are logged and retried after
+    a backoff, and stopping lets the running jobs finish first.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self.session_factory = session_factory
+        self.jobs: List[ScheduledJob] = []
+        self._stopping = asyncio.Event()
+        self._tasks: List["asyncio.Task[None]"] = []
+
+    def add(
+        self,
+        name: str,
+        function: JobFunction,
+        interval: float,
+    ) -> None:
+        """
+        Register a job.
+
+        :param name: name of the job, in logs and metrics.
+        :param function: coroutine function run with a new session.
+        :param interval: seconds between the end of a run and the next one.
+        """
+        job = ScheduledJob(
+            name,
+            function,
+            interval,
+            settings.scheduler_jitter,
+            settings.scheduler_max_backoff,
+        )
+        self.jobs.append(job)
+
+    async def run(self) -> None:
+        """Run the jobs until stopped or cancelled."""
+        self._tasks = [asyncio.create_task(self._loop(job)) for job in self.jobs]
+        try:  # noqa: WPS501
+            await asyncio.gather(*self._tasks)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def stop(self, timeout: float) -> None:
+        """
+        Stop scheduling runs, waiting for the running ones to end.
+
+        :param timeout: seconds after which they are cancelled.
+        """
+        self._stopping.set()
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            logger.warning(f"Scheduled job cancelled on shutdown: {task}")
+            task.cancel()
+
+    async def _loop(self, job: ScheduledJob) -> None:
+        failures = 0
+        while not self._stopping.is_set():
+            if await self._run_once(job):
+                failures = 0
+            else:
+                failures += 1
+            try:
+                await asyncio.wait_for(self._stopping.wait(), job.delay(failures))
+            except asyncio.TimeoutError:
+                pass  # noqa: WPS420
+
+    async def _run_once(self, job: ScheduledJob) -> bool:
+        """Run a job, returns whether it succeeded."""
+        start = time.perf_counter()
+        try:
+            async with self.session_factory() as session:
+                await job.function(session)
+                await session.commit()
+        except Exception as exc:
+            logger.exception(f"Scheduled job {job.name} failed: {exc}")
+            JOB_RUNS.labels(job.name, "failure").inc()
+            return False
+        finally:
+            JOB_DURATION.labels(job.name).observe(time.perf_counter() - start)
+        JOB_RUNS.labels(job.name, "success").inc()
+        return True
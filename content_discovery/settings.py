@@ -2,9 +2,12 @@ import enum
 from pathlib import Path
 from tempfile import gettempdir
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from yarl import URL
 
+from content_discovery.constants import CounterMode, TrendingMode, TrendingScoring
+
 TEMP_DIR = Path(gettempdir())
 
 
@@ -68,11 +71,131 @@ class Settings(BaseSettings):
         )
 
     identity_socializer_url: str = "http://localhost:9876"
+    # Connection pool and timeouts (in seconds) of the identity-socializer client
+    identity_socializer_max_connections: int = 100
+    identity_socializer_max_keepalive: int = 20
+    identity_socializer_keepalive_expiry: float = 30
+    identity_socializer_timeout: float = 5
+    identity_socializer_connect_timeout: float = 2
+
+    # Author profile cache: capacity in entries, TTLs in seconds
+    profile_cache_capacity: int = 10000
+    profile_cache_ttl: float = 300
+    profile_cache_stale_ttl: float = 600
+    profile_cache_negative_ttl: float = 60
+
+    # Follow graph cache: capacity in users, TTL in seconds
+    follow_cache_capacity: int = 10000
+    follow_cache_ttl: float = 60
+
+    # Hybrid home timelines: snaps of authors with more followers than the
+    # threshold are not fanned out on write. Those written in the last merge
+    # window (in seconds) are merged into timelines when they are read.
+    timeline_fanout_threshold: int = 10000
+    timeline_merge_window: float = 7 * 24 * 60 * 60
+    # Seconds before the followers of an author above the threshold
+    # are counted again
+    high_fanout_recheck: float = 60 * 60
+    # Entries copied when a timeline is built, older ones are read from
+    # snaps and shares
+    timeline_rebuild_limit: int = 800
+    # Seconds a build waits for the snaps being written to be committed,
+    # and after which a timeline still being built is built again
+    timeline_rebuild_timeout: float = 60
+    # Recent snaps cache of those authors: capacity in authors,
+    # snaps kept per author and TTL in seconds
+    recent_snaps_cache_capacity: int = 1000
+    recent_snaps_per_author: int = 200
+    recent_snaps_cache_ttl: float = 10
+
+    # Content search: results are ranked by relevance times recency, a snap
+    # as relevant as a newer one ranks the same if it is 'half life'
+    # seconds older and twice as relevant.
+    search_half_life: float = 7 * 24 * 60 * 60
+    # Lowest trigram word similarity of the results of similar searches
+    search_similarity_threshold: float = 0.5
+
+    # Hashtag autocomplete: hashtags are weighted by their uses in the last
+    # window (in seconds), reloaded from the database every refresh seconds
+    hashtag_autocomplete_window: float = 7 * 24 * 60 * 60
+    hashtag_autocomplete_refresh: float = 300
+    hashtag_autocomplete_max_results: int = 20
+
+    # Trending hashtags are counted within a window (in seconds), and need
+    # to be used at least trending_minimum times in it.
+    trending_window: float = 7 * 24 * 60 * 60
+    trending_minimum: int = 4
+    # They are counted in buckets of trending_bucket seconds.
+    # Each refresh re-reads the last trending_settle seconds of hashtags,
+    # for the transactions that commit late, and the counts are reloaded
+    # every trending_rebuild seconds to forget the hashtags of deleted snaps
+    trending_bucket: float = 60
+    trending_settle: float = 60
+    trending_rebuild: float = 60 * 60
+    # Approximate mode: the window is split into trending_sketch_buckets
+    # Count-Min sketches, counts are overestimated by at most error times
+    # the uses within the window except with probability failure, and
+    # only the capacity most used hashtags are kept
+    trending_mode: TrendingMode = TrendingMode.exact
+    trending_sketch_buckets: int = 28
+    trending_sketch_capacity: int = 1000
+    trending_sketch_error: float = 0.0005
+    trending_sketch_failure: float = 0.01
+    # Velocity scoring: the uses of the last period (in seconds) are compared
+    # with the hashtag's average per period in the rest of the window, plus
+    # the prior. Hashtags scoring at least the threshold trend, it is the
+    # number of standard deviations above that average. The period has to
+    # be shorter than the window and divide it.
+    trending_scoring: TrendingScoring = TrendingScoring.count
+    trending_velocity_period: float = 60 * 60
+    trending_velocity_threshold: float = 3
+    trending_velocity_prior: float = 1
+    # TTL in seconds of the trending topics listing
+    trending_topics_cache_ttl: float = 5
+    # User metrics cache: capacity in users and periods, TTL in seconds
+    user_metrics_cache_capacity: int = 1000
+    user_metrics_cache_ttl: float = 30
+    # Longest period of the user metrics, in days, broken down per day
+    user_metrics_max_days: int = 366
+    # Seconds between moves of the snap count deltas into the rollups
+    snap_counts_compact_interval: float = 5
+
+    # Likes, shares and favs of snaps: in write behind mode the changes to
+    # their counters are kept in memory and written every flush interval
+    # seconds, in a single statement per process.
+    interaction_counters: CounterMode = CounterMode.immediate
+    interaction_flush_interval: float = 1
+    # Most operations accepted by a single bulk interactions request.
+    bulk_interactions_limit: int = 1000
+
+    # Background jobs run in a single process, the others try to take over
+    # every retry seconds, which is also how often the leader checks that
+    # it still holds the lock.
+    leader_election_retry: float = 5
+    # Scheduled jobs run every interval moved by up to jitter times itself,
+    # the interval doubles after each failure up to max_backoff seconds.
+    # On shutdown running jobs get drain_timeout seconds to finish.
+    scheduler_jitter: float = 0.1
+    scheduler_max_backoff: float = 5 * 60
+    scheduler_drain_timeout: float = 10
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_prefix="CONTENT_DISCOVERY_",
         env_file_encoding="utf-8",
     )
 
+    @model_validator(mode="after")
+    def _check_velocity_period(self) -> "Settings":
+        """The window is made of several whole velocity periods."""
+        if self.trending_scoring != TrendingScoring.velocity:
+            return self
+        period = self.trending_velocity_period
+        if period <= 0 or period >= self.trending_window:
+            raise ValueError("trending_velocity_period must be within the window")
+        if self.trending_window % period:
+            raise ValueError("trending_velocity_period must divide trending_window")
+        return self
+
 
 settings = Settings()
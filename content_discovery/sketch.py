@@ -0,0 +1,196 @@
+import bisect
+import heapq
+import math
+import random
+from array import array
+from itertools import repeat
+from typing import Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+
+# Rows hash keys with ((a * key + b) mod PRIME) mod width, a and b drawn
+# from a fixed seed so that sketches of the same size can be combined.
+PRIME = 2**61 - 1
+SEED = 2718
+
+
+class CountMinSketch(Generic[KeyT]):
+    """
+    Approximate counts of keys in a fixed amount of memory.
+
+    A count is overestimated by at most 'error' times the total of the
+    counts, except with a probability of 'failure'.
+    """
+
+    def __init__(self, error: float, failure: float) -> None:
+        self.width = math.ceil(math.e / error)
+        self.depth = math.ceil(math.log(1 / failure))
+        self.total = 0
+        generator = random.Random(SEED)  # noqa: S311
+        self._rows = [
+            (generator.randrange(1, PRIME), generator.randrange(PRIME))
+            for _ in range(self.depth)
+        ]
+        self._cells = array("q", repeat(0, self.width * self.depth))
+
+    def add(self, key: KeyT, count: int = 1) -> None:
+        """
+        Count a key.
+
+        :param key: key counted.
+        :param count: times it is counted.
+        """
+        for cell in self._cells_of(key):
+            self._cells[cell] += count
+        self.total += count
+
+    def estimate(self, key: KeyT) -> int:
+        """
+        Times a key was counted, never underestimated.
+
+        :param key: key to look up.
+        :returns: its estimated count.
+        """
+        return min(self._cells[cell] for cell in self._cells_of(key))
+
+    def subtract(self, other: "CountMinSketch[KeyT]") -> None:
+        """
+        Remove the counts of a sketch of the same size.
+
+        :param other: sketch of counts that were all added to this one.
+        """
+        for cell, count in enumerate(other._cells):  # noqa: WPS437
+            self._cells[cell] -= count
+        self.total -= other.total
+
+    def _cells_of(self, key: KeyT) -> List[int]:
+        hashed = hash(key)
+        cells = []
+        for row, (factor, offset) in enumerate(self._rows):
+            column = (factor * hashed + offset) % PRIME % self.width
+            cells.append(row * self.width + column)
+        return cells
+
+
+class HeavyHitters(Generic[KeyT]):
+    """
+    Approximate counts of the most frequent keys over a rolling window.
+
+    Drop-in replacement for SlidingWindowCounter that uses a bounded
+    amount of memory: the window is split into 'buckets' Count-Min
+    sketches, whose sum estimates the count of any key, and only the
+    'capacity' keys with the highest estimates are remembered.
+    Counts are overestimated by at most 'error' times the number of
+    uses within the window, except with a probability of 'failure'.
+    """
+
+    def __init__(  # noqa: WPS211
+        self,
+        window: float,
+        buckets: int,
+        minimum: int,
+        capacity: int,
+        error: float,
+        failure: float,
+    ) -> None:
+        self.bucket = window / buckets
+        self.buckets = buckets
+        self.minimum = minimum
+        self.capacity = capacity
+        self.error = error
+        self.failure = failure
+        self._total: CountMinSketch[KeyT] = CountMinSketch(error, failure)
+        self._buckets: Dict[int, CountMinSketch[KeyT]] = {}
+        self._order: List[int] = []
+        self._candidates: Dict[KeyT, int] = {}
+        self._smallest: List[Tuple[int, KeyT]] = []
+        self._start = -math.inf
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def add(self, key: KeyT, timestamp: float, count: int = 1) -> None:
+        """
+        Count a key at a moment, ignored if it is before the window.
+
+        :param key: key counted.
+        :param timestamp: moment, in seconds.
+        :param count: times it is counted.
+        """
+        index = math.floor(timestamp / self.bucket)
+        if index < self._start:
+            return
+        sketch = self._buckets.get(index)
+        if sketch is None:
+            sketch = CountMinSketch(self.error, self.failure)
+            self._buckets[index] = sketch
+            bisect.insort(self._order, index)
+        sketch.add(key, count)
+        self._total.add(key, count)
+        self._offer(key, self._total.estimate(key))
+
+    def advance(self, timestamp: float) -> None:
+        """
+        Move the window to end at a moment, dropping the older buckets.
+
+        :param timestamp: end of the window, in seconds.
+        """
+        start = math.floor(timestamp / self.bucket) - self.buckets + 1
+        self._start = max(self._start, start)
+        if not self._order or self._order[0] >= self._start:
+            return
+        while self._order and self._order[0] < self._start:
+            self._total.subtract(self._buckets.pop(self._order.pop(0)))
+        self._candidates = {key: self._total.estimate(key) for key in self._candidates}
+        self._heapify()
+
+    def count(self, key: KeyT) -> int:
+        """
+        Estimated times a key was counted within the window.
+
+        :param key: key to look up.
+        :returns: its count, never underestimated.
+        """
+        return self._total.estimate(key)
+
+    def frequent(self) -> Dict[KeyT, int]:
+        """
+        Keys estimated to be counted at least 'minimum' times.
+
+        :returns: estimated count of each of them.
+        """
+        return {
+            key: count
+            for key, count in self._candidates.items()
+            if count >= self.minimum
+        }
+
+    def _offer(self, key: KeyT, count: int) -> None:
+        """Remember a key if it is among the 'capacity' most counted."""
+        if key not in self._candidates and len(self._candidates) >= self.capacity:
+            smallest = self._pop_smallest()
+            if smallest is None:
+                return
+            if self._candidates[smallest] >= count:
+                self._push(smallest, self._candidates[smallest])
+                return
+            self._candidates.pop(smallest)
+        self._push(key, count)
+
+    def _push(self, key: KeyT, count: int) -> None:
+        self._candidates[key] = count
+        heapq.heappush(self._smallest, (count, key))
+        if len(self._smallest) > self.capacity * 4:
+            self._heapify()
+
+    def _pop_smallest(self) -> Optional[KeyT]:
+        """Candidate with the lowest count, skipping outdated entries."""
+        while self._smallest:
+            count, key = heapq.heappop(self._smallest)
+            if self._candidates.get(key) == count:
+                return key
+        return None
+
+    def _heapify(self) -> None:
+        self._smallest = [(count, key) for key, count in self._candidates.items()]
+        heapq.heapify(self._smallest)
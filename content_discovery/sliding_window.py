@@ -0,0 +1,90 @@
+import bisect
+import math
+from collections import Counter
+from typing import Dict, Generic, Hashable, List, Set, TypeVar
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+
+
+class SlidingWindowCounter(Generic[KeyT]):
+    """
+    Counts of keys over a rolling time window.
+
+    Counts are kept in buckets of 'bucket' seconds. Moving the window
+    drops whole buckets and subtracts them, so it costs the number of
+    keys in the expired buckets, whatever the size of the window.
+    The keys counted at least 'minimum' times are tracked as counts change.
+    """
+
+    def __init__(self, window: float, bucket: float, minimum: int) -> None:
+        self.bucket = bucket
+        self.minimum = minimum
+        self.buckets = max(math.ceil(window / bucket), 1)
+        self._counts: Dict[KeyT, int] = {}
+        self._buckets: Dict[int, "Counter[KeyT]"] = {}
+        self._order: List[int] = []
+        self._frequent: Set[KeyT] = set()
+        self._start = -math.inf
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, key: KeyT, timestamp: float, count: int = 1) -> None:
+        """
+        Count a key at a moment, ignored if it is before the window.
+
+        :param key: key counted.
+        :param timestamp: moment, in seconds.
+        :param count: times it is counted.
+        """
+        index = math.floor(timestamp / self.bucket)
+        if index < self._start:
+            return
+        counts = self._buckets.get(index)
+        if counts is None:
+            counts = Counter()
+            self._buckets[index] = counts
+            bisect.insort(self._order, index)
+        counts[key] += count
+        self._change(key, count)
+
+    def advance(self, timestamp: float) -> None:
+        """
+        Move the window to end at a moment, dropping the older buckets.
+
+        :param timestamp: end of the window, in seconds.
+        """
+        start = math.floor(timestamp / self.bucket) - self.buckets + 1
+        self._start = max(self._start, start)
+        while self._order and self._order[0] < self._start:
+            expired = self._buckets.pop(self._order.pop(0))
+            for key, count in expired.items():
+                self._change(key, -count)
+
+    def count(self, key: KeyT) -> int:
+        """
+        Times a key was counted within the window.
+
+        :param key: key to look up.
+        :returns: its count.
+        """
+        return self._counts.get(key, 0)
+
+    def frequent(self) -> Dict[KeyT, int]:
+        """
+        Keys counted at least 'minimum' times.
+
+        :returns: count of each of them.
+        """
+        return {key: self._counts[key] for key in self._frequent}
+
+    def _change(self, key: KeyT, delta: int) -> None:
+        count = self._counts.get(key, 0) + delta
+        if count > 0:
+            self._counts[key] = count
+        else:
+            self._counts.pop(key, None)
+        if count >= self.minimum:
+            self._frequent.add(key)
+        else:
+            self._frequent.discard(key)
@@ -0,0 +1,73 @@
+"""In-memory stand-in for the identity-socializer service."""
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, DefaultDict, Dict, List, Set
+
+from fastapi import FastAPI, Request, Response
+
+
+class IdentitySocializerStub:
+    """
+    Serves the identity-socializer endpoints used by this service.
+
+    Tests set up the follow graph with 'follow' and inspect
+    the paths that were requested and the notifications sent.
+    """
+
+    def __init__(self) -> None:
+        self.following: DefaultDict[str, Set[str]] = defaultdict(set)
+        self.requests: List[str] = []
+        self.notifications: List[Dict[str, Any]] = []
+        self.app = self._build_app()
+
+    def follow(self, follower: str, followed: str) -> None:
+        """Make 'follower' follow 'followed'."""
+        self.following[follower].add(followed)
+
+    def followers_of(self, user_id: str) -> Set[str]:
+        """Users following 'user_id'."""
+        return {
+            follower
+            for follower, followed in self.following.items()
+            if user_id in followed
+        }
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+        app.middleware("http")(self._record)
+        app.get("/api/auth/users/{user_id}")(self._user)
+        app.get("/api/auth/user_by_username/{user_id}")(self._user)
+        app.get("/api/interactions/{user_id}/following")(self._following)
+        app.get("/api/interactions/{user_id}/followers")(self._followers)
+        app.post("/api/notification/{kind}")(self._notification)
+        return app
+
+    async def _record(
+        self,
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]],
+    ) -> Response:
+        self.requests.append(request.url.path)
+        return await call_next(request)
+
+    async def _user(self, user_id: str) -> Dict[str, Any]:
+        return _profile(user_id)
+
+    async def _following(self, user_id: str) -> List[Dict[str, Any]]:
+        return [_profile(followed) for followed in self.following[user_id]]
+
+    async def _followers(self, user_id: str) -> List[Dict[str, Any]]:
+        return [_profile(follower) for follower in self.followers_of(user_id)]
+
+    async def _notification(self, kind: str, request: Request) -> None:
+        body = await request.json()
+        self.notifications.append({"kind": kind, **body})
+
+
+def _profile(user_id: str) -> Dict[str, Any]:
+    return {
+        "id": user_id,
+        "username": user_id,
+        "first_name": user_id.capitalize(),
+        "last_name": None,
+        "profile_photo_id": None,
+    }
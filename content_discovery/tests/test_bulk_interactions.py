@@ -0,0 +1,95 @@
+"""Tests for the bulk interactions endpoint."""
+import uuid
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from content_discovery.db.dao.interaction_dao import InteractionDAO
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.models.like_model import LikeModel
+from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.settings import settings
+from content_discovery.tests.identity_socializer_stub import IdentitySocializerStub
+
+FAN = "fan"
+WRITER = "writer"
+
+
+def _operations(pairs: List[Tuple[str, str]]) -> Dict[str, Any]:
+    operations = [{"action": action, "snap_id": snap_id} for action, snap_id in pairs]
+    return {"operations": operations}
+
+
+async def _counts(dbsession: AsyncSession, snap_id: uuid.UUID) -> Tuple[Any, ...]:
+    """Likes, shares and favs of a snap."""
+    query = select(SnapsModel.likes, SnapsModel.shares, SnapsModel.favs)
+    rows = await dbsession.execute(query.where(SnapsModel.id == snap_id))
+    return tuple(rows.one())
+
+
+@pytest.mark.anyio
+async def test_bulk_interactions(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+    identity_socializer_stub: IdentitySocializerStub,
+) -> None:
+    """Operations apply in order, as if they were sent one by one."""
+    snaps_dao = SnapDAO(dbsession)
+    first = await snaps_dao.create_snaps_model(WRITER, "first", 1)
+    second = await snaps_dao.create_snaps_model(WRITER, "second", 1)
+    first_id = str(first.id)
+    second_id = str(second.id)
+    await InteractionDAO(dbsession).add(LikeModel, FAN, second_id)
+    operations = [
+        ("like", first_id),
+        ("like", first_id),
+        ("unlike", second_id),
+        ("like", second_id),
+        ("unlike", second_id),
+        ("fav", first_id),
+        ("fav", str(uuid.uuid4())),
+        ("unfav", "not a snap"),
+        ("share", first_id),
+    ]
+
+    url = fastapi_app.url_path_for("bulk_interactions", user_id=FAN)
+    response = await client.post(url, json=_operations(operations))
+
+    applied = [result["applied"] for result in response.json()]
+    assert applied == [True, False, True, True, True, True, False, False, True]
+    assert response.json()[0] == {
+        "action": "like",
+        "snap_id": first_id,
+        "applied": True,
+    }
+    assert [
+        await _counts(dbsession, first.id),
+        await _counts(dbsession, second.id),
+    ] == [
+        (1, 1, 1),
+        (0, 0, 0),
+    ]
+    notifications = identity_socializer_stub.notifications
+    assert [notification["to_id"] for notification in notifications] == [WRITER]
+
+
+@pytest.mark.anyio
+async def test_bulk_interactions_limit(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Requests with more operations than the limit are rejected."""
+    monkeypatch.setattr(settings, "bulk_interactions_limit", 1)
+    snap_id = str(uuid.uuid4())
+    body = _operations([("like", snap_id), ("fav", snap_id)])
+
+    url = fastapi_app.url_path_for("bulk_interactions", user_id=FAN)
+    response = await client.post(url, json=body)
+
+    assert response.status_code == 400
@@ -0,0 +1,148 @@
+"""Tests for the in-process TTL cache."""
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from content_discovery.cache import TTLCache
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self) -> None:
+        self.now: float = 0
+
+    def __call__(self) -> float:
+        """Current time."""
+        return self.now
+
+
+class CountingLoader:
+    """Loader that records the keys it was asked for."""
+
+    def __init__(self, missing: Optional[List[str]] = None) -> None:
+        self.calls: List[str] = []
+        self.missing = missing or []
+
+    async def __call__(self, key: str) -> Optional[str]:
+        """Load a value, or None for missing keys."""
+        self.calls.append(key)
+        await asyncio.sleep(0)
+        if key in self.missing:
+            return None
+        version = len(self.calls)
+        return f"value {key} #{version}"
+
+
+@pytest.mark.anyio
+async def test_hit_after_load() -> None:
+    """A loaded value is served from the cache until it expires."""
+    clock = FakeClock()
+    cache: TTLCache[str, str] = TTLCache("test", capacity=10, ttl=5, clock=clock)
+    loader = CountingLoader()
+
+    first = await cache.get_or_load("a", loader)
+    second = await cache.get_or_load("a", loader)
+    clock.now = 6
+    third = await cache.get_or_load("a", loader)
+
+    assert first == second == "value a #1"
+    assert third == "value a #2"
+
+
+@pytest.mark.anyio
+async def test_lru_eviction() -> None:
+    """The least recently used entry is evicted when the cache is full."""
+    cache: TTLCache[str, str] = TTLCache("test", capacity=2, ttl=5)
+    loader = CountingLoader()
+
+    await cache.get_or_load("a", loader)
+    await cache.get_or_load("b", loader)
+    await cache.get_or_load("a", loader)
+    await cache.get_or_load("c", loader)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+@pytest.mark.anyio
+async def test_negative_results_are_cached() -> None:
+    """Missing keys are remembered for the negative TTL."""
+    clock = FakeClock()
+    cache: TTLCache[str, str] = TTLCache(
+        "test",
+        capacity=10,
+        ttl=60,
+        negative_ttl=1,
+        clock=clock,
+    )
+    loader = CountingLoader(missing=["ghost"])
+
+    assert await cache.get_or_load("ghost", loader) is None
+    assert await cache.get_or_load("ghost", loader) is None
+    clock.now = 2
+    assert await cache.get_or_load("ghost", loader) is None
+    assert loader.calls == ["ghost", "ghost"]
+
+
+@pytest.mark.anyio
+async def test_stale_while_revalidate() -> None:
+    """An expired entry is served while it is refreshed in the background."""
+    clock = FakeClock()
+    cache: TTLCache[str, str] = TTLCache(
+        "test",
+        capacity=10,
+        ttl=5,
+        stale_ttl=10,
+        clock=clock,
+    )
+    loader = CountingLoader()
+    await cache.get_or_load("a", loader)
+    clock.now = 6
+
+    stale = await cache.get_or_load("a", loader)
+    await asyncio.sleep(0.01)
+
+    assert stale == "value a #1"
+    assert cache.get("a") == "value a #2"
+
+
+@pytest.mark.anyio
+async def test_concurrent_misses_share_a_load() -> None:
+    """Concurrent misses for the same key only call the loader once."""
+    cache: TTLCache[str, str] = TTLCache("test", capacity=10, ttl=5)
+    loader = CountingLoader()
+
+    lookups = [cache.get_or_load("a", loader) for _ in range(3)]
+    values = await asyncio.gather(*lookups)
+
+    assert set(values) == {"value a #1"}
+    assert loader.calls == ["a"]
+
+
+@pytest.mark.anyio
+async def test_cancelled_load_is_retried_by_waiters() -> None:
+    """Lookups sharing a load that is cancelled load the value themselves."""
+    cache: TTLCache[str, str] = TTLCache("test", capacity=10, ttl=5)
+    loader = CountingLoader()
+    stuck = asyncio.Event()
+
+    async def _stuck_once(key: str) -> Optional[str]:  # noqa: WPS430
+        if not loader.calls:
+            loader.calls.append(key)
+            await stuck.wait()
+        return await loader(key)
+
+    first = asyncio.create_task(cache.get_or_load("a", _stuck_once))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(cache.get_or_load("a", _stuck_once))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    value = await asyncio.wait_for(second, timeout=1)
+
+    assert first.cancelled()
+    assert value == "value a #2"
+    assert loader.calls == ["a", "a"]
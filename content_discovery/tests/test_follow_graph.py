@@ -0,0 +1,74 @@
+"""Tests for the follow graph cache."""
+import asyncio
+from typing import Iterator
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from starlette import status
+
+from content_discovery.services.cache_invalidation.listener import (
+    InvalidationListener,
+    publish_invalidation,
+)
+from content_discovery.web.api.utils import (
+    FOLLOW_GRAPH,
+    followed_ids,
+    followers_cache,
+    following_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_follow_caches() -> Iterator[None]:
+    """
+    Follow sets cached by a test are not seen by the others.
+
+    :yield: nothing.
+    """
+    following_cache.clear()
+    followers_cache.clear()
+    yield
+    following_cache.clear()
+    followers_cache.clear()
+
+
+@pytest.mark.anyio
+async def test_follow_graph_is_cached() -> None:
+    """Cached follow sets are served without asking identity-socializer."""
+    following_cache.set("cached", frozenset(("cached", "friend")))
+
+    assert await followed_ids("cached") == {"cached", "friend"}
+
+
+@pytest.mark.anyio
+async def test_invalidation_endpoint(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    """The internal endpoint drops the cached follow set of the user."""
+    following_cache.set("follower", frozenset(("follower", "friend")))
+    url = fastapi_app.url_path_for("invalidate_follow_graph", user_id="follower")
+
+    response = await client.post(url)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "follower" not in following_cache
+
+
+@pytest.mark.anyio
+async def test_invalidation_reaches_other_processes(_engine: AsyncEngine) -> None:
+    """Invalidations are broadcast to every listening process."""
+    listener = InvalidationListener()
+    await listener.start()
+    try:  # noqa: WPS501
+        async with AsyncSession(_engine) as session:
+            await publish_invalidation(session, FOLLOW_GRAPH, "remote")
+            following_cache.set("remote", frozenset(("remote",)))
+            await session.commit()
+        await asyncio.sleep(0.1)
+    finally:
+        await listener.stop()
+
+    assert "remote" not in following_cache
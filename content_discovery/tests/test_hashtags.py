@@ -0,0 +1,146 @@
+"""Tests for the hashtag dictionary."""
+import datetime
+from typing import Any, Dict, List
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from content_discovery.db.dao.hashtag_dao import HashtagDAO
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.models.hashtag_name_model import HashtagNameModel
+from content_discovery.services.hashtag_completions.completions import (
+    HashtagCompletions,
+    hashtag_completions,
+)
+
+
+async def _post(dbsession: AsyncSession, content: str) -> str:
+    snap = await SnapDAO(dbsession).create_snaps_model("writer", content, 1)
+    await HashtagDAO(dbsession).create_hashtags(snap.id, content)
+    return str(snap.id)
+
+
+async def _filter(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    hashtag: str,
+    prefix: bool = False,
+) -> List[str]:
+    url = fastapi_app.url_path_for("filter_hashtags")
+    params: Dict[str, Any] = {"user_id": "reader", "hashtag": hashtag}
+    params["prefix"] = prefix
+    response = await client.get(url, params=params)
+    return [snap["id"] for snap in response.json()["snaps"]]
+
+
+@pytest.mark.anyio
+async def test_hashtags_are_normalized_once(dbsession: AsyncSession) -> None:
+    """Each hashtag is stored once in lower case and counted once per snap."""
+    hashtag_dao = HashtagDAO(dbsession)
+
+    snap = await SnapDAO(dbsession).create_snaps_model("writer", "x", 1)
+    tags = await hashtag_dao.create_hashtags(
+        snap.id,
+        "#Python and #python, #pythonic",
+    )
+    await _post(dbsession, "more #PYTHON")
+
+    names = await dbsession.execute(select(func.count(HashtagNameModel.id)))
+    assert tags == ["#python", "#pythonic"]
+    assert names.scalar_one() == 2
+    assert await hashtag_dao.get_times_used_by_hashtag("#Python") == 2
+    week_ago = datetime.datetime.utcnow() - datetime.timedelta(weeks=1)
+    top = await hashtag_dao.get_top_hashtags(week_ago, 2)
+    assert [dict(row) for row in top] == [{"name": "#python", "count": 2}]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("identity_socializer_stub")
+async def test_long_hashtags_are_cut(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """Hashtags longer than the dictionary holds are stored and found cut."""
+    letters = "a" * 250
+    hashtag = f"#{letters}"
+    url = fastapi_app.url_path_for("post_snap")
+    body = {"user_id": "writer", "content": hashtag, "privacy": 1}
+    response = await client.post(url, json=body)
+
+    names = await dbsession.execute(select(HashtagNameModel.name))
+    assert response.status_code == 200
+    assert names.scalars().all() == [hashtag[: HashtagNameModel.length]]
+    assert await _filter(client, fastapi_app, hashtag) == [response.json()["id"]]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("identity_socializer_stub")
+async def test_filter_exact_and_prefix(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """Hashtags are looked up by their exact name or by a prefix."""
+    python = await _post(dbsession, "#python")
+    pythonic = await _post(dbsession, "#Pythonic")
+    await _post(dbsession, "#py_thon")
+
+    exact = await _filter(client, fastapi_app, "PYTHON")
+    prefix = await _filter(client, fastapi_app, "#pyth", prefix=True)
+    escaped = await _filter(client, fastapi_app, "py_", prefix=True)
+
+    assert exact == [python]
+    assert set(prefix) == {python, pythonic}
+    assert len(escaped) == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("identity_socializer_stub")
+async def test_autocomplete_counts_new_hashtags(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """Suggestions are ranked by recent uses, including the latest snaps."""
+    await _post(dbsession, "#python #pytest")
+    await _post(dbsession, "#pytest")
+    await hashtag_completions.refresh(dbsession)
+    url = fastapi_app.url_path_for("autocomplete_hashtags")
+    post_url = fastapi_app.url_path_for("post_snap")
+
+    before = await client.get(url, params={"prefix": "PY"})
+    for _ in range(2):
+        body = {"user_id": "writer", "content": "#Python", "privacy": 1}
+        await client.post(post_url, json=body)
+    after = await client.get(url, params={"prefix": "#py", "limit": 1})
+
+    assert before.json() == ["#pytest", "#python"]
+    assert after.json() == ["#python"]
+
+
+@pytest.mark.anyio
+async def test_completions_are_served_while_refreshing(
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """The previous index answers until the new one is loaded."""
+    await _post(dbsession, "#python #pytest")
+    completions = HashtagCompletions()
+    completions.record(["#pandas"])
+    get_top_hashtags = HashtagDAO.get_top_hashtags
+    during: List[str] = []
+
+    async def _record_while_loading(*args: Any) -> Any:  # noqa: WPS430
+        during.extend(completions.complete("#p", 10))
+        completions.record(["#pip"])
+        return await get_top_hashtags(*args)
+
+    monkeypatch.setattr(HashtagDAO, "get_top_hashtags", _record_while_loading)
+    await completions.refresh(dbsession)
+
+    assert during == ["#pandas"]
+    assert completions.complete("#p", 10) == ["#pip", "#pytest", "#python"]
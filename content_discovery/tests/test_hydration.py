@@ -0,0 +1,111 @@
+"""Tests for the bulk snap hydration."""
+from typing import Any, List, Tuple
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from content_discovery.db.dao.fav_dao import FavDAO
+from content_discovery.db.dao.like_dao import LikeDAO
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.tests.identity_socializer_stub import IdentitySocializerStub
+from content_discovery.web.api.utils import (
+    complete_snaps,
+    followers_cache,
+    following_cache,
+    profile_cache,
+)
+
+VIEWER = "viewer"
+
+
+async def _create_page(snap_dao: SnapDAO, size: int) -> List[SnapsModel]:
+    snaps = []
+    for index in range(size):
+        snap = await snap_dao.create_snaps_model(VIEWER, f"snap {index}", 1)
+        snaps.append(snap)
+    return snaps
+
+
+async def _cost(
+    engine: AsyncEngine,
+    snaps: List[SnapsModel],
+    snap_dao: SnapDAO,
+    stub: IdentitySocializerStub,
+) -> Tuple[int, int]:
+    """SQL statements and identity-socializer requests of a hydration."""
+    statements: List[str] = []
+
+    def _record(*args: Any) -> None:  # noqa: WPS430
+        statements.append(args[2])
+
+    for cache in (profile_cache, following_cache, followers_cache):
+        cache.clear()
+    stub.requests.clear()
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    try:  # noqa: WPS501
+        await complete_snaps(snaps, VIEWER, snap_dao)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _record)
+    return len(statements), len(stub.requests)
+
+
+@pytest.mark.anyio
+async def test_hydration_flags_and_replies(dbsession: AsyncSession) -> None:
+    """Viewer flags and reply counts are resolved for every snap of the page."""
+    snap_dao = SnapDAO(dbsession)
+    liked, faved, plain = await _create_page(snap_dao, 3)
+    await LikeDAO(dbsession).create_like_model(VIEWER, str(liked.id))
+    await FavDAO(dbsession).create_fav_model(VIEWER, str(faved.id))
+    await snap_dao.create_reply_snap(VIEWER, "reply", str(plain.id), 1)
+    await snap_dao.create_reply_snap(VIEWER, "reply", str(plain.id), 1)
+
+    feed = await complete_snaps([liked, faved, plain], VIEWER, snap_dao)
+
+    assert feed.snaps is not None
+    assert [snap.has_liked for snap in feed.snaps] == [True, False, False]
+    assert [snap.has_faved for snap in feed.snaps] == [False, True, False]
+    assert [snap.num_replies for snap in feed.snaps] == [0, 0, 2]
+
+
+@pytest.mark.anyio
+async def test_hydration_cost_is_constant(
+    _engine: AsyncEngine,
+    dbsession: AsyncSession,
+    identity_socializer_stub: IdentitySocializerStub,
+) -> None:
+    """Hydrating a big page issues as many queries and calls as a small one."""
+    snap_dao = SnapDAO(dbsession)
+    small_page = await _create_page(snap_dao, 2)
+    big_page = await _create_page(snap_dao, 50)
+
+    small_cost = await _cost(_engine, small_page, snap_dao, identity_socializer_stub)
+    big_cost = await _cost(_engine, big_page, snap_dao, identity_socializer_stub)
+
+    assert small_cost == big_cost
+    assert small_cost[1] > 0
+
+
+@pytest.mark.anyio
+async def test_likes_visible_only_to_mutuals(
+    dbsession: AsyncSession,
+    identity_socializer_stub: IdentitySocializerStub,
+) -> None:
+    """Mutuals of all the authors of a page are resolved in one lookup."""
+    identity_socializer_stub.follow(VIEWER, "mutual")
+    identity_socializer_stub.follow("mutual", VIEWER)
+    identity_socializer_stub.follow(VIEWER, "idol")
+    snap_dao = SnapDAO(dbsession)
+    snaps = []
+    for author in ("mutual", "idol", "mutual", "idol"):
+        snaps.append(await snap_dao.create_snaps_model(author, "hi", 1))
+
+    feed = await complete_snaps(snaps, VIEWER, snap_dao)
+
+    assert feed.snaps is not None
+    assert [snap.likes for snap in feed.snaps] == [0, None, 0, None]
+    graph_requests = [
+        path for path in identity_socializer_stub.requests if "interactions" in path
+    ]
+    assert len(graph_requests) == 2
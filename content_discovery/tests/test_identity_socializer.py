@@ -0,0 +1,47 @@
+"""Tests for the pooled identity-socializer client."""
+from typing import List, Optional
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from content_discovery.services.identity_socializer import client as client_module
+from content_discovery.services.identity_socializer.client import identity_socializer
+from content_discovery.services.identity_socializer.lifetime import (
+    init_identity_socializer,
+    shutdown_identity_socializer,
+)
+from content_discovery.tests.identity_socializer_stub import IdentitySocializerStub
+
+
+@pytest.mark.anyio
+async def test_client_lives_with_the_app(
+    identity_socializer_stub: IdentitySocializerStub,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """One client is opened at startup, used by every request and closed."""
+    built: List[httpx.AsyncClient] = []
+    build_client = client_module._build_client  # noqa: WPS437
+    stub_app = identity_socializer_stub.app
+    stub_transport = httpx.ASGITransport(app=stub_app)  # type: ignore[arg-type]
+
+    def _build_stub_client(  # noqa: WPS430
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> httpx.AsyncClient:
+        built.append(build_client(stub_transport))
+        return built[-1]
+
+    monkeypatch.setattr(client_module, "_build_client", _build_stub_client)
+    await identity_socializer.shutdown()
+    app = FastAPI()
+
+    await init_identity_socializer(app)
+    opened = list(built)
+    for user_id in ("first", "second", "third"):
+        await identity_socializer.get(f"http://test/api/auth/users/{user_id}")
+    await shutdown_identity_socializer(app)
+
+    assert len(opened) == 1
+    assert built == opened
+    assert len(identity_socializer_stub.requests) == 3
+    assert opened[0].is_closed
@@ -0,0 +1,142 @@
+"""Tests that the read paths are served by indexes."""
+import datetime
+from typing import Any, Awaitable, Callable, List, Tuple
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from content_discovery.db.dao.fav_dao import FavDAO
+from content_discovery.db.dao.hashtag_dao import HashtagDAO
+from content_discovery.db.dao.mention_dao import MentionDAO
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.pagination import Cursor
+
+SNAPS = 50000
+USERS = 1000
+
+SEED_SNAPS = """
+INSERT INTO snaps (id, user_id, parent_id, content, likes, shares, favs,
+                   created_at, visibility, privacy)
+SELECT md5(n::text)::uuid, 'user' || n % :users, NULL, 'snap ' || n, 0, 0, 0,
+       now() - n * interval '1 minute', 1 + (n % 10 = 0)::int, 1
+FROM generate_series(1, :snaps) AS n
+"""
+SEED_REPLIES = """
+UPDATE snaps SET parent_id = md5((n / 2)::text)::uuid
+FROM generate_series(2, :snaps, 7) AS n
+WHERE id = md5(n::text)::uuid
+"""
+SEED_SHARES = """
+INSERT INTO shares (user_id, snap_id, created_at)
+SELECT 'user' || n % :users, md5(n::text)::uuid, now()
+FROM generate_series(1, :snaps, 3) AS n
+"""
+SEED_LIKES = """
+INSERT INTO likes (user_id, snap_id, created_at)
+SELECT 'user' || n % :users, md5(n::text)::uuid, now()
+FROM generate_series(1, :snaps, 2) AS n
+"""
+SEED_FAVS = """
+INSERT INTO favs (user_id, snap_id, created_at)
+SELECT 'user' || n % :users, md5(n::text)::uuid, now()
+FROM generate_series(1, :snaps, 2) AS n
+"""
+SEED_HASHTAG_NAMES = """
+INSERT INTO hashtag_names (id, name)
+SELECT n, '#tag' || n FROM generate_series(0, 999) AS n
+"""
+SEED_HASHTAGS = """
+INSERT INTO snap_hashtags (snap_id, hashtag_id, created_at)
+SELECT md5(n::text)::uuid, n % 1000, now() - n * interval '1 minute'
+FROM generate_series(1, :snaps) AS n
+"""
+SEED_MENTIONS = """
+INSERT INTO mentions (id, mentioned_id, mentioned_username, snap_id, created_at)
+SELECT gen_random_uuid(), 'user' || n % :users, 'user' || n % :users,
+       md5(n::text)::uuid, now()
+FROM generate_series(1, :snaps, 4) AS n
+"""
+SEED = (
+    SEED_SNAPS,
+    SEED_REPLIES,
+    SEED_SHARES,
+    SEED_LIKES,
+    SEED_FAVS,
+    SEED_HASHTAG_NAMES,
+    SEED_HASHTAGS,
+    SEED_MENTIONS,
+)
+
+
+async def _seed(session: AsyncSession) -> None:
+    for statement in SEED:
+        await session.execute(text(statement), {"snaps": SNAPS, "users": USERS})
+    await session.execute(text("ANALYZE"))
+
+
+async def _plans(
+    engine: AsyncEngine,
+    session: AsyncSession,
+    read: Callable[[], Awaitable[Any]],
+) -> List[str]:
+    statements: List[Tuple[str, Any]] = []
+
+    def _record(*args: Any) -> None:  # noqa: WPS430
+        statements.append((args[2], args[3]))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    try:  # noqa: WPS501
+        await read()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _record)
+
+    connection = await session.connection()
+    plans = []
+    for statement, parameters in statements:
+        explained = await connection.exec_driver_sql(
+            f"EXPLAIN {statement}",
+            parameters,
+        )
+        plans.append("\n".join(explained.scalars().all()))
+    return plans
+
+
+@pytest.mark.anyio
+async def test_read_paths_do_not_scan_tables(
+    _engine: AsyncEngine,
+    dbsession: AsyncSession,
+) -> None:
+    """The main DAO queries use indexes instead of sequential scans."""
+    await _seed(dbsession)
+    snap_dao = SnapDAO(dbsession)
+    hashtag_dao = HashtagDAO(dbsession)
+    following = ["user1", "user2", "user3"]
+    snap_ids = [snap.id for snap in await snap_dao.get_all_snaps(10, 0)]
+    three_days_ago = datetime.datetime.utcnow() - datetime.timedelta(days=3)
+    cursor = Cursor(three_days_ago, snap_ids[0])
+    reads = (
+        lambda: snap_dao.get_snaps_and_shares(following, following, 10, 0, cursor),
+        lambda: snap_dao.get_from_user("user1", following, 10, 0, cursor),
+        lambda: snap_dao.get_from_user_by_admin("user1", 10, 0, cursor),
+        lambda: snap_dao.get_shared_snaps(["user1"], 10, 0, cursor),
+        lambda: snap_dao.get_all_snaps(10, 0, cursor),
+        lambda: snap_dao.get_snap_replies(str(snap_ids[0]), following),
+        lambda: snap_dao.count_replies_by_snaps(snap_ids),
+        lambda: snap_dao.get_viewer_flags("user1", snap_ids),
+        lambda: snap_dao.filter_snaps("4242", following),
+        lambda: hashtag_dao.get_times_used_by_hashtag("#tag1"),
+        lambda: hashtag_dao.filter_hashtags("#tag1"),
+        lambda: hashtag_dao.filter_hashtags("tag12", prefix=True),
+        lambda: hashtag_dao.get_top_hashtags(
+            datetime.datetime.utcnow() - datetime.timedelta(hours=1),
+            1,
+        ),
+        lambda: MentionDAO(dbsession).get_mentions("user1"),
+        lambda: MentionDAO(dbsession).get_mentioned_users_in_snap(snap_ids[0]),
+        lambda: FavDAO(dbsession).get_favs_by_user("user1"),
+    )
+
+    for read in reads:
+        for plan in await _plans(_engine, dbsession, read):
+            assert "Seq Scan" not in plan, plan
@@ -0,0 +1,135 @@
+"""Tests for the interactions and their counters, written immediately or behind."""
+import uuid
+from typing import Tuple
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from content_discovery.constants import CounterMode
+from content_discovery.db.dao.interaction_dao import InteractionDAO
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.models.fav_model import FavModel
+from content_discovery.db.models.like_model import LikeModel
+from content_discovery.db.models.share_model import ShareModel
+from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.services.interaction_counters.counters import (
+    InteractionCounters,
+    interaction_counters,
+)
+from content_discovery.settings import settings
+
+AUTHOR = "writer"
+
+
+async def _stored_likes(dbsession: AsyncSession, snap_id: uuid.UUID) -> int:
+    """Likes in the table, without the pending ones."""
+    query = select(SnapsModel.likes).where(SnapsModel.id == snap_id)
+    return (await dbsession.execute(query)).scalar_one()
+
+
+async def _counts(snap_dao: SnapDAO, snap_id: str) -> Tuple[int, int]:
+    """Likes and favs of a loaded snap."""
+    snap = await snap_dao.get_snap_from_id(snap_id)
+    assert snap is not None
+    return snap.likes, snap.favs
+
+
+@pytest.mark.anyio
+async def test_repeated_interactions(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """Liking or unliking twice changes the counter once."""
+    snap = await SnapDAO(dbsession).create_snaps_model(AUTHOR, "snap", 1)
+    snap_id = str(snap.id)
+    for user_id in ("first", "first", "second"):
+        url = fastapi_app.url_path_for("like_snap", user_id=user_id, snap_id=snap_id)
+        await client.post(url)
+    for _ in range(2):
+        url = fastapi_app.url_path_for(
+            "unlike_snap",
+            user_id="first",
+            snap_id=snap_id,
+        )
+        await client.delete(url)
+
+    assert await _stored_likes(dbsession, snap.id) == 1
+
+
+@pytest.mark.anyio
+async def test_interaction_statements(dbsession: AsyncSession) -> None:
+    """Writes return the interaction and author, only when they happen."""
+    snap = await SnapDAO(dbsession).create_snaps_model(AUTHOR, "snap", 1)
+    snap_id = str(snap.id)
+    interaction_dao = InteractionDAO(dbsession)
+
+    shared = await interaction_dao.add(ShareModel, "sharer", snap_id)
+    again = await interaction_dao.add(ShareModel, "sharer", snap_id)
+    missing = await interaction_dao.add(ShareModel, "sharer", str(uuid.uuid4()))
+    invalid = await interaction_dao.add(ShareModel, "sharer", "not a snap")
+    unshared = await interaction_dao.remove(ShareModel, "sharer", snap_id)
+
+    assert shared is not None
+    share, author_id = shared
+    assert (share.user_id, share.snap_id, author_id) == ("sharer", snap.id, AUTHOR)
+    assert [again, missing, invalid] == [None, None, None]
+    assert unshared is not None
+    assert unshared[0].created_at == share.created_at
+
+
+@pytest.mark.anyio
+async def test_write_behind_counters(
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Pending changes are read with the snaps and written by flush."""
+    monkeypatch.setattr(settings, "interaction_counters", CounterMode.write_behind)
+    monkeypatch.setattr(interaction_counters, "_pending", {})
+    snap_dao = SnapDAO(dbsession)
+    snap = await snap_dao.create_snaps_model(AUTHOR, "snap", 1)
+    snap_uuid = snap.id
+    snap_id = str(snap_uuid)
+    interaction_dao = InteractionDAO(dbsession)
+    for user_id in ("first", "second", "third"):
+        await interaction_counters.add(interaction_dao, LikeModel, user_id, snap_id)
+    await interaction_counters.remove(interaction_dao, LikeModel, "first", snap_id)
+    await interaction_counters.add(interaction_dao, FavModel, "first", snap_id)
+    dbsession.expunge_all()
+
+    loaded = await _counts(snap_dao, snap_id)
+    stored = await _stored_likes(dbsession, snap_uuid)
+    await interaction_counters.flush(dbsession)
+    dbsession.expunge_all()
+    flushed = await _counts(snap_dao, snap_id)
+
+    assert loaded == (2, 1)
+    assert stored == 0
+    assert flushed == (2, 1)
+    assert interaction_counters.pending(snap_uuid) is None
+
+
+@pytest.mark.anyio
+async def test_failed_flush_keeps_changes(
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Changes that could not be written are added to the next flush."""
+    monkeypatch.setattr(settings, "interaction_counters", CounterMode.write_behind)
+    snap = await SnapDAO(dbsession).create_snaps_model(AUTHOR, "snap", 1)
+    interaction_dao = InteractionDAO(dbsession)
+    counters = InteractionCounters()
+    await counters.add(interaction_dao, ShareModel, "first", str(snap.id))
+
+    async def _fail(*args: object) -> None:  # noqa: WPS430
+        raise RuntimeError("database is gone")
+
+    monkeypatch.setattr(SnapDAO, "add_to_counters", _fail)
+    with pytest.raises(RuntimeError):
+        await counters.flush(dbsession)
+    await counters.add(interaction_dao, ShareModel, "second", str(snap.id))
+
+    assert counters.pending(snap.id) == (0, 2, 0)
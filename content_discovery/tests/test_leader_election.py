@@ -0,0 +1,71 @@
+"""Tests for the election of the process running the background jobs."""
+import asyncio
+from functools import partial
+from typing import Callable, List
+
+import pytest
+from prometheus_client import REGISTRY
+
+from content_discovery.services.leader_election.election import INSTANCE, LeaderElection
+
+ELECTION = "content_discovery_test"
+RETRY = 0.05
+
+
+async def _job(started: List[str], name: str) -> None:
+    started.append(name)
+    await asyncio.Event().wait()
+
+
+async def _until(condition: Callable[[], bool]) -> None:
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(RETRY)
+    raise AssertionError("condition not met")
+
+
+async def _leave(election: LeaderElection, task: "asyncio.Task[None]") -> None:
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    election.stop()
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_engine")
+async def test_a_single_process_leads() -> None:
+    """Jobs run in one process at a time, another one takes over."""
+    started: List[str] = []
+    first = LeaderElection(ELECTION, [partial(_job, started, "first")], RETRY)
+    second = LeaderElection(ELECTION, [partial(_job, started, "second")], RETRY)
+    first_task = asyncio.create_task(first.run())
+    await _until(lambda: first.leading)
+    second_task = asyncio.create_task(second.run())
+    await asyncio.sleep(RETRY * 4)
+
+    assert not second.leading
+    assert started == ["first"]
+    await _leave(first, first_task)
+    await _until(lambda: second.leading)
+    assert started == ["first", "second"]
+    labels = {"election": ELECTION, "instance": INSTANCE}
+    assert REGISTRY.get_sample_value("content_discovery_leader", labels) == 1
+    await _leave(second, second_task)
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("_engine")
+async def test_leader_steps_down_when_a_job_fails() -> None:
+    """A failed job is run again after a new election."""
+    runs: List[str] = []
+
+    async def failing_job() -> None:  # noqa: WPS430
+        runs.append("run")
+        raise RuntimeError("job failed")
+
+    election = LeaderElection(ELECTION, [failing_job], RETRY)
+    task = asyncio.create_task(election.run())
+    await _until(lambda: len(runs) >= 2)
+
+    assert not task.done()
+    await _leave(election, task)
@@ -0,0 +1,127 @@
+"""Tests for the engagement metrics of users."""
+import datetime
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.settings import settings
+from content_discovery.web.api.metrics.views import user_metrics_cache
+
+AUTHOR = "author"
+
+
+def _date(days: int) -> str:
+    moment = datetime.datetime.utcnow() + datetime.timedelta(days=days)
+    return moment.strftime("%Y-%m-%d")
+
+
+async def _write_snaps(dbsession: AsyncSession) -> None:
+    """A snap of today with interactions and a reply, and an older one."""
+    snaps_dao = SnapDAO(dbsession)
+    recent = await snaps_dao.create_snaps_model(AUTHOR, "recent", 1)
+    old = await snaps_dao.create_snaps_model(AUTHOR, "old", 1)
+    await snaps_dao.create_reply_snap("replier", "reply", str(recent.id), 1)
+    for _ in range(2):
+        await snaps_dao.increase_likes(str(recent.id))
+    await snaps_dao.increase_shares(str(recent.id))
+    await snaps_dao.increase_favs(str(old.id))
+    ten_days_ago = datetime.datetime.utcnow() - datetime.timedelta(days=10)
+    await dbsession.execute(
+        update(SnapsModel)
+        .where(SnapsModel.id == old.id)
+        .values(created_at=ten_days_ago),
+    )
+
+
+@pytest.mark.anyio
+async def test_metrics_are_summed_in_sql(dbsession: AsyncSession) -> None:
+    """Totals, totals of the period and a zero filled daily breakdown."""
+    await _write_snaps(dbsession)
+
+    metrics = await SnapDAO(dbsession).get_snap_metrics_by_user(
+        AUTHOR,
+        _date(-2),
+        _date(1),
+    )
+
+    summary = metrics[0]
+    daily = summary.pop("daily")
+    assert summary == {
+        "total_snaps": 2,
+        "period_snaps": 1,
+        "total_likes": 2,
+        "period_likes": 2,
+        "total_shares": 1,
+        "period_shares": 1,
+        "total_favs": 1,
+        "period_favs": 0,
+        "total_replies": 1,
+        "period_replies": 1,
+    }
+    dates = [day["date"] for day in daily]
+    assert dates == [_date(days) for days in range(-2, 2)]
+    assert [day["snaps"] for day in daily] == [0, 0, 1, 0]
+    assert daily[2] == {
+        "date": _date(0),
+        "snaps": 1,
+        "likes": 2,
+        "shares": 1,
+        "favs": 0,
+        "replies": 1,
+    }
+
+
+@pytest.mark.anyio
+async def test_metrics_endpoint_is_cached(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """Metrics of a user and period are cached, bad dates give nothing."""
+    user_metrics_cache.clear()
+    await _write_snaps(dbsession)
+    url = fastapi_app.url_path_for(
+        "get_user_metrics",
+        user_id=AUTHOR,
+        start_date=_date(-2),
+        end_date=_date(1),
+    )
+
+    metrics = await client.get(url)
+    await SnapDAO(dbsession).create_snaps_model(AUTHOR, "later", 1)
+    cached = await client.get(url)
+    bad = await client.get(url.replace(_date(1), "tomorrow"))
+
+    assert metrics.json()[0]["total_snaps"] == 2
+    assert cached.json() == metrics.json()
+    assert not bad.json()
+    user_metrics_cache.clear()
+
+
+@pytest.mark.anyio
+async def test_metrics_period_is_limited(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Periods of more days than the limit are rejected before any query."""
+    monkeypatch.setattr(settings, "user_metrics_max_days", 4)
+    user_metrics_cache.clear()
+
+    statuses = []
+    for start in (-3, -4):
+        url = fastapi_app.url_path_for(
+            "get_user_metrics",
+            user_id=AUTHOR,
+            start_date=_date(start),
+            end_date=_date(0),
+        )
+        statuses.append((await client.get(url)).status_code)
+
+    assert statuses == [200, 422]
+    user_metrics_cache.clear()
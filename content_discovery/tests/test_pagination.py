@@ -0,0 +1,66 @@
+"""Tests for the keyset pagination of feeds."""
+import datetime
+from typing import Any, Dict, List
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from content_discovery.db.dao.share_dao import ShareDAO
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.tests.identity_socializer_stub import IdentitySocializerStub
+
+READER = "reader"
+
+
+@pytest.mark.anyio
+async def test_feed_cursor_walks_every_entry_once(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+    identity_socializer_stub: IdentitySocializerStub,
+) -> None:
+    """Paging with cursors returns the whole feed in order, ties included."""
+    identity_socializer_stub.follow(READER, "writer")
+    snap_dao = SnapDAO(dbsession)
+    moment = datetime.datetime(2023, 1, 1)
+    expected: List[str] = []
+    for index in range(7):
+        snap = await snap_dao.create_snaps_model("writer", f"snap {index}", 1)
+        snap.created_at = moment + datetime.timedelta(minutes=index // 2)
+        expected.append(str(snap.id))
+    await ShareDAO(dbsession).create_share_model("writer", expected[0])
+    await dbsession.flush()
+    url = fastapi_app.url_path_for("get_snaps")
+
+    seen: List[str] = []
+    params: Dict[str, Any] = {"user_id": READER, "limit": 3}
+    while True:
+        response = await client.get(url, params=params)
+        page = response.json()
+        seen.extend(snap["id"] for snap in page["snaps"])
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+
+    assert seen[0] == expected[0]
+    assert seen[1:] == sorted(
+        expected,
+        key=lambda snap_id: (expected.index(snap_id) // 2, snap_id),
+        reverse=True,
+    )
+
+
+@pytest.mark.anyio
+async def test_invalid_cursor_is_rejected(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    """A cursor that was not issued by the service is a bad request."""
+    url = fastapi_app.url_path_for("get_snaps_from_user_by_admin", user_id="writer")
+
+    response = await client.get(url, params={"cursor": "not a cursor"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
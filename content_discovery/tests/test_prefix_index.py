@@ -0,0 +1,40 @@
+"""Tests for the in-process prefix index."""
+import random
+from typing import Dict, List
+
+from content_discovery.prefix_index import PrefixIndex
+
+WEIGHTS = {"#cat": 5, "#cats": 9, "#car": 5, "#dog": 50, "#ca": 1}
+
+
+def _brute_force(weights: Dict[str, float], prefix: str, limit: int) -> List[str]:
+    matching = [name for name in weights if name.startswith(prefix)]
+    matching.sort(key=lambda name: (-weights[name], name))
+    return matching[:limit]
+
+
+def test_completions_are_ranked_by_weight() -> None:
+    """Only strings with the prefix are returned, heaviest first."""
+    index = PrefixIndex(max_results=3)
+    index.load(WEIGHTS)
+
+    assert index.complete("#ca", 10) == ["#cats", "#car", "#cat"]
+    assert index.complete("#cat", 1) == ["#cats"]
+    assert not index.complete("#cb", 10)
+
+
+def test_best_completions_follow_added_weights() -> None:
+    """Prefixes with many strings stay exact as strings are added."""
+    generator = random.Random(7)  # noqa: S311
+    index = PrefixIndex(max_results=5, scan_limit=5)
+    weights: Dict[str, float] = {}
+    for seed in range(200):
+        weights["#{0}".format(seed * 3)] = 1
+    index.load(weights)
+
+    for _ in range(2000):
+        key = "#{0}".format(generator.randrange(400))
+        weights[key] = weights.get(key, 0) + 1
+        index.add(key)
+        prefix = key[: generator.randrange(1, len(key) + 1)]
+        assert index.complete(prefix, 5) == _brute_force(weights, prefix, 5)
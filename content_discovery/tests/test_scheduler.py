@@ -0,0 +1,117 @@
+"""Tests for the scheduler of the periodic background jobs."""
+import asyncio
+from typing import Callable, List
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from content_discovery.services.scheduler.scheduler import ScheduledJob, Scheduler
+from content_discovery.settings import settings
+
+INTERVAL = 0.01
+
+
+async def _until(condition: Callable[[], bool]) -> None:
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(INTERVAL)
+    raise AssertionError("condition not met")
+
+
+@pytest.fixture
+def scheduler(
+    _engine: AsyncEngine,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Scheduler:
+    """
+    Scheduler without jitter.
+
+    :param _engine: current engine.
+    :param monkeypatch: pytest monkeypatch.
+    :returns: scheduler running jobs with sessions of the engine.
+    """
+    monkeypatch.setattr(settings, "scheduler_jitter", 0)
+    monkeypatch.setattr(settings, "scheduler_max_backoff", INTERVAL * 4)
+    return Scheduler(async_sessionmaker(_engine, expire_on_commit=False))
+
+
+def test_failures_back_off() -> None:
+    """The delay doubles after each failure, up to max_backoff."""
+    job = ScheduledJob("job", lambda session: asyncio.sleep(0), 10, 0, 35)
+
+    delays = [job.delay(failures) for failures in range(4)]
+
+    assert delays == [10, 20, 35, 35]
+
+
+def test_jitter_spreads_delays() -> None:
+    """Delays move around the interval by at most jitter times it."""
+    job = ScheduledJob("job", lambda session: asyncio.sleep(0), 10, 0.1, 10)
+
+    delays = {job.delay(0) for _ in range(50)}
+
+    assert len(delays) > 1
+    assert all(9 <= delay <= 11 for delay in delays)
+
+
+@pytest.mark.anyio
+async def test_runs_get_new_sessions(scheduler: Scheduler) -> None:
+    """Every run is given its own session."""
+    sessions: List[AsyncSession] = []
+
+    async def job(session: AsyncSession) -> None:  # noqa: WPS430
+        sessions.append(session)
+
+    scheduler.add("test_sessions", job, INTERVAL)
+    task = asyncio.create_task(scheduler.run())
+    await _until(lambda: len(sessions) >= 3)
+    await scheduler.stop(1)
+    await task
+
+    assert len(set(map(id, sessions))) == len(sessions)
+    labels = {"job": "test_sessions", "outcome": "success"}
+    assert REGISTRY.get_sample_value("content_discovery_job_runs_total", labels)
+
+
+@pytest.mark.anyio
+async def test_failures_are_retried(scheduler: Scheduler) -> None:
+    """A failing job keeps being run, and its failures are counted."""
+    runs: List[str] = []
+
+    async def job(session: AsyncSession) -> None:  # noqa: WPS430
+        runs.append("run")
+        raise RuntimeError("job failed")
+
+    scheduler.add("test_failures", job, INTERVAL)
+    task = asyncio.create_task(scheduler.run())
+    await _until(lambda: len(runs) >= 3)
+    await scheduler.stop(1)
+    await task
+
+    labels = {"job": "test_failures", "outcome": "failure"}
+    failures = REGISTRY.get_sample_value("content_discovery_job_runs_total", labels)
+    assert failures == len(runs)
+
+
+@pytest.mark.anyio
+async def test_stop_waits_for_running_jobs(scheduler: Scheduler) -> None:
+    """Runs do not overlap and stopping lets the current one finish."""
+    runs: List[str] = []
+    release = asyncio.Event()
+
+    async def job(session: AsyncSession) -> None:  # noqa: WPS430
+        runs.append("start")
+        await release.wait()
+        runs.append("end")
+
+    scheduler.add("test_stop", job, INTERVAL)
+    task = asyncio.create_task(scheduler.run())
+    await asyncio.sleep(INTERVAL * 4)
+    stopping = asyncio.create_task(scheduler.stop(1))
+    await asyncio.sleep(INTERVAL)
+    release.set()
+    await asyncio.gather(stopping, task)
+
+    assert runs == ["start", "end"]
@@ -0,0 +1,137 @@
+"""Tests for the content search."""
+import datetime
+from typing import Any, AsyncGenerator, Dict, List
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.tests.identity_socializer_stub import IdentitySocializerStub
+
+READER = "reader"
+CONTENTS = (
+    "the quick brown fox",
+    "a brown dog and a quick fox",
+    "quickly, brown foxes",
+    "fox fox fox, quick and brown",
+    "nothing to see here",
+)
+
+
+@pytest.fixture
+async def trigrams(dbsession: AsyncSession) -> AsyncGenerator[None, None]:
+    """
+    Install pg_trgm for the test, skip it if the extension is not available.
+
+    :param dbsession: session of the test, rolled back afterwards.
+    :yield: nothing.
+    """
+    available = await dbsession.execute(
+        text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"),
+    )
+    if available.first() is None:
+        pytest.skip("pg_trgm is not available")
+    await dbsession.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    yield
+
+
+async def _create_snaps(dbsession: AsyncSession) -> List[str]:
+    snap_dao = SnapDAO(dbsession)
+    moment = datetime.datetime(2023, 1, 1)
+    snap_ids = []
+    for index, content in enumerate(CONTENTS):
+        snap = await snap_dao.create_snaps_model("writer", content, 1)
+        snap.created_at = moment + datetime.timedelta(minutes=index)
+        snap_ids.append(str(snap.id))
+    await dbsession.flush()
+    return snap_ids
+
+
+async def _search(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    content: str,
+    mode: str,
+) -> List[str]:
+    url = fastapi_app.url_path_for("filter_snaps")
+    params = {"user_id": READER, "content": content, "mode": mode}
+    response = await client.get(url, params=params)
+    return [snap["id"] for snap in response.json()["snaps"]]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("identity_socializer_stub")
+async def test_search_modes(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """Words, phrases, prefixes and substrings match what they should."""
+    ids = await _create_snaps(dbsession)
+
+    words = await _search(client, fastapi_app, "quick fox -dog", "words")
+    phrase = await _search(client, fastapi_app, "quick brown", "phrase")
+    prefix = await _search(client, fastapi_app, "quick fox", "prefix")
+    substring = await _search(client, fastapi_app, "ly, br", "substring")
+
+    assert words == [ids[3], ids[0]]  # the repeated fox ranks first
+    assert phrase == [ids[0]]
+    assert set(prefix) == set(ids[:4])
+    assert substring == [ids[2]]
+
+
+@pytest.mark.anyio
+async def test_search_cursor_walks_every_result_once(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+    identity_socializer_stub: IdentitySocializerStub,
+) -> None:
+    """Search results are paged with the cursor sent in X-Next-Cursor."""
+    ids = await _create_snaps(dbsession)
+    url = fastapi_app.url_path_for("admin_filter_snaps")
+    everything = await client.get(url, params={"content": "brown", "limit": 10})
+
+    seen: List[str] = []
+    params: Dict[str, Any] = {"content": "brown", "limit": 2}
+    while True:
+        response = await client.get(url, params=params)
+        seen.extend(snap["id"] for snap in response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    assert seen == [snap["id"] for snap in everything.json()]
+    assert set(seen) == set(ids[:4])
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("identity_socializer_stub", "trigrams")
+async def test_similar_search_gets_past_typos(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """Similar searches match misspelled words."""
+    ids = await _create_snaps(dbsession)
+
+    similar = await _search(client, fastapi_app, "quck", "similar")
+
+    assert similar == [ids[3], ids[1], ids[0]]  # "quickly" is too far
+
+
+@pytest.mark.anyio
+async def test_short_substrings_are_rejected(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+) -> None:
+    """Substrings too short for the trigram index are a bad request."""
+    url = fastapi_app.url_path_for("admin_filter_snaps")
+
+    response = await client.get(url, params={"content": "ox", "mode": "substring"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,161 @@
+"""Tests for the rollups of snap counts."""
+import datetime
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from content_discovery.constants import Frequency, Privacy
+from content_discovery.db.dao.snap_count_dao import SnapCountDAO
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.models.snap_count_model import SnapCountDeltaModel
+from content_discovery.db.models.snaps_model import SnapsModel
+
+PUBLIC = Privacy.PUBLIC.value
+FOLLOWERS = Privacy.FOLLOWERS.value
+
+
+@pytest.mark.anyio
+async def test_counts_follow_snap_writes(dbsession: AsyncSession) -> None:
+    """Inserts, deletes and privacy changes update the counts."""
+    snaps_dao = SnapDAO(dbsession)
+    kept = await snaps_dao.create_snaps_model("writer", "kept", PUBLIC)
+    hidden = await snaps_dao.create_snaps_model("writer", "hidden", PUBLIC)
+    deleted = await snaps_dao.create_snaps_model("writer", "deleted", FOLLOWERS)
+    await snaps_dao.increase_likes(str(kept.id))
+    await dbsession.execute(
+        update(SnapsModel).where(SnapsModel.id == hidden.id).values(privacy=FOLLOWERS),
+    )
+    await snaps_dao.delete_snap(str(deleted.id))
+
+    snap_count_dao = SnapCountDAO(dbsession)
+    totals = await snap_count_dao.get_totals()
+    minutes = await snap_count_dao.get_snap_time_series(Frequency.per_minute, 3)
+    public_days = await snap_count_dao.get_snap_time_series(
+        Frequency.daily,
+        1,
+        privacy=PUBLIC,
+    )
+
+    assert totals == {PUBLIC: 1, FOLLOWERS: 1}
+    assert [count for _, count in minutes[:-2]] == [0]
+    assert sum(count for _, count in minutes) == 2
+    current = datetime.datetime.utcnow().replace(second=0, microsecond=0)
+    assert minutes[-1][0] == current
+    assert [count for _, count in public_days] == [1]
+
+
+@pytest.mark.anyio
+async def test_deltas_are_moved_into_rollups(dbsession: AsyncSession) -> None:
+    """Compacting keeps the counts and leaves no delta."""
+    snaps_dao = SnapDAO(dbsession)
+    for privacy in (PUBLIC, PUBLIC, FOLLOWERS):
+        await snaps_dao.create_snaps_model("writer", "snap", privacy)
+    snap_count_dao = SnapCountDAO(dbsession)
+    pending = await snap_count_dao.get_totals()
+
+    await snap_count_dao.compact()
+
+    deltas = select(func.count()).select_from(SnapCountDeltaModel)
+    assert (await dbsession.execute(deltas)).scalar_one() == 0
+    assert await snap_count_dao.get_totals() == pending == {PUBLIC: 2, FOLLOWERS: 1}
+
+
+@pytest.mark.anyio
+async def test_snap_writes_do_not_wait_for_each_other(_engine: AsyncEngine) -> None:
+    """A snap is written while another one in the same minute is uncommitted."""
+    first = AsyncSession(_engine)
+    second = AsyncSession(_engine)
+    await SnapDAO(first).create_snaps_model("writer", "first", PUBLIC)
+    await second.execute(text("SET LOCAL lock_timeout = '1s'"))
+
+    written = await SnapDAO(second).create_snaps_model("writer", "second", PUBLIC)
+
+    await first.rollback()
+    await second.rollback()
+    await first.close()
+    await second.close()
+    assert written.content == "second"
+
+
+@pytest.mark.anyio
+async def test_counter_updates_are_not_counted(dbsession: AsyncSession) -> None:
+    """The update trigger only runs for changes of privacy or creation time."""
+    await dbsession.execute(text("SET LOCAL track_functions = 'pl'"))
+    snaps_dao = SnapDAO(dbsession)
+    snap = await snaps_dao.create_snaps_model("writer", "snap", PUBLIC)
+    calls = text(
+        "SELECT coalesce(sum(calls), 0) FROM pg_stat_xact_user_functions "
+        "WHERE funcname = 'count_updated_snap'",
+    )
+
+    await snaps_dao.increase_likes(str(snap.id))
+    await snaps_dao.add_to_counters({snap.id: (1, 1, 1)})
+    after_counters = (await dbsession.execute(calls)).scalar_one()
+    await dbsession.execute(
+        update(SnapsModel).where(SnapsModel.id == snap.id).values(privacy=FOLLOWERS),
+    )
+    after_privacy = (await dbsession.execute(calls)).scalar_one()
+
+    assert (after_counters, after_privacy) == (0, 1)
+
+
+@pytest.mark.anyio
+async def test_calendar_months(dbsession: AsyncSession) -> None:
+    """Monthly points start on the first day of the month."""
+    snap = await SnapDAO(dbsession).create_snaps_model("writer", "old", PUBLIC)
+    this_month = datetime.datetime.utcnow().replace(
+        day=1,
+        hour=0,
+        minute=0,
+        second=0,
+        microsecond=0,
+    )
+    two_months_ago = (this_month - datetime.timedelta(days=40)).replace(day=1)
+    await dbsession.execute(
+        update(SnapsModel)
+        .where(SnapsModel.id == snap.id)
+        .values(created_at=two_months_ago + datetime.timedelta(days=3)),
+    )
+
+    months = await SnapCountDAO(dbsession).get_snap_time_series(Frequency.monthly, 3)
+
+    assert months[0] == (two_months_ago, 1)
+    assert [count for _, count in months[1:]] == [0, 0]
+    assert months[-1][0] == this_month
+
+
+@pytest.mark.anyio
+async def test_stats_endpoints(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """Frequencies are zero filled and rates split by privacy."""
+    snaps_dao = SnapDAO(dbsession)
+    await snaps_dao.create_snaps_model("writer", "public", PUBLIC)
+    await snaps_dao.create_snaps_model("writer", "followers", FOLLOWERS)
+
+    frequencies = fastapi_app.url_path_for(
+        "get_snap_frequencies",
+        frequency=Frequency.hourly.value,
+        number="4",
+    )
+    hourly = await client.get(frequencies)
+    rates = await client.get(fastapi_app.url_path_for("snap_rates"))
+    monthly = await client.get(
+        fastapi_app.url_path_for("get_snap_frequencies_redefinition"),
+    )
+
+    assert hourly.json()[:2] == [0, 0]
+    assert sum(hourly.json()) == 2
+    assert rates.json() == {
+        "total_snaps": "2",
+        "private_snaps": "1",
+        "public_snaps": "1",
+    }
+    month = datetime.datetime.utcnow().strftime("%B %Y")
+    assert monthly.json()[-1] == {"month": month, "value": "2"}
+    assert len(monthly.json()) == 5
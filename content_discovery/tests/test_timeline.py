@@ -0,0 +1,315 @@
+"""Tests for the materialized home timelines."""
+import asyncio
+from typing import Any, Dict, FrozenSet, Iterator, List
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.dao.timeline_dao import TimelineDAO
+from content_discovery.db.models.high_fanout_author_model import HighFanoutAuthorModel
+from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.db.models.timeline_model import TimelineModel
+from content_discovery.db.models.timeline_state_model import TimelineStateModel
+from content_discovery.settings import settings
+from content_discovery.tests.identity_socializer_stub import IdentitySocializerStub
+from content_discovery.web.api import timeline
+
+READER = "reader"
+WRITER = "writer"
+
+
+@pytest.fixture
+def low_fanout_threshold(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """
+    Authors with more than one follower are not fanned out on write.
+
+    :yield: nothing.
+    """
+    monkeypatch.setattr(settings, "timeline_fanout_threshold", 1)
+    timeline.recent_snaps_cache.clear()
+    yield
+    timeline.recent_snaps_cache.clear()
+
+
+async def _feed(client: AsyncClient, fastapi_app: FastAPI) -> List[Any]:
+    url = fastapi_app.url_path_for("get_snaps")
+    response = await client.get(url, params={"user_id": READER})
+    snaps = response.json()["snaps"]
+    return [(snap["id"], snap["is_shared_by"]) for snap in snaps]
+
+
+async def _page_through(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    limit: int,
+) -> List[str]:
+    """Ids of the snaps of every page of the feed, following the cursors."""
+    url = fastapi_app.url_path_for("get_snaps")
+    seen: List[str] = []
+    params: Dict[str, Any] = {"user_id": READER, "limit": limit}
+    while True:
+        response = await client.get(url, params=params)
+        page = response.json()
+        seen.extend(snap["id"] for snap in page["snaps"])
+        if page["next_cursor"] is None:
+            return seen
+        params["cursor"] = page["next_cursor"]
+
+
+async def _post(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    content: str,
+    author: str = WRITER,
+) -> str:
+    url = fastapi_app.url_path_for("post_snap")
+    body = {"user_id": author, "content": content, "privacy": 1}
+    response = await client.post(url, json=body)
+    return str(response.json()["id"])
+
+
+@pytest.mark.anyio
+async def test_posts_are_fanned_out(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+    identity_socializer_stub: IdentitySocializerStub,
+) -> None:
+    """New snaps are written to the timelines of the author's followers."""
+    identity_socializer_stub.follow(READER, WRITER)
+    old = await SnapDAO(dbsession).create_snaps_model(WRITER, "old", 1)
+    assert await _feed(client, fastapi_app) == [(str(old.id), [])]
+
+    new = await _post(client, fastapi_app, "new")
+
+    entries = await dbsession.execute(
+        select(func.count()).where(TimelineModel.snap_id == new),
+    )
+    assert entries.scalar_one() == 1  # the writer has no timeline yet
+    expected: List[Any] = [(new, []), (str(old.id), [])]
+    assert await _feed(client, fastapi_app) == expected
+
+
+@pytest.mark.anyio
+async def test_shares_are_fanned_out_and_removed(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    identity_socializer_stub: IdentitySocializerStub,
+) -> None:
+    """Shares reach the sharer's followers and disappear when unshared."""
+    identity_socializer_stub.follow(READER, "sharer")
+    await _feed(client, fastapi_app)
+    snap_id = await _post(client, fastapi_app, "worth sharing")
+    share = {"user_id": "sharer", "snap_id": snap_id}
+
+    await client.post(fastapi_app.url_path_for("share_snap", **share))
+    shared_feed = await _feed(client, fastapi_app)
+    await client.delete(fastapi_app.url_path_for("unshare_snap", **share))
+
+    assert shared_feed == [(snap_id, ["sharer"])]
+    assert not await _feed(client, fastapi_app)
+
+
+@pytest.mark.anyio
+async def test_private_and_deleted_snaps_are_removed(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    identity_socializer_stub: IdentitySocializerStub,
+) -> None:
+    """Hiding a snap removes it from timelines and showing it puts it back."""
+    identity_socializer_stub.follow(READER, WRITER)
+    await _feed(client, fastapi_app)
+    snap_id = await _post(client, fastapi_app, "now you see me")
+    snap = {"user_id": WRITER, "snap_id": snap_id}
+
+    await client.post(fastapi_app.url_path_for("make_snap_private", **snap))
+    private_feed = await _feed(client, fastapi_app)
+    await client.post(fastapi_app.url_path_for("make_snap_public", **snap))
+    public_feed = await _feed(client, fastapi_app)
+    await client.delete(fastapi_app.url_path_for("delete_snap", snap_id=snap_id))
+
+    assert not private_feed
+    assert public_feed == [(snap_id, [])]
+    assert not await _feed(client, fastapi_app)
+
+
+@pytest.mark.anyio
+async def test_follow_changes_rebuild_the_timeline(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+    identity_socializer_stub: IdentitySocializerStub,
+) -> None:
+    """Following someone brings their earlier snaps into the timeline."""
+    snap = await SnapDAO(dbsession).create_snaps_model(WRITER, "earlier", 1)
+    assert not await _feed(client, fastapi_app)
+
+    identity_socializer_stub.follow(READER, WRITER)
+    url = fastapi_app.url_path_for("invalidate_follow_graph", user_id=READER)
+    await client.post(url)
+
+    assert not await TimelineDAO(dbsession).is_built(READER)
+    assert await _feed(client, fastapi_app) == [(str(snap.id), [])]
+
+
+@pytest.mark.anyio
+async def test_timelines_are_built_newest_first(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+    identity_socializer_stub: IdentitySocializerStub,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Older entries than the ones built are read from snaps and shares."""
+    monkeypatch.setattr(settings, "timeline_rebuild_limit", 2)
+    identity_socializer_stub.follow(READER, WRITER)
+    snap_dao = SnapDAO(dbsession)
+    snap_ids = []
+    for index in range(5):
+        snap = await snap_dao.create_snaps_model(WRITER, f"#{index}", 1)
+        snap_ids.append(str(snap.id))
+    newest_first = snap_ids[::-1]
+
+    unbuilt = await _feed(client, fastapi_app)
+    built = await dbsession.execute(
+        select(func.count()).where(TimelineModel.owner_id == READER),
+    )
+    url = fastapi_app.url_path_for("get_snaps")
+    params: Dict[str, Any] = {"user_id": READER, "limit": 2, "offset": 3}
+    response = await client.get(url, params=params)
+    deep_page = [snap["id"] for snap in response.json()["snaps"]]
+
+    assert unbuilt == [(snap_id, []) for snap_id in newest_first]
+    assert built.scalar_one() == 2
+    paged = await _page_through(client, fastapi_app, 2)
+    assert paged == newest_first
+    assert deep_page == newest_first[3:]
+
+
+@pytest.mark.anyio
+async def test_snaps_written_while_building_are_kept(_engine: AsyncEngine) -> None:
+    """A snap skipped by fan-out before the build started is copied by it."""
+    writing = AsyncSession(_engine)
+    building = AsyncSession(_engine)
+    snap = await SnapDAO(writing).create_snaps_model(WRITER, "snap", 1)
+    snap_id = snap.id
+    await TimelineDAO(writing).fan_out([READER], snap_id, snap.created_at)
+    rebuild = asyncio.create_task(
+        TimelineDAO(building).rebuild(READER, {READER, WRITER}, 10),
+    )
+    await asyncio.sleep(0.2)
+    waited = not rebuild.done()
+    await writing.commit()
+    await rebuild
+
+    timeline_dao = TimelineDAO(building)
+    entries = await timeline_dao.get_timeline(READER, {WRITER})
+    is_built = await timeline_dao.is_built(READER)
+    for model in (TimelineModel, TimelineStateModel, SnapsModel):
+        await building.execute(delete(model))
+    await building.commit()
+    await writing.close()
+    await building.close()
+
+    assert waited
+    assert [entry.snap.id for entry in entries] == [snap_id]
+    assert is_built
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("low_fanout_threshold")
+async def test_high_fanout_authors_are_merged_on_read(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+    identity_socializer_stub: IdentitySocializerStub,
+) -> None:
+    """Snaps of authors with many followers are pulled instead of pushed."""
+    identity_socializer_stub.follow(READER, "celebrity")
+    identity_socializer_stub.follow("fan", "celebrity")
+    identity_socializer_stub.follow(READER, WRITER)
+    await _feed(client, fastapi_app)
+
+    posts = []
+    for index in range(3):
+        posts.append(await _post(client, fastapi_app, f"#{index}", "celebrity"))
+        posts.append(await _post(client, fastapi_app, f"#{index}"))
+
+    pushed = await dbsession.execute(
+        select(func.count()).where(TimelineModel.snap_id.in_(posts)),
+    )
+    assert pushed.scalar_one() == 3  # only the writer's
+    assert await dbsession.get(HighFanoutAuthorModel, "celebrity")
+
+    assert await _page_through(client, fastapi_app, 4) == posts[::-1]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("low_fanout_threshold")
+async def test_old_high_fanout_snaps_are_pulled(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    identity_socializer_stub: IdentitySocializerStub,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Pages older than the recent snaps of an author read them from snaps."""
+    monkeypatch.setattr(settings, "timeline_merge_window", 0)
+    identity_socializer_stub.follow(READER, "celebrity")
+    identity_socializer_stub.follow("fan", "celebrity")
+    identity_socializer_stub.follow(READER, WRITER)
+    await _feed(client, fastapi_app)
+
+    posts = []
+    for index in range(3):
+        posts.append(await _post(client, fastapi_app, f"#{index}", "celebrity"))
+        posts.append(await _post(client, fastapi_app, f"#{index}"))
+
+    assert await _page_through(client, fastapi_app, 4) == posts[::-1]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("low_fanout_threshold")
+async def test_pulled_snaps_have_fresh_counters(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    identity_socializer_stub: IdentitySocializerStub,
+) -> None:
+    """Only the ids of recent snaps are cached, their counters are read."""
+    identity_socializer_stub.follow(READER, "celebrity")
+    identity_socializer_stub.follow("fan", "celebrity")
+    await _feed(client, fastapi_app)
+    snap_id = await _post(client, fastapi_app, "popular", "celebrity")
+    url = fastapi_app.url_path_for("get_snaps")
+
+    before = await client.get(url, params={"user_id": READER})
+    share = {"user_id": "fan", "snap_id": snap_id}
+    await client.post(fastapi_app.url_path_for("share_snap", **share))
+    after = await client.get(url, params={"user_id": READER})
+
+    assert [snap["shares"] for snap in before.json()["snaps"]] == [0]
+    assert [snap["shares"] for snap in after.json()["snaps"]] == [1]
+
+
+@pytest.mark.anyio
+@pytest.mark.usefixtures("low_fanout_threshold", "identity_socializer_stub")
+async def test_high_fanout_authors_skip_their_followers(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Followers of authors above the threshold are not loaded on every post."""
+    counted: List[str] = []
+
+    async def _follower_ids(user_id: str) -> FrozenSet[str]:  # noqa: WPS430
+        counted.append(user_id)
+        return frozenset(("fan", READER))
+
+    monkeypatch.setattr(timeline, "follower_ids", _follower_ids)
+    for index in range(3):
+        await _post(client, fastapi_app, f"#{index}", "celebrity")
+
+    assert counted == ["celebrity"]
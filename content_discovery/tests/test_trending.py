@@ -0,0 +1,208 @@
+"""Tests for the trending hashtags."""
+import datetime
+from typing import Any, Dict, List
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from pydantic import ValidationError
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from content_discovery.constants import TrendingMode, TrendingScoring
+from content_discovery.db.dao.hashtag_dao import HashtagDAO
+from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.dao.trending_topic_dao import TrendingTopicDAO
+from content_discovery.db.models.hashtag_model import HashtagModel
+from content_discovery.settings import Settings, settings
+from content_discovery.sketch import CountMinSketch, HeavyHitters
+from content_discovery.sliding_window import SlidingWindowCounter
+from content_discovery.velocity import velocity_scores
+from content_discovery.web.api.trending.hashtags import (
+    TrendingHashtags,
+    trending_hashtags,
+)
+from content_discovery.web.api.trending.views import topics_cache
+
+WINDOW = datetime.timedelta(minutes=5)
+
+
+class FakeClock:
+    """Manually advanced UTC clock."""
+
+    def __init__(self) -> None:
+        self.now = datetime.datetime.utcnow()
+
+    def __call__(self) -> datetime.datetime:
+        """Current time."""
+        return self.now
+
+
+async def _post(dbsession: AsyncSession, content: str, times: int) -> None:
+    snap_dao = SnapDAO(dbsession)
+    hashtag_dao = HashtagDAO(dbsession)
+    for _ in range(times):
+        snap = await snap_dao.create_snaps_model("writer", content, 1)
+        await hashtag_dao.create_hashtags(snap.id, content)
+
+
+def _counts(trending: List[Dict[str, Any]]) -> Dict[str, int]:
+    return {tag["name"]: tag["count"] for tag in trending}
+
+
+def test_counts_leave_the_window_by_bucket() -> None:
+    """Counts are dropped one bucket at a time as the window moves."""
+    counter: SlidingWindowCounter[str] = SlidingWindowCounter(600, 60, 2)
+    counter.add("a", 30)
+    counter.add("a", 90, 2)
+    counter.add("b", 100)
+    counter.advance(100)
+
+    assert counter.frequent() == {"a": 3}
+    counter.advance(630)
+    assert counter.frequent() == {"a": 2}
+    assert counter.count("b") == 1
+    counter.add("b", 50)
+    counter.advance(720)
+    assert not counter.frequent()
+    assert not counter
+
+
+def test_sketch_estimates_are_bounded() -> None:
+    """Estimates are never below the count nor far above it."""
+    sketch: CountMinSketch[int] = CountMinSketch(error=0.01, failure=0.01)
+    counts = {key: 1000 // key for key in range(1, 1000)}
+    for key, count in counts.items():
+        sketch.add(key, count)
+
+    bound = sketch.total * 0.01
+    for key, count in counts.items():
+        assert count <= sketch.estimate(key) <= count + bound
+
+
+def test_heavy_hitters_keep_the_most_counted() -> None:
+    """Only the most counted keys are kept, and they leave with the window."""
+    hitters: HeavyHitters[int] = HeavyHitters(600, 10, 50, 5, 0.001, 0.01)
+    for key in range(1, 200):
+        hitters.add(key, 30, 1000 // key)
+    hitters.advance(30)
+
+    expected = {1: 1000, 2: 500, 3: 333, 4: 250, 5: 200}
+    assert hitters.frequent() == expected
+    hitters.advance(660)
+    assert not hitters.frequent()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("mode", list(TrendingMode))
+async def test_trending_counts_are_incremental(
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    mode: TrendingMode,
+) -> None:
+    """New uses are added on each refresh and old ones expire."""
+    monkeypatch.setattr(settings, "trending_mode", mode)
+    clock = FakeClock()
+    trending = TrendingHashtags(WINDOW, 4, clock=clock)
+    hashtag_dao = HashtagDAO(dbsession)
+    await _post(dbsession, "#Hot", 4)
+    await _post(dbsession, "#cold", 3)
+
+    first = await trending.refresh(hashtag_dao)
+    await _post(dbsession, "#cold", 1)
+    second = await trending.refresh(hashtag_dao)
+    clock.now += datetime.timedelta(minutes=2)
+    reloaded = await TrendingHashtags(WINDOW, 4, clock=clock).refresh(hashtag_dao)
+    clock.now += WINDOW
+    expired = await trending.refresh(hashtag_dao)
+
+    assert _counts(first) == {"#hot": 4}
+    assert _counts(second) == {"#hot": 4, "#cold": 4}
+    assert _counts(reloaded) == _counts(second)
+    assert not expired
+
+
+def test_velocity_scores_favor_spikes() -> None:
+    """Sudden uses score higher than as many usual ones."""
+    recent = [10, 10, 0, 2]
+    totals = [10, 1000, 5, 2]
+
+    scores = velocity_scores(recent, totals, 99, 1)
+
+    assert scores[0] == pytest.approx(9)
+    ranking = sorted(zip(scores, "abcd"), reverse=True)
+    assert [key for _, key in ranking] == ["a", "d", "b", "c"]
+
+
+@pytest.mark.parametrize("period", [0, 7 * 60, 60 * 60])
+def test_velocity_period_must_divide_the_window(period: float) -> None:
+    """Velocity periods as long as the window, or not dividing it, fail."""
+    with pytest.raises(ValidationError):
+        Settings(
+            trending_scoring=TrendingScoring.velocity,
+            trending_window=60 * 60,
+            trending_velocity_period=period,
+        )
+    Settings(trending_window=60 * 60, trending_velocity_period=period)
+
+
+@pytest.mark.anyio
+async def test_velocity_scoring_finds_spikes(
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A hashtag trends when it is used more than usual."""
+    monkeypatch.setattr(settings, "trending_scoring", TrendingScoring.velocity)
+    trending = TrendingHashtags(datetime.timedelta(hours=10), 4)
+    await _post(dbsession, "#steady", 40)
+    earlier = datetime.datetime.utcnow() - datetime.timedelta(hours=5)
+    await dbsession.execute(update(HashtagModel).values(created_at=earlier))
+    await _post(dbsession, "#steady", 6)
+    await _post(dbsession, "#spike", 6)
+
+    spikes = await trending.refresh(HashtagDAO(dbsession))
+
+    assert [tag["name"] for tag in spikes] == ["#spike"]
+    assert spikes[0]["count"] == 6
+    assert spikes[0]["score"] == pytest.approx(5)
+
+
+@pytest.mark.anyio
+async def test_trending_hashtags_are_listed(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """The last trending hashtags are listed by score."""
+    await _post(dbsession, "#less", 4)
+    await _post(dbsession, "#more", 5)
+    await trending_hashtags.refresh(HashtagDAO(dbsession))
+    url = fastapi_app.url_path_for("get_trending_hashtags")
+
+    response = await client.get(url, params={"limit": 1})
+
+    assert response.json() == [{"name": "#more", "count": 5, "score": 5}]
+
+
+@pytest.mark.anyio
+async def test_topics_are_listed_with_their_uses(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    dbsession: AsyncSession,
+) -> None:
+    """Topics are counted in one query and the listing is cached."""
+    topics_cache.clear()
+    topic_dao = TrendingTopicDAO(dbsession)
+    await _post(dbsession, "#used", 3)
+    await topic_dao.create_topic_model("#used")
+    await topic_dao.create_topic_model("#unused")
+    url = fastapi_app.url_path_for("get_all")
+
+    listed = await client.get(url)
+    await topic_dao.create_topic_model("#later")
+    cached = await client.get(url)
+
+    uses = {topic["name"]: topic["times_used"] for topic in listed.json()}
+    assert uses == {"#used": 3, "#unused": 0}
+    assert cached.json() == listed.json()
+    topics_cache.clear()
@@ -0,0 +1,33 @@
+"""
+Velocity scores of counts against their history.
+
+The score of a key is the z-score of its count in the recent period,
+taken as a Poisson variable whose mean is the key's average count per
+period in the baseline, the rest of its window, plus 'prior'. The prior
+keeps the mean above zero, a key without history has to be counted
+several times to score high.
+"""
+import math
+from typing import List, Sequence
+
+
+def velocity_scores(
+    recent: Sequence[int],
+    totals: Sequence[int],
+    periods: float,
+    prior: float,
+) -> List[float]:
+    """
+    Scores of keys by how much their recent counts exceed their baseline.
+
+    :param recent: count of each key in the recent period.
+    :param totals: count of each key in its window, recent period included.
+    :param periods: number of recent periods in the baseline.
+    :param prior: count added to every mean, above zero.
+    :returns: score of each key.
+    """
+    scores = []
+    for recent_count, total in zip(recent, totals):
+        expected = (total - recent_count) / periods + prior
+        scores.append((recent_count - expected) / math.sqrt(expected))
+    return scores
@@ -32,6 +32,7 @@ class FeedPack(BaseModel):
     """Collection of snaps"""
 
     snaps: Optional[List[Snap]]
+    next_cursor: Optional[str] = None  # None cuando no hay más páginas
 
 
 class PostSnap(BaseModel):
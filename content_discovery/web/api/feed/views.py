@@ -1,16 +1,28 @@
 import datetime
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Response
 from fastapi.param_functions import Depends
 
 from content_discovery.constants import Frequency, Privacy
 from content_discovery.db.dao.hashtag_dao import HashtagDAO
 from content_discovery.db.dao.mention_dao import MentionDAO
+from content_discovery.db.dao.snap_count_dao import SnapCountDAO
 from content_discovery.db.dao.snaps_dao import SnapDAO, sort_snaps_with_children
+from content_discovery.db.dao.timeline_dao import TimelineDAO
 from content_discovery.db.dao.trending_topic_dao import TrendingTopicDAO
 from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.db.pagination import (
+    Cursor,
+    get_cursor,
+    snaps_and_shares_cursor,
+    snaps_cursor,
+    timeline_cursor,
+)
 from content_discovery.notifications import Notifications
+from content_discovery.services.hashtag_completions.completions import (
+    hashtag_completions,
+)
 from content_discovery.web.api.feed.schema import (
     FeedPack,
     PostSnap,
@@ -18,13 +30,19 @@ from content_discovery.web.api.feed.schema import (
     Snap,
     UpdateSnap,
 )
+from content_discovery.web.api.timeline import (
+    fan_out_snap,
+    forget_recent_snaps,
+    home_timeline,
+)
 from content_discovery.web.api.utils import (
     complete_snap,
     complete_snaps,
     complete_snaps_and_shares,
-    followed_users,
+    followed_ids,
     generate_freqencies,
-    get_user_info,
+    get_users_info,
+    hydrate_snaps,
 )
 
 router = APIRouter()
@@ -32,7 +50,9 @@ router = APIRouter()
 NON_EXISTENT = 405
 BAD_INPUT = 214
 OK = 200
-DAYS_MONTH = 30
+MONTHS = 5
+# Points of a time series, each one is a row of the query.
+MAX_POINTS = 10000
 
 
 async def _create_snap(
@@ -42,8 +62,11 @@ async def _create_snap(
     mention_dao: MentionDAO,
     snaps_dao: SnapDAO,
     trend_dao: TrendingTopicDAO,
+    timeline_dao: TimelineDAO,
 ) -> Snap:
+    await fan_out_snap(snap, timeline_dao)
     hashtags = await hashtag_dao.create_hashtags(snap.id, snap.content)
+    hashtag_completions.record(hashtags)
     await mention_dao.create_mentions(snap.id, snap.content)
     mentions = await mention_dao.get_mentioned_users_in_snap(snap.id)
     mentions_ids = [mention.mentioned_id for mention in mentions]
@@ -76,6 +99,7 @@ async def post_snap(
     hashtag_dao: HashtagDAO = Depends(),
     mention_dao: MentionDAO = Depends(),
     trend_dao: TrendingTopicDAO = Depends(),
+    timeline_dao: TimelineDAO = Depends(),
 ) -> Optional[Snap]:
     """Create a snap with the received content."""
     Privacy.validate(incoming_message.privacy)
@@ -92,6 +116,7 @@ async def post_snap(
         mention_dao,
         snaps_dao,
         trend_dao,
+        timeline_dao,
     )
 
 
@@ -102,6 +127,7 @@ async def reply_snap(
     hashtag_dao: HashtagDAO = Depends(),
     mention_dao: MentionDAO = Depends(),
     trend_dao: TrendingTopicDAO = Depends(),
+    timeline_dao: TimelineDAO = Depends(),
 ) -> Optional[Snap]:
     """Create a reply snap with the received content."""
     if not incoming_message.parent_id:
@@ -135,6 +161,7 @@ async def reply_snap(
         mention_dao,
         snaps_dao,
         trend_dao,
+        timeline_dao,
     )
 
 
@@ -151,9 +178,13 @@ async def update_snap(
 async def delete_snap(
     snap_id: str,
     snaps_dao: SnapDAO = Depends(),
+    timeline_dao: TimelineDAO = Depends(),
 ) -> None:
     """Deletes a snap."""
+    snap = await snaps_dao.get_snap_from_id(snap_id)
     await snaps_dao.delete_snap(snap_id)
+    if snap:
+        await forget_recent_snaps(snap.user_id, timeline_dao)
 
 
 @router.get("/snap/{snap_id}")
@@ -172,20 +203,32 @@ async def get_snap(
 
 
 @router.get("/")
-async def get_snaps(
+async def get_snaps(  # noqa: WPS211
     user_id: str,
+    background_tasks: BackgroundTasks,
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     snaps_dao: SnapDAO = Depends(),
+    timeline_dao: TimelineDAO = Depends(),
 ) -> FeedPack:
     """Returns a list of snaps shared or written by the user's followed."""
-    users = followed_users(user_id)
-    snaps = await snaps_dao.get_snaps_and_shares(users, users, limit, offset)
-    completed_snaps = await complete_snaps_and_shares(snaps, user_id, snaps_dao)
+    following = await followed_ids(user_id)
+    timeline = await home_timeline(
+        user_id,
+        following,
+        limit,
+        offset,
+        cursor,
+        timeline_dao,
+        background_tasks,
+    )
+    entries = [(entry.snap, entry.sharer_id or None) for entry in timeline]
+    completed_snaps = await hydrate_snaps(entries, user_id, snaps_dao)
 
-    if completed_snaps.snaps is not None:
-        return sort_snaps_with_children(completed_snaps.snaps)
-    return FeedPack(snaps=[])
+    feed = sort_snaps_with_children(completed_snaps)
+    feed.next_cursor = timeline_cursor(timeline, limit)
+    return feed
 
 
 @router.get("/{user_id}/snaps_and_shares/requested_by/{requester_id}")
@@ -194,25 +237,29 @@ async def get_snaps_and_shares(
     requester_id: str,
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     snaps_dao: SnapDAO = Depends(),
 ) -> FeedPack:
     """Returns a list of snaps and snapshares from user."""
     try:
-        followed_by_user = followed_users(requester_id)
+        followed_by_user = await followed_ids(requester_id)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Could not find requester: {exc}")
     snaps = await snaps_dao.get_snaps_and_shares(
-        [{"id": user_id}],
+        [user_id],
         followed_by_user,
         limit,
         offset,
+        cursor,
     )
 
-    return await complete_snaps_and_shares(
+    feed = await complete_snaps_and_shares(
         snaps,
         requester_id,
         snaps_dao,
     )
+    feed.next_cursor = snaps_and_shares_cursor(snaps, limit)
+    return feed
 
 
 @router.get("/{user_id}/shares")
@@ -220,6 +267,7 @@ async def get_shares(
     user_id: str,
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     snaps_dao: SnapDAO = Depends(),
 ) -> FeedPack:
     """Returns a list of snaps and snapshares from user."""
@@ -227,12 +275,15 @@ async def get_shares(
         [user_id],
         limit,
         offset,
+        cursor,
     )
-    return await complete_snaps(
+    feed = await complete_snaps(
         snaps,
         user_id,
         snaps_dao,
     )
+    feed.next_cursor = snaps_cursor(snaps, limit)
+    return feed
 
 
 @router.get("/{user_id}/snaps")
@@ -240,6 +291,7 @@ async def get_snaps_from_user(
     user_id: str,
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     snaps_dao: SnapDAO = Depends(),
 ) -> FeedPack:
     """
@@ -248,9 +300,11 @@ async def get_snaps_from_user(
     WARNING: Does not check if user requested is valid.
     If user does not exist, returns empty list.
     """
-    followed = followed_users(user_id)
-    snaps = await snaps_dao.get_from_user(user_id, followed, limit, offset)
-    return await complete_snaps(snaps, user_id, snaps_dao)
+    followed = await followed_ids(user_id)
+    snaps = await snaps_dao.get_from_user(user_id, followed, limit, offset, cursor)
+    feed = await complete_snaps(snaps, user_id, snaps_dao)
+    feed.next_cursor = snaps_cursor(snaps, limit)
+    return feed
 
 
 @router.get("/admin/{user_id}/snaps")
@@ -258,14 +312,21 @@ async def get_snaps_from_user_by_admin(
     user_id: str,
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     snaps_dao: SnapDAO = Depends(),
 ) -> FeedPack:
     """Returns a list of snap ids from user by admin."""
     snaps = []
 
-    snap_models = await snaps_dao.get_from_user_by_admin(user_id, limit, offset)
+    snap_models = await snaps_dao.get_from_user_by_admin(
+        user_id,
+        limit,
+        offset,
+        cursor,
+    )
+    profiles = await get_users_info(snap_model.user_id for snap_model in snap_models)
     for snap_model in snap_models:
-        (username, fullname, url) = get_user_info(snap_model.user_id)
+        (username, fullname, url) = profiles[snap_model.user_id]
 
         snap = Snap(
             id=snap_model.id,
@@ -284,21 +345,31 @@ async def get_snaps_from_user_by_admin(
 
         snaps.append(snap)
 
-    return FeedPack(snaps=snaps)
+    return FeedPack(snaps=snaps, next_cursor=snaps_cursor(snap_models, limit))
 
 
 @router.get("/get_all_snaps", response_model=None)
 async def get_all_snaps(
+    response: Response,
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     snaps_dao: SnapDAO = Depends(),
 ) -> List[Any]:
-    """Returns a list of snaps"""
+    """
+    Returns a list of snaps.
+
+    The cursor of the next page is sent in the X-Next-Cursor header.
+    """
     completed_snap = []
-    snaps = await snaps_dao.get_all_snaps(limit=limit, offset=offset)
+    snaps = await snaps_dao.get_all_snaps(limit=limit, offset=offset, cursor=cursor)
+    following_page = snaps_cursor(snaps, limit)
+    if following_page is not None:
+        response.headers["X-Next-Cursor"] = following_page
+    profiles = await get_users_info(snap.user_id for snap in snaps)
 
     for snap in snaps:
-        (username, fullname, url) = get_user_info(snap.user_id)
+        (username, fullname, url) = profiles[snap.user_id]
 
         completed_snap.append(
             {
@@ -327,7 +398,7 @@ async def get_snap_replies(
     snaps_dao: SnapDAO = Depends(),
 ) -> FeedPack:
     """Returns a list of replies of a snap ids."""
-    followed = followed_users(user_id)
+    followed = await followed_ids(user_id)
     snaps = await snaps_dao.get_snap_replies(snap_id, followed)
 
     return await complete_snaps(snaps, user_id, snaps_dao)
@@ -355,46 +426,22 @@ async def get_snap_count(
 async def get_snap_frequencies(
     frequency: Frequency,
     number: int,
-    snaps_dao: SnapDAO = Depends(),
+    snap_count_dao: SnapCountDAO = Depends(),
 ) -> List[int]:
-    """Returns number of snaps created in a time period."""
-    if number <= 0:
+    """Returns number of snaps created in the last periods."""
+    if number <= 0 or number > MAX_POINTS:
         raise HTTPException(status_code=BAD_INPUT, detail="Bad input")
 
-    time_units = {
-        Frequency.hourly: datetime.timedelta(hours=1),
-        Frequency.daily: datetime.timedelta(days=1),
-        Frequency.per_minute: datetime.timedelta(minutes=1),
-    }
-
-    time_unit = time_units[frequency]
-
-    snapcounts = []
-    start_datetime = datetime.datetime.utcnow() - (time_unit * number)
-    for _ in range(0, number):
-        end_datetime = start_datetime + time_unit
-        print(start_datetime)
-        print(end_datetime)
-        count = await snaps_dao.quantity_new_snaps_in_time_period(
-            start_datetime,
-            end_datetime,
-        )
-        snapcounts.append(count)
-        start_datetime = end_datetime
-    print(snapcounts)
-    return snapcounts
+    points = await snap_count_dao.get_snap_time_series(frequency, number)
+    return [count for _, count in points]
 
 
 @router.get("/snaps/stats/monthly_frequency")
 async def get_snap_frequencies_redefinition(
-    snaps_dao: SnapDAO = Depends(),
+    snap_count_dao: SnapCountDAO = Depends(),
 ) -> Any:
     """Returns snaps created in recent months."""
-    dict_dates = await generate_freqencies(
-        snaps_dao,
-        datetime.timedelta(days=DAYS_MONTH),
-        5,
-    )
+    dict_dates = await generate_freqencies(snap_count_dao, MONTHS)
     return_list = []
     for date, count in dict_dates.items():
         return_list.append({"month": date, "value": str(count)})
@@ -1,57 +1,119 @@
-from typing import Any
+from typing import Any, List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from fastapi.param_functions import Depends
 
+from content_discovery.constants import SearchMode
 from content_discovery.db.dao.hashtag_dao import HashtagDAO
 from content_discovery.db.dao.snaps_dao import SnapDAO
-from content_discovery.web.api.feed.schema import FeedPack
-from content_discovery.web.api.utils import (
-    complete_snaps,
-    followed_users,
-    get_user_info,
+from content_discovery.db.pagination import (
+    Cursor,
+    SearchCursor,
+    get_cursor,
+    get_search_cursor,
+    search_cursor,
+    snaps_cursor,
+)
+from content_discovery.services.hashtag_completions.completions import (
+    hashtag_completions,
 )
+from content_discovery.web.api.feed.schema import FeedPack
+from content_discovery.web.api.utils import complete_snaps, followed_ids, get_users_info
 
 router = APIRouter()
 
 
 @router.get("/hashtag", response_model=None)
-async def filter_hashtags(
+async def filter_hashtags(  # noqa: WPS211
     user_id: str,
     hashtag: str,
+    prefix: bool = False,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     hashtag_dao: HashtagDAO = Depends(),
     snaps_dao: SnapDAO = Depends(),
 ) -> FeedPack:
-    """Retrieve a list of filtered snaps by hashtags."""
-    snaps = await hashtag_dao.filter_hashtags(hashtag)
+    """
+    Retrieve a list of filtered snaps by hashtags, newest first.
+
+    Hashtags match regardless of case and of the leading '#'. With 'prefix'
+    every hashtag starting with 'hashtag' matches.
+    """
+    snaps = await hashtag_dao.filter_hashtags(hashtag, prefix, limit, offset, cursor)
 
-    return await complete_snaps(snaps, user_id, snaps_dao)
+    feed = await complete_snaps(snaps, user_id, snaps_dao)
+    feed.next_cursor = snaps_cursor(snaps, limit)
+    return feed
+
+
+@router.get("/hashtag/autocomplete")
+async def autocomplete_hashtags(
+    prefix: str,
+    limit: int = 10,
+) -> List[str]:
+    """Most used recent hashtags starting with 'prefix', for suggestions."""
+    return hashtag_completions.complete(prefix, limit)
 
 
 @router.get("/content", response_model=None)
-async def filter_snaps(
+async def filter_snaps(  # noqa: WPS211
     user_id: str,
     content: str,
+    mode: SearchMode = SearchMode.words,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: Optional[SearchCursor] = Depends(get_search_cursor),
     snaps_dao: SnapDAO = Depends(),
 ) -> FeedPack:
-    """Retrieve a list of filtered snaps by content."""
-    users = followed_users(user_id)
-    snaps = await snaps_dao.filter_snaps(content, users)
-    return await complete_snaps(snaps, user_id, snaps_dao)
+    """Retrieve a list of filtered snaps by content, most relevant first."""
+    following = await followed_ids(user_id)
+    results = await snaps_dao.filter_snaps(
+        content,
+        following,
+        mode,
+        limit,
+        offset,
+        cursor,
+    )
+    snaps = [snap for snap, _score in results]
+    feed = await complete_snaps(snaps, user_id, snaps_dao)
+    feed.next_cursor = search_cursor(results, limit)
+    return feed
 
 
 @router.get("/admin/content", response_model=None)
-async def admin_filter_snaps(
+async def admin_filter_snaps(  # noqa: WPS211
+    response: Response,
     content: str,
+    mode: SearchMode = SearchMode.words,
+    limit: int = 10,
+    offset: int = 0,
+    cursor: Optional[SearchCursor] = Depends(get_search_cursor),
     snaps_dao: SnapDAO = Depends(),
 ) -> Any:
-    """Retrieve a list of filtered snaps by content."""
+    """
+    Retrieve a list of filtered snaps by content, most relevant first.
+
+    The cursor of the next page is sent in the X-Next-Cursor header.
+    """
     completed_snaps = []
 
-    snaps = await snaps_dao.admin_filter_snaps(content)
+    results = await snaps_dao.admin_filter_snaps(
+        content,
+        mode,
+        limit,
+        offset,
+        cursor,
+    )
+    following_page = search_cursor(results, limit)
+    if following_page is not None:
+        response.headers["X-Next-Cursor"] = following_page
+    snaps = [snap for snap, _score in results]
+    profiles = await get_users_info(snap.user_id for snap in snaps)
 
     for snap in snaps:
-        (username, fullname, _url) = get_user_info(snap.user_id)
+        (username, fullname, _url) = profiles[snap.user_id]
 
         completed_snaps.append(
             {
@@ -0,0 +1,197 @@
+"""
+Interactions of a user applied in bulk.
+
+Clients replaying actions queued while offline send them all at once.
+The operations are grouped by interaction and snap, and only the last one
+of each group decides what is written: every snap that ends up liked is
+inserted by one statement, every one that ends up unliked deleted by
+another, and so on for shares and favs. Whether each earlier operation
+changed anything follows from what existed before, as if they had been
+sent one by one. The counters of every snap are then changed at once.
+"""
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+from content_discovery.constants import InteractionAction
+from content_discovery.db.dao.interaction_dao import COUNTER_OF, InteractionDAO
+from content_discovery.db.dao.snaps_dao import COUNTERS, Counts, SnapDAO
+from content_discovery.db.dao.timeline_dao import TimelineDAO
+from content_discovery.db.models.fav_model import FavModel
+from content_discovery.db.models.like_model import LikeModel
+from content_discovery.db.models.share_model import ShareModel
+from content_discovery.db.utils import is_valid_uuid
+from content_discovery.notifications import Notifications
+from content_discovery.services.interaction_counters.counters import (
+    Deltas,
+    interaction_counters,
+)
+from content_discovery.web.api.interactions.schema import (
+    InteractionOperation,
+    InteractionResult,
+)
+from content_discovery.web.api.timeline import fan_out_share, forget_recent_snaps
+
+# Interaction written by each action, and whether it adds or removes it.
+ACTIONS: Dict[InteractionAction, Tuple[Any, bool]] = {
+    InteractionAction.like: (LikeModel, True),
+    InteractionAction.unlike: (LikeModel, False),
+    InteractionAction.share: (ShareModel, True),
+    InteractionAction.unshare: (ShareModel, False),
+    InteractionAction.fav: (FavModel, True),
+    InteractionAction.unfav: (FavModel, False),
+}
+
+# Indexes of the operations on each snap, in order.
+Groups = Dict[uuid.UUID, List[int]]
+
+
+class Changes(NamedTuple):
+    """What the operations of one kind of interaction wrote."""
+
+    # author of each snap that exists
+    authors: Dict[uuid.UUID, str]
+    added: List[Any]
+    removed: List[Any]
+
+
+async def apply_interactions(
+    user_id: str,
+    operations: List[InteractionOperation],
+    interaction_dao: InteractionDAO,
+    snap_dao: SnapDAO,
+    timeline_dao: TimelineDAO,
+) -> List[InteractionResult]:
+    """
+    Apply the interactions of a user in order, in the current transaction.
+
+    :param user_id: id of the user interacting.
+    :param operations: interactions, with snaps that may not exist.
+    :param interaction_dao: DAO writing the interactions.
+    :param snap_dao: DAO changing the counters.
+    :param timeline_dao: DAO of the timelines the shares are in.
+    :returns: whether each operation changed anything.
+    """
+    results = [
+        InteractionResult(action=operation.action, snap_id=operation.snap_id)
+        for operation in operations
+    ]
+    groups: Dict[Any, Groups] = defaultdict(lambda: defaultdict(list))
+    for index, operation in enumerate(operations):
+        if is_valid_uuid(operation.snap_id):
+            model, _ = ACTIONS[operation.action]
+            groups[model][uuid.UUID(operation.snap_id)].append(index)
+
+    deltas: Deltas = {}
+    written = {}
+    for model, snaps in groups.items():
+        changes = await _write(interaction_dao, model, user_id, snaps, operations)
+        _settle(results, snaps, changes)
+        _add_deltas(deltas, changes.added, _delta(model, 1))
+        _add_deltas(deltas, changes.removed, _delta(model, -1))
+        written[model] = changes
+    await interaction_counters.count_many(snap_dao, deltas)
+
+    likes = written.get(LikeModel)
+    if likes:
+        await _notify_likes(user_id, likes, snap_dao)
+    shares = written.get(ShareModel)
+    if shares:
+        await _update_timelines(user_id, shares, timeline_dao)
+    return results
+
+
+async def _write(
+    interaction_dao: InteractionDAO,
+    model: Any,
+    user_id: str,
+    snaps: Groups,
+    operations: List[InteractionOperation],
+) -> Changes:
+    """Write the last operation on each snap."""
+    adds = []
+    removes = []
+    for snap_id, indexes in snaps.items():
+        _, adding = ACTIONS[operations[indexes[-1]].action]
+        if adding:
+            adds.append(snap_id)
+        else:
+            removes.append(snap_id)
+    authors: Dict[uuid.UUID, str] = {}
+    added: List[Any] = []
+    removed: List[Any] = []
+    if adds:
+        authors, added = await interaction_dao.add_many(model, user_id, adds)
+    if removes:
+        removed_authors, removed = await interaction_dao.remove_many(
+            model,
+            user_id,
+            removes,
+        )
+        authors.update(removed_authors)
+    return Changes(authors, added, removed)
+
+
+def _settle(
+    results: List[InteractionResult],
+    snaps: Groups,
+    changes: Changes,
+) -> None:
+    """Replay the operations on each snap from what existed before them."""
+    added_ids = {interaction.snap_id for interaction in changes.added}
+    removed_ids = {interaction.snap_id for interaction in changes.removed}
+    for snap_id, indexes in snaps.items():
+        if snap_id not in changes.authors:
+            continue
+        # it existed before if the last operation removed it, or if that
+        # operation adds it and did not insert it
+        _, adding = ACTIONS[results[indexes[-1]].action]
+        existed = snap_id in removed_ids
+        if adding:
+            existed = snap_id not in added_ids
+        for index in indexes:
+            _, adding = ACTIONS[results[index].action]
+            results[index].applied = adding != existed
+            existed = adding
+
+
+def _delta(model: Any, sign: int) -> Counts:
+    """Change of the counters of a snap by one interaction."""
+    change = [0, 0, 0]
+    change[COUNTERS.index(COUNTER_OF[model])] = sign
+    likes, shares, favs = change
+    return likes, shares, favs
+
+
+def _add_deltas(deltas: Deltas, interactions: List[Any], delta: Counts) -> None:
+    """Add the change of each interaction to the deltas of its snap."""
+    more_likes, more_shares, more_favs = delta
+    for interaction in interactions:
+        likes, shares, favs = deltas.get(interaction.snap_id, (0, 0, 0))
+        changed = (likes + more_likes, shares + more_shares, favs + more_favs)
+        deltas[interaction.snap_id] = changed
+
+
+async def _notify_likes(user_id: str, changes: Changes, snap_dao: SnapDAO) -> None:
+    """Notify the authors of the liked snaps, like the like endpoint does."""
+    for like in changes.added:
+        await Notifications().send_like_notification(
+            from_id=user_id,
+            to_id=changes.authors[like.snap_id],
+            snap_id=str(like.snap_id),
+            snap_dao=snap_dao,
+        )
+
+
+async def _update_timelines(
+    user_id: str,
+    changes: Changes,
+    timeline_dao: TimelineDAO,
+) -> None:
+    """Add and remove the shares, like the share endpoints do."""
+    for share in changes.added:
+        await fan_out_share(share, timeline_dao)
+    for unshared in changes.removed:
+        await timeline_dao.remove_share(unshared.snap_id, user_id)
+    if changes.removed:
+        await forget_recent_snaps(user_id, timeline_dao)
@@ -0,0 +1,27 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from content_discovery.constants import InteractionAction
+
+
+class InteractionOperation(BaseModel):
+    """Interaction of the user with a snap"""
+
+    action: InteractionAction
+    snap_id: str
+
+
+class BulkInteractions(BaseModel):
+    """Interactions of a user, applied in order in a single transaction"""
+
+    operations: List[InteractionOperation]
+
+
+class InteractionResult(BaseModel):
+    """Outcome of an interaction"""
+
+    action: InteractionAction
+    snap_id: str
+    # False when it changed nothing, like liking a snap twice
+    applied: bool = False
@@ -1,18 +1,35 @@
 import datetime
 from typing import Any, List
 
-import httpx
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from fastapi.param_functions import Depends
 
 from content_discovery.db.dao.fav_dao import FavDAO
 from content_discovery.db.dao.hashtag_dao import HashtagDAO
-from content_discovery.db.dao.like_dao import LikeDAO
+from content_discovery.db.dao.interaction_dao import InteractionDAO
 from content_discovery.db.dao.mention_dao import MentionDAO
 from content_discovery.db.dao.share_dao import ShareDAO
 from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.db.dao.timeline_dao import TimelineDAO
+from content_discovery.db.models.fav_model import FavModel
+from content_discovery.db.models.like_model import LikeModel
+from content_discovery.db.models.share_model import ShareModel
 from content_discovery.notifications import Notifications
+from content_discovery.services.interaction_counters.counters import (
+    interaction_counters,
+)
+from content_discovery.settings import settings
 from content_discovery.web.api.feed.schema import FeedPack
+from content_discovery.web.api.interactions.bulk import apply_interactions
+from content_discovery.web.api.interactions.schema import (
+    BulkInteractions,
+    InteractionResult,
+)
+from content_discovery.web.api.timeline import (
+    fan_out_share,
+    fan_out_snap,
+    forget_recent_snaps,
+)
 from content_discovery.web.api.utils import complete_snaps
 
 router = APIRouter()
@@ -22,28 +39,27 @@ router = APIRouter()
 async def like_snap(
     user_id: str,
     snap_id: str,
-    like_dao: LikeDAO = Depends(),
+    interaction_dao: InteractionDAO = Depends(),
     snap_dao: SnapDAO = Depends(),
-) -> Any:
+) -> None:
     """User likes a snap."""
-    # Create like in db
-    like = await like_dao.create_like_model(user_id=user_id, snap_id=snap_id)
+    # Create like in db and increase likes from snap
+    like = await interaction_counters.add(
+        interaction_dao,
+        LikeModel,
+        user_id,
+        snap_id,
+    )
 
     if not like:
-        return None
-
-    # Increase likes from snap
-    await snap_dao.increase_likes(snap_id)
-
-    snap = await snap_dao.get_snap_from_id(snap_id)
+        return
 
-    if not snap:
-        return httpx.Response(status_code=404)
+    _, author_id = like
 
     # send new like notification
     await Notifications().send_like_notification(
         from_id=user_id,
-        to_id=snap.user_id,
+        to_id=author_id,
         snap_id=snap_id,
         snap_dao=snap_dao,
     )
@@ -53,99 +69,101 @@ async def like_snap(
 async def unlike_snap(
     user_id: str,
     snap_id: str,
-    like_dao: LikeDAO = Depends(),
-    snap_dao: SnapDAO = Depends(),
+    interaction_dao: InteractionDAO = Depends(),
 ) -> None:
     """User unlikes a snap."""
-    # Check if like exists
-    like = await like_dao.get_like_model(user_id, snap_id)
-
-    if not like:
-        return
-
-    # Delete like from db
-    await like_dao.delete_like_model(user_id, snap_id)
-
-    # Decrease likes from snap
-    await snap_dao.decrease_likes(snap_id)
+    # Delete like from db and decrease likes from snap
+    await interaction_counters.remove(interaction_dao, LikeModel, user_id, snap_id)
 
 
 @router.post("/{user_id}/share/{snap_id}")
 async def share_snap(
     user_id: str,
     snap_id: str,
-    share_dao: ShareDAO = Depends(),
-    snap_dao: SnapDAO = Depends(),
+    interaction_dao: InteractionDAO = Depends(),
+    timeline_dao: TimelineDAO = Depends(),
 ) -> None:
     """User shares a snap."""
-    # Create share in db
-    share = await share_dao.create_share_model(user_id, snap_id)
+    # Create share in db and increase shares from snap
+    share = await interaction_counters.add(
+        interaction_dao,
+        ShareModel,
+        user_id,
+        snap_id,
+    )
 
     if not share:
         return
 
-    # Increase shares from snap
-    await snap_dao.increase_shares(snap_id)
+    # Add share to the followers' timelines
+    await fan_out_share(share[0], timeline_dao)
 
 
 @router.delete("/{user_id}/unshare/{snap_id}")
 async def unshare_snap(
     user_id: str,
     snap_id: str,
-    share_dao: ShareDAO = Depends(),
-    snap_dao: SnapDAO = Depends(),
+    interaction_dao: InteractionDAO = Depends(),
+    timeline_dao: TimelineDAO = Depends(),
 ) -> None:
     """User unshare a snap."""
-    # Check if share exists
-    share = await share_dao.get_share_model(user_id, snap_id)
+    # Delete share from db and decrease shares from snap
+    share = await interaction_counters.remove(
+        interaction_dao,
+        ShareModel,
+        user_id,
+        snap_id,
+    )
 
     if not share:
         return
 
-    # Delete share from db // TODO fix this
-    await share_dao.delete_share_model(user_id, snap_id)
-
-    # Decrease shares from snap
-    await snap_dao.decrease_shares(snap_id)
+    # Remove share from the followers' timelines
+    await timeline_dao.remove_share(share[0].snap_id, user_id)
+    await forget_recent_snaps(user_id, timeline_dao)
 
 
 @router.post("/{user_id}/fav/{snap_id}")
 async def fav_snap(
     user_id: str,
     snap_id: str,
-    fav_dao: FavDAO = Depends(),
-    snap_dao: SnapDAO = Depends(),
+    interaction_dao: InteractionDAO = Depends(),
 ) -> None:
     """User favs a snap."""
-    # Create fav in db
-    fav = await fav_dao.create_fav_model(user_id, snap_id)
-
-    if not fav:
-        return
-
-    # Increase favs from snap
-    await snap_dao.increase_favs(snap_id)
+    # Create fav in db and increase favs from snap
+    await interaction_counters.add(interaction_dao, FavModel, user_id, snap_id)
 
 
 @router.delete("/{user_id}/unfav/{snap_id}")
 async def unfav_snap(
     user_id: str,
     snap_id: str,
-    fav_dao: FavDAO = Depends(),
-    snap_dao: SnapDAO = Depends(),
+    interaction_dao: InteractionDAO = Depends(),
 ) -> None:
     """User unfav a snap."""
-    # Check if fav exists
-    fav = await fav_dao.get_fav_model(user_id, snap_id)
+    # Delete fav from db and decrease favs from snap
+    await interaction_counters.remove(interaction_dao, FavModel, user_id, snap_id)
 
-    if not fav:
-        return
 
-    # Delete fav from db
-    await fav_dao.delete_fav_model(user_id, snap_id)
-
-    # Decrease favs from snap
-    await snap_dao.decrease_favs(snap_id)
+@router.post("/{user_id}/bulk")
+async def bulk_interactions(
+    user_id: str,
+    bulk: BulkInteractions,
+    interaction_dao: InteractionDAO = Depends(),
+    snap_dao: SnapDAO = Depends(),
+    timeline_dao: TimelineDAO = Depends(),
+) -> List[InteractionResult]:
+    """User likes, shares and favs many snaps, or undoes it, in one request."""
+    if len(bulk.operations) > settings.bulk_interactions_limit:
+        raise HTTPException(status_code=400, detail="Too many operations")
+
+    return await apply_interactions(
+        user_id,
+        bulk.operations,
+        interaction_dao,
+        snap_dao,
+        timeline_dao,
+    )
 
 
 @router.get("/{user_id}/favs")
@@ -164,20 +182,37 @@ async def make_snap_public(
     user_id: str,
     snap_id: str,
     snap_dao: SnapDAO = Depends(),
+    share_dao: ShareDAO = Depends(),
+    timeline_dao: TimelineDAO = Depends(),
 ) -> None:
     """User makes a snap public."""
     await snap_dao.make_public(snap_id)
 
+    # Put the snap and its shares back in the timelines
+    snap = await snap_dao.get_snap_from_id(snap_id)
+    if not snap:
+        return
+    await fan_out_snap(snap, timeline_dao)
+    for share in await share_dao.get_shares_of_snap(snap_id):
+        await fan_out_share(share, timeline_dao)
+
 
 @router.post("/{user_id}/set_private/{snap_id}")
 async def make_snap_private(
     user_id: str,
     snap_id: str,
     snap_dao: SnapDAO = Depends(),
+    timeline_dao: TimelineDAO = Depends(),
 ) -> None:
     """User makes a snap private."""
     await snap_dao.make_private(snap_id)
 
+    # Remove the snap and its shares from the timelines
+    snap = await snap_dao.get_snap_from_id(snap_id)
+    if snap:
+        await timeline_dao.remove_snap(snap.id)
+        await forget_recent_snaps(snap.user_id, timeline_dao)
+
 
 @router.get("/mentions/{user_id}")
 async def get_mentioned_snap_by_id(
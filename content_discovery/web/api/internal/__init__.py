@@ -0,0 +1,4 @@
+"""Internal API used by other services."""
+from content_discovery.web.api.internal.views import router
+
+__all__ = ["router"]
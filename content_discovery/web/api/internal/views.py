@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from content_discovery.db.dao.timeline_dao import TimelineDAO
+from content_discovery.db.dependencies import get_db_session
+from content_discovery.services.cache_invalidation.listener import publish_invalidation
+from content_discovery.settings import settings
+from content_discovery.web.api.utils import FOLLOW_GRAPH, followed_ids
+
+router = APIRouter()
+
+
+@router.post("/follow_graph/{user_id}/invalidate")
+async def invalidate_follow_graph(
+    user_id: str,
+    session: AsyncSession = Depends(get_db_session),
+    timeline_dao: TimelineDAO = Depends(),
+) -> None:
+    """
+    Forget the cached follow graph of a user in every worker.
+
+    identity-socializer calls this for both users
+    whenever one of them follows or unfollows the other.
+    The home timeline of the user is rebuilt the next time it is read.
+    """
+    await publish_invalidation(session, FOLLOW_GRAPH, user_id)
+    await timeline_dao.drop(user_id)
+
+
+@router.post("/timeline/{user_id}/rebuild")
+async def rebuild_timeline(
+    user_id: str,
+    timeline_dao: TimelineDAO = Depends(),
+) -> None:
+    """Build the home timeline of a user again from snaps and shares."""
+    await timeline_dao.rebuild(
+        user_id,
+        await followed_ids(user_id),
+        settings.timeline_rebuild_limit,
+    )
@@ -1,14 +1,25 @@
 import datetime
-from typing import Any, Dict
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 
+from content_discovery.cache import TTLCache
+from content_discovery.constants import Privacy
+from content_discovery.db.dao.snap_count_dao import SnapCountDAO
 from content_discovery.db.dao.snaps_dao import SnapDAO
+from content_discovery.settings import settings
 
 router = APIRouter()
 
-START_YEAR = 1970
-START_DATE = datetime.datetime(START_YEAR, 1, 1, 1, 1, 1)
+# user, start and end date of the period
+MetricsKey = Tuple[str, str, str]
+
+user_metrics_cache: TTLCache[MetricsKey, Any] = TTLCache(
+    "user_metrics",
+    capacity=settings.user_metrics_cache_capacity,
+    ttl=settings.user_metrics_cache_ttl,
+)
 
 
 @router.get("/health")
@@ -21,17 +32,11 @@ def health_check() -> None:
 
 
 @router.get("/get_snap_rates", response_model=None)
-async def snap_rates(snaps_dao: SnapDAO = Depends()) -> Dict[str, str]:
+async def snap_rates(snap_count_dao: SnapCountDAO = Depends()) -> Dict[str, str]:
     """Get snap rates for public and private snaps."""
-    snapcounts = await snaps_dao.quantity_new_snaps_in_time_period(
-        start=START_DATE,
-        end=datetime.datetime.now(),
-    )
-    snapcounts_public = await snaps_dao.quantity_new_snaps_in_time_period(
-        start=START_DATE,
-        end=datetime.datetime.now(),
-        filter_only_public=True,
-    )
+    totals = await snap_count_dao.get_totals()
+    snapcounts = sum(totals.values())
+    snapcounts_public = totals.get(Privacy.PUBLIC.value, 0)
     return {
         "total_snaps": str(snapcounts),
         "private_snaps": str(snapcounts - snapcounts_public),
@@ -50,8 +55,27 @@ async def get_user_metrics(
     snaps_dao: SnapDAO = Depends(),
 ) -> Any:
     """Returns metrics for a user in a time period."""
+    days = _period_days(start_date, end_date)
+    if days is not None and days > settings.user_metrics_max_days:
+        raise HTTPException(status_code=422, detail="Period too long")
+    loader = partial(_load_user_metrics, snaps_dao)
+    return await user_metrics_cache.get_or_load((user_id, start_date, end_date), loader)
+
+
+async def _load_user_metrics(snaps_dao: SnapDAO, key: MetricsKey) -> Any:
+    user_id, start_date, end_date = key
     return await snaps_dao.get_snap_metrics_by_user(
         user_id=user_id,
         start_date=start_date,
         end_date=end_date,
     )
+
+
+def _period_days(start_date: str, end_date: str) -> Optional[int]:
+    """Days of a period, both dates included, None if a date is not valid."""
+    try:
+        start = datetime.datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        return None
+    return (end - start).days + 1
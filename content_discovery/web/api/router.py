@@ -5,6 +5,7 @@ from content_discovery.web.api import (
     feed,
     filter,
     interactions,
+    internal,
     metrics,
     monitoring,
     trending,
@@ -22,3 +23,4 @@ api_router.include_router(
 api_router.include_router(docs.router)
 api_router.include_router(filter.router, prefix="/filter", tags=["filter"])
 api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
+api_router.include_router(internal.router, prefix="/internal", tags=["internal"])
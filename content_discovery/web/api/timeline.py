@@ -0,0 +1,321 @@
+"""
+Home timelines.
+
+Snaps and shares are fanned out on write to the materialized timelines of
+the author's followers, except for authors with more followers than
+'timeline_fanout_threshold'. The snaps of those authors are merged into
+timelines when they are read: the recent ones from a per author cache of
+their ids, loaded fresh, and older ones from snaps and shares.
+"""
+import datetime
+import itertools
+import uuid
+from functools import partial
+from typing import Collection, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from fastapi import BackgroundTasks
+from loguru import logger
+
+from content_discovery.cache import TTLCache
+from content_discovery.constants import Privacy, Visibility
+from content_discovery.db.dao.timeline_dao import TimelineDAO
+from content_discovery.db.models.share_model import ShareModel
+from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.db.models.timeline_model import TimelineEntry, TimelineKey
+from content_discovery.db.models.timeline_state_model import TimelineStateModel
+from content_discovery.db.pagination import Cursor
+from content_discovery.services.cache_invalidation.listener import (
+    publish_invalidation,
+    register_invalidation_handler,
+)
+from content_discovery.settings import settings
+from content_discovery.web.api.utils import follower_ids
+
+RECENT_SNAPS = "recent_snaps"
+
+# Users whose timeline is being built by this process.
+_rebuilding: Set[str] = set()
+
+
+class RecentEntries(NamedTuple):
+    """Latest entries of an author, none is missing after 'since'."""
+
+    since: datetime.datetime
+    keys: List[TimelineKey]
+
+
+recent_snaps_cache: TTLCache[str, RecentEntries] = TTLCache(
+    RECENT_SNAPS,
+    capacity=settings.recent_snaps_cache_capacity,
+    ttl=settings.recent_snaps_cache_ttl,
+)
+register_invalidation_handler(RECENT_SNAPS, recent_snaps_cache.invalidate)
+
+
+async def fan_out_snap(snap: SnapsModel, timeline_dao: TimelineDAO) -> None:
+    """Add a snap to the timelines of its author and their followers."""
+    audience = await _audience(snap.user_id, timeline_dao)
+    await timeline_dao.fan_out(audience, snap.id, snap.created_at)
+
+
+async def fan_out_share(share: ShareModel, timeline_dao: TimelineDAO) -> None:
+    """Add a share to the timelines of the sharer and their followers."""
+    audience = await _audience(share.user_id, timeline_dao)
+    await timeline_dao.fan_out(
+        audience,
+        share.snap_id,
+        share.created_at,
+        sharer_id=share.user_id,
+    )
+
+
+async def forget_recent_snaps(user_id: str, timeline_dao: TimelineDAO) -> None:
+    """Make every worker pull the recent snaps of a user again."""
+    await publish_invalidation(timeline_dao.session, RECENT_SNAPS, user_id)
+
+
+async def home_timeline(  # noqa: WPS211
+    user_id: str,
+    following: FrozenSet[str],
+    limit: int,
+    offset: int,
+    cursor: Optional[Cursor],
+    timeline_dao: TimelineDAO,
+    background_tasks: BackgroundTasks,
+) -> List[TimelineEntry]:
+    """
+    Get a page of the home timeline of a user, newest first.
+
+    The materialized timeline is built after it is first read, in the
+    background, and read from snaps and shares until it is built. Snaps of
+    followed authors that are not fanned out on write are merged into it.
+    """
+    state = await timeline_dao.get_state(user_id)
+    if state is None or state.building:
+        if state is None or _abandoned(state):
+            _rebuild_later(user_id, following, timeline_dao, background_tasks)
+        return await timeline_dao.get_entries(
+            following,
+            following,
+            limit,
+            offset,
+            cursor,
+        )
+    pulled_authors = await timeline_dao.get_high_fanout(following - {user_id})
+    if not pulled_authors:
+        return await _materialized(
+            state,
+            following,
+            limit,
+            offset,
+            cursor,
+            timeline_dao,
+        )
+
+    # Both sources are sorted, so the page is made of their first entries.
+    window = limit if cursor else offset + limit
+    pushed = await _materialized(state, following, window, 0, cursor, timeline_dao)
+    pulled = await _pull(
+        pulled_authors,
+        following,
+        cursor,
+        pushed[-1] if len(pushed) == window else None,
+        window,
+        timeline_dao,
+    )
+    merged = _merge(pushed, pulled)
+    if cursor:
+        return merged[:limit]
+    return merged[offset : offset + limit]  # noqa: E203
+
+
+def _rebuild_later(
+    user_id: str,
+    following: FrozenSet[str],
+    timeline_dao: TimelineDAO,
+    background_tasks: BackgroundTasks,
+) -> None:
+    """
+    Build the timeline once the response is sent, unless it is being built.
+
+    It is built with the session of the request, which is only closed
+    after the background tasks of the request have run.
+    """
+    if user_id in _rebuilding:
+        return
+    _rebuilding.add(user_id)
+    background_tasks.add_task(_rebuild, user_id, following, timeline_dao)
+
+
+def _abandoned(state: TimelineStateModel) -> bool:
+    """Whether a timeline being built took longer than any build would."""
+    timeout = datetime.timedelta(seconds=settings.timeline_rebuild_timeout)
+    return state.built_at < datetime.datetime.utcnow() - 2 * timeout
+
+
+async def _rebuild(
+    user_id: str,
+    following: FrozenSet[str],
+    timeline_dao: TimelineDAO,
+) -> None:
+    try:  # noqa: WPS501
+        await timeline_dao.rebuild(
+            user_id,
+            following,
+            settings.timeline_rebuild_limit,
+        )
+    finally:
+        _rebuilding.discard(user_id)
+
+
+async def _materialized(  # noqa: WPS211
+    state: TimelineStateModel,
+    following: FrozenSet[str],
+    limit: int,
+    offset: int,
+    cursor: Optional[Cursor],
+    timeline_dao: TimelineDAO,
+) -> List[TimelineEntry]:
+    """Page of the materialized timeline, continued past its oldest entry."""
+    entries = await timeline_dao.get_timeline(
+        state.owner_id,
+        following,
+        limit,
+        offset,
+        cursor,
+    )
+    if len(entries) == limit or not state.truncated:
+        return entries
+
+    # Entries older than the ones built are read from snaps and shares,
+    # after the oldest one built, skipping those the offset is past.
+    size, oldest = await timeline_dao.get_end(state.owner_id)
+    skipped = 0 if cursor else max(offset - size, 0)
+    if oldest is not None and (cursor is None or oldest < cursor):
+        cursor = oldest
+    older = await timeline_dao.get_entries(
+        following,
+        following,
+        skipped + limit - len(entries),
+        0,
+        cursor,
+    )
+    return entries + older[skipped:]
+
+
+async def _audience(user_id: str, timeline_dao: TimelineDAO) -> FrozenSet[str]:
+    """Timelines that a new snap or share of the user is written to."""
+    marked = await timeline_dao.get_high_fanout_author(user_id)
+    recheck = datetime.timedelta(seconds=settings.high_fanout_recheck)
+    if marked and marked.updated_at > datetime.datetime.utcnow() - recheck:
+        # Followers are only counted again once in a while.
+        await forget_recent_snaps(user_id, timeline_dao)
+        return frozenset((user_id,))
+
+    try:
+        followers = await follower_ids(user_id)
+    except Exception as exc:
+        # Followers will see it once their timelines are rebuilt.
+        logger.warning(f"Could not fan out to the followers of {user_id}: {exc}")
+        return frozenset((user_id,))
+
+    if len(followers) > settings.timeline_fanout_threshold:
+        await timeline_dao.mark_high_fanout(user_id, len(followers))
+        await forget_recent_snaps(user_id, timeline_dao)
+        return frozenset((user_id,))
+    if marked:
+        await timeline_dao.unmark_high_fanout(user_id)
+    return followers | {user_id}
+
+
+async def _pull(  # noqa: WPS211
+    authors: Collection[str],
+    following: FrozenSet[str],
+    cursor: Optional[Cursor],
+    last_pushed: Optional[TimelineEntry],
+    window: int,
+    timeline_dao: TimelineDAO,
+) -> List[TimelineEntry]:
+    """
+    Entries of authors not fanned out on write that may be in a page.
+
+    They are taken from the recent entries of the authors, and read from
+    snaps and shares when the page goes further back than those.
+    Entries older than the last one pushed into the page cannot be in it.
+    """
+    merge_window = datetime.timedelta(seconds=settings.timeline_merge_window)
+    loader = partial(
+        _load_recent_snaps,
+        timeline_dao,
+        datetime.datetime.utcnow() - merge_window,
+    )
+    recent = [
+        await recent_snaps_cache.get_or_load(author, loader) for author in authors
+    ]
+    since = max(
+        (entries.since if entries else datetime.datetime.max for entries in recent),
+    )
+    if last_pushed is None or last_pushed.created_at <= since:
+        return await timeline_dao.get_entries(authors, following, window, 0, cursor)
+
+    recent_keys = itertools.chain.from_iterable(
+        entries.keys for entries in recent if entries
+    )
+    keys = [
+        key
+        for key in recent_keys
+        if _in_page(_key_position(key), cursor, _position(last_pushed))
+    ]
+    snaps = await timeline_dao.get_snaps({key.snap_id for key in keys})
+    pulled = [
+        TimelineEntry(snaps[key.snap_id], key.sharer_id, key.created_at)
+        for key in keys
+        if key.snap_id in snaps
+    ]
+    return [entry for entry in pulled if _is_visible(entry.snap, following)]
+
+
+async def _load_recent_snaps(
+    timeline_dao: TimelineDAO,
+    since: datetime.datetime,
+    user_id: str,
+) -> RecentEntries:
+    limit = settings.recent_snaps_per_author
+    written, shared = await timeline_dao.get_recent_entries(user_id, since, limit)
+    # Past the oldest of 'limit' entries, others may have been left out.
+    for keys in (written, shared):
+        if len(keys) == limit:
+            since = max(since, keys[-1].created_at)
+    return RecentEntries(since, written + shared)
+
+
+def _in_page(
+    position: Tuple[datetime.datetime, uuid.UUID],
+    cursor: Optional[Cursor],
+    last_pushed: Tuple[datetime.datetime, uuid.UUID],
+) -> bool:
+    return position >= last_pushed and (cursor is None or position < cursor)
+
+
+def _is_visible(snap: SnapsModel, following: FrozenSet[str]) -> bool:
+    if snap.visibility != Visibility.PUBLIC.value:
+        return False
+    return snap.privacy == Privacy.PUBLIC.value or snap.user_id in following
+
+
+def _merge(
+    pushed: List[TimelineEntry],
+    pulled: List[TimelineEntry],
+) -> List[TimelineEntry]:
+    unique: Dict[Tuple[uuid.UUID, str], TimelineEntry] = {}
+    for entry in itertools.chain(pushed, pulled):
+        unique.setdefault((entry.snap.id, entry.sharer_id), entry)
+    return sorted(unique.values(), key=_position, reverse=True)
+
+
+def _position(entry: TimelineEntry) -> Tuple[datetime.datetime, uuid.UUID]:
+    return entry.created_at, entry.snap.id
+
+
+def _key_position(key: TimelineKey) -> Tuple[datetime.datetime, uuid.UUID]:
+    return key.created_at, key.snap_id
@@ -0,0 +1,217 @@
+"""
+Trending hashtags.
+
+The uses of every hashtag within the window are counted by time bucket
+in a sliding window counter. Each refresh reads only the hashtags recorded
+since the previous one, from any worker, and drops the buckets that left
+the window. The last 'trending_settle' seconds are read again, to count
+the hashtags of transactions that committed late, and the counts are
+reloaded every 'trending_rebuild' seconds to forget deleted snaps.
+
+In the approximate 'trending_mode' the counts are estimated by sketches
+of a fixed size, for rates of new hashtags that exact counts of every one
+of them cannot keep up with.
+
+With the velocity 'trending_scoring' the uses of the last period are also
+counted, and hashtags trend when they are used much more than usual
+rather than when they are used enough.
+
+The process leading the background jobs refreshes them periodically,
+the others only when they are asked for them.
+"""
+import asyncio
+import datetime
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from content_discovery.constants import TrendingMode, TrendingScoring
+from content_discovery.db.dao.hashtag_dao import HashtagDAO
+from content_discovery.settings import settings
+from content_discovery.sketch import HeavyHitters
+from content_discovery.sliding_window import SlidingWindowCounter
+from content_discovery.velocity import velocity_scores
+
+WindowCounter = Union[SlidingWindowCounter[int], HeavyHitters[int]]
+
+
+def _timestamp(moment: datetime.datetime) -> float:
+    """Unix timestamp of a naive UTC datetime."""
+    return moment.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+class TrendingHashtags:
+    """Hashtags used the most, or the most unusually, within a rolling window."""
+
+    def __init__(
+        self,
+        window: datetime.timedelta,
+        minimum: int,
+        clock: Callable[[], datetime.datetime] = datetime.datetime.utcnow,
+    ) -> None:
+        self.window = window
+        self.minimum = minimum
+        self.settle = datetime.timedelta(seconds=settings.trending_settle)
+        self.rebuild = datetime.timedelta(seconds=settings.trending_rebuild)
+        self._recent_period = datetime.timedelta(
+            seconds=settings.trending_velocity_period,
+        )
+        self._clock = clock
+        self.latest: List[Dict[str, Any]] = []
+        self._counter = self._new_counter()
+        self._recent = self._new_recent_counter()
+        self._names: Dict[int, str] = {}
+        self._read: Dict[Tuple[uuid.UUID, int], datetime.datetime] = {}
+        self._rebuild_at = datetime.datetime.min
+        self._refreshed_at = datetime.datetime.min
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, hashtag_dao: HashtagDAO) -> List[Dict[str, Any]]:
+        """
+        Count the hashtags recorded since the last refresh.
+
+        :param hashtag_dao: DAO the hashtags are read with.
+        :returns: name, count and score of the trending hashtags,
+            by decreasing score.
+        """
+        async with self._lock:
+            return await self._refresh(hashtag_dao)
+
+    async def current(
+        self,
+        hashtag_dao: HashtagDAO,
+        max_age: datetime.timedelta,
+    ) -> List[Dict[str, Any]]:
+        """
+        Trending hashtags, refreshed first if they are older than 'max_age'.
+
+        :param hashtag_dao: DAO the hashtags are read with.
+        :param max_age: oldest refresh that is served.
+        :returns: name, count and score of the trending hashtags,
+            by decreasing score.
+        """
+        async with self._lock:
+            if self._clock() - self._refreshed_at > max_age:
+                await self._refresh(hashtag_dao)
+            return self.latest
+
+    async def _refresh(self, hashtag_dao: HashtagDAO) -> List[Dict[str, Any]]:
+        now = self._clock()
+        if now >= self._rebuild_at:
+            await self._load(hashtag_dao, now)
+        else:
+            await self._read_uses(hashtag_dao, now - self.settle)
+        self._counter.advance(_timestamp(now))
+        if self._recent is not None:
+            self._recent.advance(_timestamp(now))
+
+        trending = self._score()
+        unnamed = [
+            hashtag_id for hashtag_id in trending if hashtag_id not in self._names
+        ]
+        if unnamed:
+            self._names.update(await hashtag_dao.get_hashtag_names(unnamed))
+        self.latest = [
+            {"name": self._names[hashtag_id], "count": count, "score": score}
+            for hashtag_id, (count, score) in trending.items()
+            if hashtag_id in self._names
+        ]
+        self.latest.sort(key=lambda tag: tag["score"], reverse=True)
+        self._refreshed_at = now
+        return self.latest
+
+    def _score(self) -> Dict[int, Tuple[int, float]]:
+        """Count and score of the trending hashtag ids."""
+        if self._recent is None:
+            frequent = self._counter.frequent()
+            return {key: (count, count) for key, count in frequent.items()}
+
+        recent = self._recent.frequent()
+        hashtag_ids = list(recent)
+        totals = [self._counter.count(hashtag_id) for hashtag_id in hashtag_ids]
+        scores = velocity_scores(
+            [recent[hashtag_id] for hashtag_id in hashtag_ids],
+            totals,
+            self.window / self._recent_period - 1,
+            settings.trending_velocity_prior,
+        )
+        threshold = settings.trending_velocity_threshold
+        return {
+            hashtag_id: (total, score)
+            for hashtag_id, total, score in zip(hashtag_ids, totals, scores)
+            if score >= threshold
+        }
+
+    def _new_counter(self) -> WindowCounter:
+        window = self.window.total_seconds()
+        if settings.trending_mode == TrendingMode.approximate:
+            return HeavyHitters(
+                window,
+                settings.trending_sketch_buckets,
+                self.minimum,
+                settings.trending_sketch_capacity,
+                settings.trending_sketch_error,
+                settings.trending_sketch_failure,
+            )
+        return SlidingWindowCounter(window, settings.trending_bucket, self.minimum)
+
+    def _new_recent_counter(self) -> Optional[SlidingWindowCounter[int]]:
+        """Counter of the last period, for velocity scores only."""
+        if settings.trending_scoring != TrendingScoring.velocity:
+            return None
+        return SlidingWindowCounter(
+            self._recent_period.total_seconds(),
+            settings.trending_bucket,
+            self.minimum,
+        )
+
+    async def _load(self, hashtag_dao: HashtagDAO, now: datetime.datetime) -> None:
+        """Count every use within the window again."""
+        self._counter = self._new_counter()
+        self._recent = self._new_recent_counter()
+        self._read = {}
+        settled = now - self.settle
+        counts = await hashtag_dao.count_hashtag_uses(
+            now - self.window,
+            settled,
+            self._counter.bucket,
+        )
+        for hashtag_id, timestamp, count in counts:
+            self._counter.add(hashtag_id, timestamp, count)
+        if self._recent is not None:
+            # the buckets of the window may be longer than the period
+            counts = await hashtag_dao.count_hashtag_uses(
+                now - self._recent_period,
+                settled,
+                self._recent.bucket,
+            )
+            for hashtag_id, timestamp, count in counts:
+                self._recent.add(hashtag_id, timestamp, count)
+        await self._read_uses(hashtag_dao, settled)
+        self._rebuild_at = now + self.rebuild
+
+    async def _read_uses(
+        self,
+        hashtag_dao: HashtagDAO,
+        since: datetime.datetime,
+    ) -> None:
+        """Count the uses after 'since' that were not counted yet."""
+        uses = await hashtag_dao.get_hashtag_uses(since)
+        for snap_id, hashtag_id, created_at in uses:
+            use = (snap_id, hashtag_id)
+            if use in self._read:
+                continue
+            self._read[use] = created_at
+            timestamp = _timestamp(created_at)
+            self._counter.add(hashtag_id, timestamp)
+            if self._recent is not None:
+                self._recent.add(hashtag_id, timestamp)
+        # older uses are not read again
+        self._read = {
+            use: read_at for use, read_at in self._read.items() if read_at > since
+        }
+
+
+trending_hashtags = TrendingHashtags(
+    datetime.timedelta(seconds=settings.trending_window),
+    settings.trending_minimum,
+)
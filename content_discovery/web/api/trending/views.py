@@ -1,29 +1,51 @@
-from typing import Any
+import datetime
+from functools import partial
+from typing import Any, Dict, List
 
 from fastapi import APIRouter, Depends
 
+from content_discovery.cache import TTLCache
 from content_discovery.db.dao.hashtag_dao import HashtagDAO
 from content_discovery.db.dao.trending_topic_dao import TrendingTopicDAO
+from content_discovery.settings import settings
+from content_discovery.web.api.trending.hashtags import trending_hashtags
 
 router = APIRouter()
 
+TOPICS = "topics"
+
+# as often as the background job refreshes them
+TRENDING_MAX_AGE = datetime.timedelta(seconds=5)
+
+Topics = List[Dict[str, Any]]
+
+# The listing is the same for every user, it is kept as a single entry.
+topics_cache: TTLCache[str, Topics] = TTLCache(
+    "trending_topics",
+    capacity=1,
+    ttl=settings.trending_topics_cache_ttl,
+)
+
 
 @router.get("/get_all", response_model=None)
 async def get_all(
     topic_dao: TrendingTopicDAO = Depends(),
-    hashtag_dao: HashtagDAO = Depends(),
 ) -> Any:
     """Returns all topics."""
-    tts = []
-
-    topics = await topic_dao.get_all_topics()
-    for tt in topics:
-        topic = {
-            "id": tt.id,
-            "name": tt.name,
-            "created_at": tt.created_at,
-            "times_used": await hashtag_dao.get_times_used_by_hashtag(tt.name),
-        }
-        tts.append(topic)
-
-    return tts
+    loader = partial(_load_topics, topic_dao)
+    return await topics_cache.get_or_load(TOPICS, loader) or []
+
+
+@router.get("/hashtags")
+async def get_trending_hashtags(
+    limit: int = 20,
+    hashtag_dao: HashtagDAO = Depends(),
+) -> Topics:
+    """Hashtags trending now with their counts and scores, best first."""
+    trending = await trending_hashtags.current(hashtag_dao, TRENDING_MAX_AGE)
+    return trending[:limit]
+
+
+async def _load_topics(topic_dao: TrendingTopicDAO, _key: str) -> Topics:
+    topics = await topic_dao.get_topics_with_uses()
+    return [dict(topic) for topic in topics]
@@ -1,32 +1,128 @@
-import datetime
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
 
-import httpx
 from sqlalchemy.engine.row import RowMapping
+from starlette import status
 
+from content_discovery.cache import TTLCache
+from content_discovery.constants import Frequency
+from content_discovery.db.dao.snap_count_dao import SnapCountDAO
 from content_discovery.db.dao.snaps_dao import SnapDAO
 from content_discovery.db.models.snaps_model import SnapsModel
+from content_discovery.services.cache_invalidation.listener import (
+    register_invalidation_handler,
+)
+from content_discovery.services.identity_socializer.client import identity_socializer
 from content_discovery.settings import settings
 from content_discovery.web.api.feed.schema import FeedPack, Snap
 
+# A snap and the id of the user that shared it, if any.
+SnapEntry = Tuple[SnapsModel, Optional[str]]
 
-def get_user_info(user_id: str) -> tuple[str, str, str]:
+
+UNKNOWN_USER = ("Unknown", "Unknown", "Unknown")
+
+profile_cache: TTLCache[str, Tuple[str, str, str]] = TTLCache(
+    "profiles",
+    capacity=settings.profile_cache_capacity,
+    ttl=settings.profile_cache_ttl,
+    stale_ttl=settings.profile_cache_stale_ttl,
+    negative_ttl=settings.profile_cache_negative_ttl,
+)
+
+
+async def get_user_info(user_id: str) -> tuple[str, str, str]:
     """Returns username and fullname of user."""
     try:
-        author = httpx.get(_url_get_user(user_id)).json()
+        profile = await profile_cache.get_or_load(user_id, _fetch_user_info)
+    except Exception:
+        return UNKNOWN_USER
+    return profile or UNKNOWN_USER
 
-        photo_url = author["profile_photo_id"]
-        username = author["username"]
-        first_name = author["first_name"] or "Unknown"
-        last_name = author["last_name"] or "name"
 
-        fullname = f"{first_name} {last_name}"
-        return (username, fullname, photo_url)
-    except Exception:
-        return ("Unknown", "Unknown", "Unknown")
+async def _fetch_user_info(user_id: str) -> Optional[Tuple[str, str, str]]:
+    response = await identity_socializer.get(_url_get_user(user_id))
+    if response.status_code == status.HTTP_404_NOT_FOUND:
+        return None
+    response.raise_for_status()
+    author = response.json()
+
+    photo_url = author["profile_photo_id"]
+    username = author["username"]
+    first_name = author["first_name"] or "Unknown"
+    last_name = author["last_name"] or "name"
+
+    fullname = f"{first_name} {last_name}"
+    return (username, fullname, photo_url)
+
+
+FOLLOW_GRAPH = "follow_graph"
+
+following_cache: TTLCache[str, FrozenSet[str]] = TTLCache(
+    "following",
+    capacity=settings.follow_cache_capacity,
+    ttl=settings.follow_cache_ttl,
+)
+followers_cache: TTLCache[str, FrozenSet[str]] = TTLCache(
+    "followers",
+    capacity=settings.follow_cache_capacity,
+    ttl=settings.follow_cache_ttl,
+)
+
+
+async def followed_ids(user_id: str) -> FrozenSet[str]:
+    """
+    Returns the ids of the users that the user follows, including the user.
+
+    Follow sets are cached until they expire or identity-socializer
+    invalidates them through the internal API.
+    """
+    following = await following_cache.get_or_load(user_id, _fetch_followed_ids)
+    return following or frozenset((user_id,))
+
+
+async def follower_ids(user_id: str) -> FrozenSet[str]:
+    """Returns the ids of the users that follow the user, cached like followed_ids."""
+    followed_by = await followers_cache.get_or_load(user_id, _fetch_follower_ids)
+    return followed_by or frozenset()
+
 
+async def mutual_ids(user_id: str, candidates: Iterable[str]) -> set[str]:
+    """
+    Returns the candidates that are the user or mutually follow the user.
 
-def followed_users(user_id: str) -> List[Dict[str, Any]]:
+    The whole set is resolved from the user's cached following and
+    follower sets, so a page costs one lookup instead of one per author.
+    """
+    candidates = set(candidates)
+    if candidates <= {user_id}:
+        return candidates
+
+    following, followed_by = await asyncio.gather(
+        followed_ids(user_id),
+        follower_ids(user_id),
+    )
+    return candidates & following & (followed_by | {user_id})
+
+
+def invalidate_follow_graph(user_id: str) -> None:
+    """Forget the cached follow graph of the user."""
+    following_cache.invalidate(user_id)
+    followers_cache.invalidate(user_id)
+
+
+register_invalidation_handler(FOLLOW_GRAPH, invalidate_follow_graph)
+
+
+async def _fetch_followed_ids(user_id: str) -> FrozenSet[str]:
+    return frozenset(user["id"] for user in await followed_users(user_id))
+
+
+async def _fetch_follower_ids(user_id: str) -> FrozenSet[str]:
+    return frozenset(user["id"] for user in await followers(user_id))
+
+
+async def followed_users(user_id: str) -> List[Dict[str, Any]]:
     """
     Returns a list of users that the user follows.
 
@@ -43,20 +139,19 @@ def followed_users(user_id: str) -> List[Dict[str, Any]]:
         "is_followed": true
     }
     """
-    return httpx.get(_url_get_following(user_id)).json() + [{"id": user_id}]
+    response = await identity_socializer.get(_url_get_following(user_id))
+    return response.json() + [{"id": user_id}]
 
 
-def followers(user_id: str) -> List[Dict[str, str]]:
+async def followers(user_id: str) -> List[Dict[str, str]]:
     """Returns a list of users that follow the user."""
-    return httpx.get(_url_get_followers(user_id)).json()
+    response = await identity_socializer.get(_url_get_followers(user_id))
+    return response.json()
 
 
-def is_mutuals_or_equal(user_id: str, another_id: str) -> bool:
+async def is_mutuals_or_equal(user_id: str, another_id: str) -> bool:
     """True if ids are equal or mutually follow each other."""
-    if user_id == another_id:
-        return True
-    text = httpx.get(_url_is_mutuals(user_id, another_id)).text
-    return text == "true"
+    return another_id in await mutual_ids(user_id, [another_id])
 
 
 def _url_get_followers(user_id: str) -> str:
@@ -64,11 +159,6 @@ def _url_get_followers(user_id: str) -> str:
     return f"{url}/api/interactions/{user_id}/followers"
 
 
-def _url_is_mutuals(user_id: str, another_id: str) -> str:
-    url = settings.identity_socializer_url
-    return f"{url}/api/interactions/{user_id}/mutuals_with/{another_id}"
-
-
 def _url_get_following(user_id: str) -> str:
     url = settings.identity_socializer_url
     return f"{url}/api/interactions/{user_id}/following"
@@ -84,13 +174,8 @@ async def complete_snaps(
     snap_dao: SnapDAO,
 ) -> FeedPack:
     """Returns a list of snaps with additional information."""
-    my_snaps = []
-
-    for snap in snaps:
-        completed_snap = await complete_snap(snap, user_id, snap_dao)
-        my_snaps.append(completed_snap)
-
-    return FeedPack(snaps=my_snaps)
+    entries = [(snap, None) for snap in snaps]
+    return FeedPack(snaps=await hydrate_snaps(entries, user_id, snap_dao))
 
 
 async def complete_snaps_and_shares(
@@ -99,13 +184,14 @@ async def complete_snaps_and_shares(
     snap_dao: SnapDAO,
 ) -> FeedPack:
     """Returns a list of snaps with additional information."""
-    my_snaps = []
-
-    for snap_data in snaps:
-        completed_snap = await complete_snap_and_share(snap_data, user_id, snap_dao)
-        my_snaps.append(completed_snap)
-
-    return FeedPack(snaps=my_snaps)
+    entries = [
+        (
+            snap_data["SnapsModel"],
+            snap_data["ShareModel"].user_id if snap_data["ShareModel"] else None,
+        )
+        for snap_data in snaps
+    ]
+    return FeedPack(snaps=await hydrate_snaps(entries, user_id, snap_dao))
 
 
 async def complete_snap(
@@ -114,63 +200,74 @@ async def complete_snap(
     snaps_dao: SnapDAO,
 ) -> Snap:
     """Returns a snap with additional information."""
-    (username, fullname, url) = get_user_info(snap.user_id)
+    completed_snaps = await hydrate_snaps([(snap, None)], user_id, snaps_dao)
+    return completed_snaps[0]
 
-    has_shared = await snaps_dao.user_has_shared(user_id, snap.id)
-    has_liked = await snaps_dao.user_has_liked(user_id, snap.id)
-    has_faved = await snaps_dao.user_has_faved(user_id, snap.id)
-    num_replies = await snaps_dao.count_replies_by_snap(snap.id)
 
-    can_see_likes = is_mutuals_or_equal(user_id, snap.user_id)
-    likes = snap.likes if can_see_likes else None
+async def hydrate_snaps(
+    entries: Sequence[SnapEntry],
+    user_id: str,
+    snaps_dao: SnapDAO,
+) -> List[Snap]:
+    """
+    Returns the snaps of a page with additional information.
 
-    return Snap(
-        id=snap.id,
-        author=snap.user_id,
-        content=snap.content,
-        likes=likes,
-        shares=snap.shares,
-        favs=snap.favs,
-        created_at=snap.created_at,
-        username=username,
-        fullname=fullname,
-        parent_id=snap.parent_id,
-        visibility=snap.visibility,
-        privacy=snap.privacy,
-        num_replies=num_replies,
-        has_shared=has_shared,
-        has_faved=has_faved,
-        has_liked=has_liked,
-        profile_photo_url=url,
-    )
+    Every entry is a snap together with the id of the user that shared it,
+    if any. Viewer flags and reply counts are resolved with one query each
+    for the whole page, author profiles once per distinct user and likes
+    visibility with a single mutuals lookup.
+    """
+    snap_ids = [snap.id for snap, _ in entries]
+    authors = {snap.user_id for snap, _ in entries}
+    sharers = {sharer for _, sharer in entries if sharer}
+
+    flags = await snaps_dao.get_viewer_flags(user_id, snap_ids)
+    replies = await snaps_dao.count_replies_by_snaps(snap_ids)
+    profiles = await get_users_info(authors | sharers)
+    can_see_likes = await mutual_ids(user_id, authors)
+
+    return [
+        _build_snap(
+            snap,
+            profile=profiles[snap.user_id],
+            likes=snap.likes if snap.user_id in can_see_likes else None,
+            num_replies=replies.get(snap.id, 0),
+            has_shared=snap.id in flags["shared"],
+            has_liked=snap.id in flags["liked"],
+            has_faved=snap.id in flags["faved"],
+            is_shared_by=_shared_by(sharer, profiles),
+        )
+        for snap, sharer in entries
+    ]
 
 
-async def complete_snap_and_share(
-    snap: RowMapping,
-    user_id: str,
-    snaps_dao: SnapDAO,
-) -> Snap:
-    """Returns a snap with additional information about sharing."""
-    (username, fullname, url) = get_user_info(snap["SnapsModel"].user_id)
-
-    # TODO: repeated code
-    has_shared = await snaps_dao.user_has_shared(user_id, snap["SnapsModel"].id)
-    has_liked = await snaps_dao.user_has_liked(user_id, snap["SnapsModel"].id)
-    has_faved = await snaps_dao.user_has_faved(user_id, snap["SnapsModel"].id)
-    num_replies = await snaps_dao.count_replies_by_snap(snap["SnapsModel"].id)
-    can_see_likes = is_mutuals_or_equal(user_id, snap["SnapsModel"].user_id)
-
-    likes = snap["SnapsModel"].likes if can_see_likes else None
-    (username_author, fullname_author, url_author) = get_user_info(
-        snap["SnapsModel"].user_id,
-    )
-    if snap["ShareModel"]:
-        (username, fullname, url) = get_user_info(snap["ShareModel"].user_id)
-        was_shared_by = [username] if username else []
-    else:
-        was_shared_by = []
+async def get_users_info(
+    user_ids: Iterable[str],
+) -> Dict[str, Tuple[str, str, str]]:
+    """Returns username, fullname and photo of every distinct user."""
+    distinct_ids = list(set(user_ids))
+    profiles = await asyncio.gather(*map(get_user_info, distinct_ids))
+    return dict(zip(distinct_ids, profiles))
+
 
-    snap = snap["SnapsModel"]
+def _shared_by(
+    sharer: Optional[str],
+    profiles: Dict[str, Tuple[str, str, str]],
+) -> List[str]:
+    """Username of the user that shared a snap, if it has one."""
+    if sharer is None:
+        return []
+    username = profiles[sharer][0]
+    return [username] if username else []
+
+
+def _build_snap(
+    snap: SnapsModel,
+    profile: Tuple[str, str, str],
+    likes: Optional[int],
+    **extra: Any,
+) -> Snap:
+    (username, fullname, url) = profile
     return Snap(
         id=snap.id,
         author=snap.user_id,
@@ -179,38 +276,20 @@ async def complete_snap_and_share(
         shares=snap.shares,
         favs=snap.favs,
         created_at=snap.created_at,
-        username=username_author,
-        fullname=fullname_author,
+        username=username,
+        fullname=fullname,
         parent_id=snap.parent_id,
         visibility=snap.visibility,
         privacy=snap.privacy,
-        num_replies=num_replies,
-        has_shared=has_shared,
-        has_liked=has_liked,
-        has_faved=has_faved,
-        profile_photo_url=url_author,
-        is_shared_by=was_shared_by,
+        profile_photo_url=url,
+        **extra,
     )
 
 
 async def generate_freqencies(
-    snaps_dao: SnapDAO,
-    time_unit: datetime.timedelta,
+    snap_count_dao: SnapCountDAO,
     number: int,
 ) -> Any:
-    """Generate frequencies."""
-    snapcounts = {}
-    start_datetime = datetime.datetime.utcnow() - (time_unit * number)
-    for _ in range(0, number):
-        end_datetime = start_datetime + time_unit
-        print(start_datetime)
-        print(end_datetime)
-        count = await snaps_dao.quantity_new_snaps_in_time_period(
-            start_datetime,
-            end_datetime,
-        )
-        date_string = end_datetime.strftime("%B %Y")
-        snapcounts[date_string] = count
-        start_datetime = end_datetime
-    print(snapcounts)
-    return snapcounts
+    """Snaps created in the last calendar months, by month."""
+    points = await snap_count_dao.get_snap_time_series(Frequency.monthly, number)
+    return {start.strftime("%B %Y"): count for start, count in points}
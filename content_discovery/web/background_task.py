@@ -1,73 +1,79 @@
-import asyncio
 import datetime
 from typing import Any, List
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from content_discovery.db.dao.hashtag_dao import HashtagDAO
+from content_discovery.db.dao.snap_count_dao import SnapCountDAO
 from content_discovery.db.dao.trending_topic_dao import TrendingTopicDAO
 from content_discovery.notifications import Notifications
+from content_discovery.services.leader_election.lifetime import start_leader_election
+from content_discovery.services.scheduler.scheduler import Scheduler
+from content_discovery.settings import settings
+from content_discovery.web.api.trending.hashtags import trending_hashtags
 
 PERIOD_SECONDS = 5
+LEADER_ELECTION = "content_discovery_background_tasks"
 
 
 class BackgroundTask:
     """Background process that continuously pings and handles trending topics"""
 
     def __init__(self) -> None:
-        self.app = None
-        self.session: AsyncSession
-        self.running = True
-        self.cutoff = datetime.timedelta(weeks=1)
         self.deleting_delta = datetime.timedelta(hours=3)
         self.period_deleting_minutes = 5
 
-    async def monitor_new_trending_topics(self, an_app: Any) -> None:
-        """Handle trending topics background process"""
-        self.app = an_app
-        self.session = an_app.state.db_session_factory()
+    async def monitor_new_trending_topics(self, session: AsyncSession) -> None:
+        """Store the trending hashtags and notify the new ones."""
+        trend_dao = TrendingTopicDAO(session)
+        hashtag_dao = HashtagDAO(session)
+        await self._update_trending_topics(hashtag_dao, trend_dao)
 
-        # snap_dao = SnapDAO(self.session)
-        trend_dao = TrendingTopicDAO(self.session)
-        hashtag_dao = HashtagDAO(self.session)
+    async def delete_old_trending_topic(self, session: AsyncSession) -> None:
+        """Delete the trending topics older than deleting_delta."""
+        trend_dao = TrendingTopicDAO(session)
+        await trend_dao.delete_old_trending_topics(self.deleting_delta)
 
-        while self.running:
-            date = datetime.datetime.now() - self.cutoff
-            tags = await hashtag_dao.get_top_hashtags(
-                cutoff_date=date,
-                minimum_hashtag_count=4,
-            )
-            if tags:
-                # store all tags in trend database
-                new_tags = await self._store(tags, trend_dao)
-                # send notif
-                if new_tags:
-                    await self._send_notification(new_tags)
-
-            await asyncio.sleep(PERIOD_SECONDS)
-
-        print("return from task")
-
-    async def delete_old_trending_topic(self, an_app: Any) -> None:
-        """Handle trending topics background process"""
-        self.app = an_app
-        self.session = an_app.state.db_session_factory()
-
-        trend_dao = TrendingTopicDAO(self.session)
-
-        while self.running:
-            await trend_dao.delete_old_trending_topics(self.deleting_delta)
-            await asyncio.sleep(60 * self.period_deleting_minutes)
+    async def compact_snap_counts(self, session: AsyncSession) -> None:
+        """Move the deltas of the snap counts into the rollups."""
+        await SnapCountDAO(session).compact()
 
     def kick_off_background_tasks(self, an_app: Any) -> None:
-        """Kick off background tasks."""
-        print("Tasks Started")
-        asyncio.create_task(background_task.monitor_new_trending_topics(an_app))
-        asyncio.create_task(background_task.delete_old_trending_topic(an_app))
-        print("Tasks Created")
+        """Kick off background tasks, run by a single process of the cluster."""
+        scheduler = Scheduler(an_app.state.db_session_factory)
+        scheduler.add(
+            "trending_topics",
+            self.monitor_new_trending_topics,
+            PERIOD_SECONDS,
+        )
+        scheduler.add(
+            "trending_topics_cleanup",
+            self.delete_old_trending_topic,
+            60 * self.period_deleting_minutes,
+        )
+        scheduler.add(
+            "snap_counts",
+            self.compact_snap_counts,
+            settings.snap_counts_compact_interval,
+        )
+        an_app.state.scheduler = scheduler
+        start_leader_election(an_app, LEADER_ELECTION, [scheduler.run])
+
+    async def _update_trending_topics(
+        self,
+        hashtag_dao: HashtagDAO,
+        trend_dao: TrendingTopicDAO,
+    ) -> None:
+        tags = await trending_hashtags.refresh(hashtag_dao)
+        if tags:
+            # store all tags in trend database
+            new_tags = await self._store(tags, trend_dao)
+            # send notif
+            if new_tags:
+                await self._send_notification(new_tags)
 
     async def _send_notification(self, new_tags: List[Any]) -> None:
-        first_tag = max(new_tags, key=lambda tag: tag["count"])
+        first_tag = max(new_tags, key=lambda tag: tag["score"])
         await Notifications().send_trending_notification(first_tag["name"])
 
     async def _store(self, tags: List[Any], trend_dao: TrendingTopicDAO) -> List[Any]:
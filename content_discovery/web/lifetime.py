@@ -6,6 +6,24 @@ from prometheus_fastapi_instrumentator.instrumentation import (
 )
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from content_discovery.services.cache_invalidation.lifetime import (
+    init_cache_invalidation,
+    shutdown_cache_invalidation,
+)
+from content_discovery.services.hashtag_completions.lifetime import (
+    init_hashtag_completions,
+    shutdown_hashtag_completions,
+)
+from content_discovery.services.identity_socializer.lifetime import (
+    init_identity_socializer,
+    shutdown_identity_socializer,
+)
+from content_discovery.services.interaction_counters.lifetime import (
+    init_interaction_counters,
+    shutdown_interaction_counters,
+)
+from content_discovery.services.leader_election.lifetime import shutdown_leader_election
+from content_discovery.services.scheduler.lifetime import shutdown_scheduler
 from content_discovery.settings import settings
 from content_discovery.web.background_task import background_task
 
@@ -57,6 +75,10 @@ def register_startup_event(
     async def _startup() -> None:  # noqa: WPS430
         app.middleware_stack = None
         _setup_db(app)
+        await init_interaction_counters(app)
+        await init_hashtag_completions(app)
+        await init_identity_socializer(app)
+        await init_cache_invalidation(app)
         setup_prometheus(app)
         app.middleware_stack = app.build_middleware_stack()
         background_task.kick_off_background_tasks(app)
@@ -78,7 +100,13 @@ def register_shutdown_event(
 
     @app.on_event("shutdown")
     async def _shutdown() -> None:  # noqa: WPS430
+        await shutdown_scheduler(app)
+        await shutdown_leader_election(app)
+        await shutdown_interaction_counters(app)
+        await shutdown_hashtag_completions(app)
         await app.state.db_engine.dispose()
+        await shutdown_identity_socializer(app)
+        await shutdown_cache_invalidation(app)
 
         pass  # noqa: WPS420
 